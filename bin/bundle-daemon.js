@@ -0,0 +1,213 @@
+#!/usr/bin/env node
+
+/**
+ * Long running bundle worker for django-systemjs.
+ *
+ * A single jspm Builder is kept alive for all the bundles, so node and jspm
+ * start up only once, the SystemJS config is parsed only once and modules
+ * shared between apps are translated only once.
+ *
+ * Requests are read from stdin and responses are written to stdout, one JSON
+ * object per line:
+ *
+ *   > {"id": 1, "app": "myapp/main.js", "expression": "myapp/main.js - [lib.js]",
+ *      "outfile": "/abs/path/main.js",
+ *      "options": {"minify": false, "sfx": false, "sourceMaps": true}}
+ *   < {"id": 1, "error": null, "trace": {...}}
+ *
+ * `trace` is the dependency tree used to build the bundle, in the format of
+ * `trace-deps.js`.
+ *
+ * Files that changed on disk are evicted from the Builder cache with:
+ *
+ *   > {"id": 2, "invalidate": ["/abs/path/module.js"]}
+ *   < {"id": 2, "error": null}
+ *
+ * Requests are processed concurrently, so responses may arrive out of order.
+ * The process exits once stdin is closed and all bundles are done.
+ *
+ * With `--cache FILE`, the trace and compile cache of the Builder is loaded
+ * from FILE at startup and saved to it on exit, so that unchanged modules are
+ * not transpiled again by the next run. Every cached module is stored with
+ * the hash of its source file, modules of which the file changed are dropped
+ * from the cache when it's loaded.
+ */
+
+var crypto = require('crypto');
+var fs = require('fs');
+var path = require('path');
+var readline = require('readline');
+var Builder = require('jspm').Builder;
+
+
+// stdout is reserved for the responses
+console.log = console.info = console.error;
+
+var CACHE_VERSION = 1;
+
+var args = process.argv.slice(2);  // 0 is node, 1 is the file
+var cacheFile = args[0] === '--cache' ? args[1] : null;
+
+var builder = new Builder();
+var pending = 0;
+var closed = false;
+
+
+/**
+ * Resolve the file of a module load record, or null if it's not a local file.
+ */
+function resolveFile(load) {
+    var file = load && load.path;
+    if (!file || typeof file !== 'string') {
+        return null;
+    }
+    if (file.indexOf('file://') === 0) {
+        file = decodeURIComponent(file.substr('file://'.length));
+    }
+    var baseURL = builder.loader.baseURL || '';
+    if (baseURL.indexOf('file://') === 0) {
+        baseURL = decodeURIComponent(baseURL.substr('file://'.length));
+    }
+    return path.resolve(baseURL, file);
+}
+
+function hashFile(file) {
+    try {
+        return crypto.createHash('sha1').update(fs.readFileSync(file)).digest('hex');
+    } catch (e) {
+        return null;
+    }
+}
+
+function loadCache() {
+    var data;
+    try {
+        data = JSON.parse(fs.readFileSync(cacheFile, 'utf8'));
+    } catch (e) {
+        return;  // no (valid) cache yet
+    }
+    if (!data || data.version !== CACHE_VERSION || !data.builder) {
+        return;
+    }
+
+    var cache = data.builder;
+    var hashes = data.hashes || {};
+    var trace = cache.trace || {};
+    var loads = (cache.compile && cache.compile.loads) || {};
+    Object.keys(trace).concat(Object.keys(loads)).forEach(function(name) {
+        var file = resolveFile(trace[name] || loads[name]);
+        if (!file || !hashes[name] || hashFile(file) !== hashes[name]) {
+            delete trace[name];
+            delete loads[name];
+        }
+    });
+    builder.setCache(cache);
+}
+
+function saveCache() {
+    var cache = builder.getCache();
+    var hashes = {};
+    var trace = cache.trace || {};
+    Object.keys(trace).forEach(function(name) {
+        var file = resolveFile(trace[name]);
+        var hash = file && hashFile(file);
+        if (hash) {
+            hashes[name] = hash;
+        }
+    });
+
+    var data = JSON.stringify({version: CACHE_VERSION, builder: cache, hashes: hashes});
+    // write and rename, concurrent runs must never read a partial cache
+    var tmpFile = cacheFile + '.' + process.pid + '.tmp';
+    try {
+        fs.writeFileSync(tmpFile, data);
+        fs.renameSync(tmpFile, cacheFile);
+    } catch (e) {
+        console.error('Could not save the builder cache: ' + e);
+    }
+}
+
+function exitWhenDone() {
+    if (closed && pending === 0) {
+        if (cacheFile) {
+            saveCache();
+        }
+        process.exit(0);
+    }
+}
+
+if (cacheFile) {
+    loadCache();
+}
+
+
+function respond(response) {
+    process.stdout.write(JSON.stringify(response) + '\n');
+}
+
+// same format as trace-deps.js
+function formatTrace(trace) {
+    var deps = {}
+    for( var jsapp in trace ) {
+        var skip = trace[jsapp] === false; // e.g. with google maps, see #13
+        deps[jsapp] = {
+            name: jsapp,
+            timestamp: skip ? null : trace[jsapp].timestamp,
+            path: skip ? null : trace[jsapp].path,
+            skip: skip
+        };
+    }
+    return deps;
+}
+
+function invalidate(request) {
+    request.invalidate.forEach(function(path) {
+        builder.invalidate(path);
+    });
+    return Promise.resolve();
+}
+
+function bundle(request) {
+    var options = request.options || {};
+    var buildOptions = {
+        minify: !!options.minify,
+        sourceMaps: !!options.sourceMaps
+    };
+    var build = options.sfx ? builder.buildStatic : builder.bundle;
+    // the expression may use bundle arithmetic, e.g. 'app - [common/module]'
+    return build.call(builder, request.expression || request.app, request.outfile, buildOptions);
+}
+
+
+var input = readline.createInterface({input: process.stdin, terminal: false});
+
+input.on('line', function(line) {
+    if (!line.trim()) {
+        return;
+    }
+
+    var request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        respond({id: null, error: 'Invalid request: ' + e.message});
+        return;
+    }
+
+    var handle = request.invalidate ? invalidate : bundle;
+    pending++;
+    handle(request).then(function(output) {
+        var trace = output && output.tree ? formatTrace(output.tree) : null;
+        respond({id: request.id, error: null, trace: trace});
+    }, function(err) {
+        respond({id: request.id, error: String(err && err.stack || err)});
+    }).then(function() {
+        pending--;
+        exitWhenDone();
+    });
+});
+
+input.on('close', function() {
+    closed = true;
+    exitWhenDone();
+});
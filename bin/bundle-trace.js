@@ -0,0 +1,58 @@
+#!/usr/bin/env node
+
+/**
+ * Bundle an app and report the dependency tree that was used to build it.
+ *
+ * The Builder traces the app anyway to bundle it, so the tree for the
+ * depcache comes for free instead of costing another `trace-deps.js` call.
+ *
+ * Usage:
+ *
+ *   bundle-trace.js [--minify] [--sfx] [--skip-source-maps] app outfile
+ *
+ * The bundle is written to outfile, the tree (in the format of
+ * `trace-deps.js`) to stdout.
+ */
+
+var Builder = require('jspm').Builder;
+
+
+// stdout is reserved for the tree
+console.log = console.info = console.error;
+
+var args = process.argv.slice(2);  // 0 is node, 1 is the file
+var flags = args.filter(function(arg) { return arg.indexOf('--') === 0; });
+var positional = args.filter(function(arg) { return arg.indexOf('--') !== 0; });
+var jsapp = positional[0];
+var outfile = positional[1];
+
+
+// same format as trace-deps.js
+function formatTrace(trace) {
+    var deps = {}
+    for( var jsapp in trace ) {
+        var skip = trace[jsapp] === false; // e.g. with google maps, see #13
+        deps[jsapp] = {
+            name: jsapp,
+            timestamp: skip ? null : trace[jsapp].timestamp,
+            path: skip ? null : trace[jsapp].path,
+            skip: skip
+        };
+    }
+    return deps;
+}
+
+
+var builder = new Builder();
+var buildOptions = {
+    minify: flags.indexOf('--minify') !== -1,
+    sourceMaps: flags.indexOf('--skip-source-maps') === -1
+};
+var build = flags.indexOf('--sfx') !== -1 ? builder.buildStatic : builder.bundle;
+
+build.call(builder, jsapp, outfile, buildOptions).then(function(output) {
+    process.stdout.write(JSON.stringify(formatTrace(output.tree || {}), null));
+}, function(err) {
+    process.stderr.write(String(err && err.stack || err));
+    process.exit(1);
+});
@@ -6,17 +6,26 @@
  *
  * This traces the module and extracts the relative paths to all the
  * files used.
+ *
+ * Usage:
+ *
+ *   trace-deps.js app                   -> dependency tree of app
+ *   trace-deps.js --many app1 app2 ...  -> {"app1": tree, "app2": tree, ...}
+ *
+ * With --many, all apps are traced by the same Builder, so modules shared
+ * between apps are only traced once.
  */
 
 var fs = require('fs');
 var Builder = require('jspm').Builder;
 
 
-var jsapp = process.argv[2];  // 0 is node, 1 is the file
+var args = process.argv.slice(2);  // 0 is node, 1 is the file
+var many = args[0] === '--many';
+var jsapps = many ? args.slice(1) : args.slice(0, 1);
 
 
-var builder = new Builder();
-builder.trace(jsapp).then(function(trace) {
+function formatTrace(trace) {
     var deps = {}
     for( var jsapp in trace ) {
         var skip = trace[jsapp] === false; // e.g. with google maps, see #13
@@ -27,5 +36,24 @@ builder.trace(jsapp).then(function(trace) {
             skip: skip
         };
     }
-    process.stdout.write(JSON.stringify(deps, null));
+    return deps;
+}
+
+
+var builder = new Builder();
+var result = {};
+
+// trace one after the other, so that every app profits from the trace cache
+jsapps.reduce(function(previous, jsapp) {
+    return previous.then(function() {
+        return builder.trace(jsapp).then(function(trace) {
+            result[jsapp] = formatTrace(trace);
+        });
+    });
+}, Promise.resolve()).then(function() {
+    var output = many ? result : result[jsapps[0]];
+    process.stdout.write(JSON.stringify(output, null));
+}, function(err) {
+    process.stderr.write(String(err && err.stack || err));
+    process.exit(1);
 });
@@ -32,7 +32,7 @@ setup(
     extras_require={
         'test': test_requirements,
     },
-    scripts=['bin/trace-deps.js'],
+    scripts=['bin/trace-deps.js', 'bin/bundle-daemon.js', 'bin/bundle-trace.js'],
     tests_require=test_requirements,
     test_suite='runtests.runtests',
 
@@ -10,3 +10,8 @@ class SystemJSConfig(AppConfig):
 
     def ready(self):
         from . import conf  # noqa
+        from django.conf import settings
+
+        if settings.SYSTEMJS_WARMUP:
+            from .warmup import warmup
+            warmup(settings.SYSTEMJS_WARMUP)
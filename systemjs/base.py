@@ -2,19 +2,37 @@ from __future__ import unicode_literals
 
 import hashlib
 import io
+import itertools
 import json
 import logging
+import math
 import os
 import posixpath
 import subprocess
+import threading
+import time
+from collections import Counter
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
+from django.contrib.staticfiles import finders
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.utils.encoding import force_text
+from django.utils.six.moves import queue, shlex_quote
 
 import semantic_version
 
-from .jspm import locate_package_json
+from . import signals
+from .cache import remove_artifacts
+from .jspm import find_config_files, locate_package_json
+from .paths import get_bundle_outfile, get_bundle_path, needs_ext
+from .resources import get_governor
+from .utils import write_atomic
+
+try:
+    from shutil import which
+except ImportError:  # Py2
+    from distutils.spawn import find_executable as which
 
 logger = logging.getLogger(__name__)
 
@@ -25,18 +43,260 @@ SOURCEMAPPING_URL_COMMENT = b'//# sourceMappingURL='
 
 NODE_ENV_VAR = 'NODE_PATH'
 
+# version 2 added the inverted index of file -> apps
+DEPCACHE_VERSION = 2
+
+DEPCACHE_VERSIONS = (1, DEPCACHE_VERSION)
+
 
 class BundleError(OSError):
     pass
 
 
+def get_node_env(node_path=None):
+    """
+    Build the environment for node subprocesses.
+
+    An explicitly set NODE_PATH environment variable takes precedence over
+    `node_path`.
+    """
+    node_env = os.environ.copy()
+    if node_path and NODE_ENV_VAR not in node_env:
+        node_env[NODE_ENV_VAR] = node_path
+    return node_env
+
+
+def get_size(path):
+    """
+    Return the size of the file at `path`, or None if it doesn't exist.
+    """
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def get_mtime_ns(stat):
+    mtime_ns = getattr(stat, 'st_mtime_ns', None)
+    if mtime_ns is None:  # pragma: no cover
+        mtime_ns = int(stat.st_mtime * 1e9)
+    return mtime_ns
+
+
+def resolve_executable(executable, cwd=None):
+    """
+    Return the real path of the `executable` that the shell would run, or
+    None if it can't be found.
+    """
+    if os.path.dirname(executable):
+        path = os.path.join(cwd or os.getcwd(), executable)
+        if not os.path.isfile(path):
+            return None
+    else:
+        path = which(executable)
+        if path is None:
+            return None
+    return os.path.realpath(path)
+
+
+class JSPMVersionCache(object):
+    """
+    Remembers the detected versions of jspm executables across runs.
+
+    Entries are keyed by the resolved path of the executable, and are stale
+    as soon as its mtime changes, e.g. after upgrading jspm.
+    """
+
+    name = 'jspm-version.json'
+
+    def __init__(self, executable, cwd=None):
+        self.path = resolve_executable(executable, cwd=cwd)
+
+    @property
+    def cache_file_path(self):
+        return os.path.join(settings.SYSTEMJS_CACHE_DIR, self.name)
+
+    def get_mtime(self):
+        try:
+            return get_mtime_ns(os.stat(self.path))
+        except OSError:
+            return None
+
+    def read(self):
+        try:
+            with io.open(self.cache_file_path) as infile:
+                data = json.load(infile)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self):
+        """
+        Return the cached version, or None if it's unknown or stale.
+        """
+        if self.path is None:
+            return None
+        entry = self.read().get(self.path)
+        if not isinstance(entry, dict) or entry.get('mtime') != self.get_mtime():
+            return None
+        try:
+            return semantic_version.Version(entry['version'], partial=True)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def set(self, version):
+        mtime = self.get_mtime() if self.path is not None else None
+        if mtime is None:
+            return
+        data = self.read()
+        data[self.path] = {'mtime': mtime, 'version': str(version)}
+        try:
+            write_atomic(self.cache_file_path, json.dumps(data))
+        except (IOError, OSError) as e:
+            logger.warning("Could not cache the jspm version: %s", e)
+
+
+class BundleDaemon(object):
+    """
+    A long-lived node process that bundles apps with a single jspm Builder.
+
+    Requests and responses are line-delimited JSON objects, matched by their
+    `id`. This allows multiple threads to have bundles in progress at the same
+    time.
+    """
+
+    command = 'bundle-daemon.js'
+
+    # seconds to wait for the exit code of a daemon that stopped answering
+    exit_timeout = 1
+
+    def __init__(self, cwd=None, env=None, cache_file=None):
+        """
+        :param cache_file: path of the file to load the Builder cache from at
+        startup, and to save it to on exit
+        """
+        self.cwd = cwd
+        self.env = env
+        self.cache_file = cache_file
+        self.process = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._reader = None
+        self._exited = False
+
+    def start(self):
+        cmd = self.command
+        if self.cache_file:
+            cmd += ' --cache {}'.format(shlex_quote(self.cache_file))
+        # a single process for the whole run, it doesn't take a slot
+        governor = get_governor()
+        self.process = subprocess.Popen(
+            governor.wrap_command(cmd), shell=True, cwd=self.cwd, env=governor.get_env(self.env),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            universal_newlines=True
+        )
+        self._reader = threading.Thread(target=self._read_responses)
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _read_responses(self):
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                try:
+                    response = json.loads(line)
+                except ValueError:
+                    logger.warning('Unexpected output from %s: %s', self.command, line)
+                    continue
+                with self._lock:
+                    waiter = self._pending.pop(response.get('id'), None)
+                if waiter is not None:
+                    waiter.put(response)
+        except (IOError, OSError) as e:
+            logger.warning('Could not read the output of %s: %s', self.command, e)
+
+        # the process is gone, nobody is going to answer the pending requests
+        with self._lock:
+            self._exited = True
+            pending, self._pending = self._pending, {}
+        error = self.get_exit_error()
+        for waiter in pending.values():
+            waiter.put({'error': error})
+
+    def get_exit_error(self, reason=None):
+        """
+        Describe why the daemon can't answer, with its exit code if it exited.
+        Its stderr is not captured, it goes to the output of the command.
+        """
+        # give it a moment to exit, it may only have closed its pipes
+        deadline = time.time() + self.exit_timeout
+        returncode = self.process.poll()
+        while returncode is None and time.time() < deadline:
+            time.sleep(0.05)
+            returncode = self.process.poll()
+        message = '{} exited unexpectedly'.format(self.command)
+        if returncode is not None:
+            message += ' with exit code {}'.format(returncode)
+        if reason is not None:
+            message += ' ({})'.format(reason)
+        return message
+
+    def request(self, **payload):
+        """
+        Send a request to the daemon and block until it's answered.
+        """
+        waiter = queue.Queue(maxsize=1)
+        with self._lock:
+            if self.process is None or self._exited:
+                raise BundleError('{} is not running'.format(self.command))
+            payload['id'] = next(self._ids)
+            self._pending[payload['id']] = waiter
+            try:
+                self.process.stdin.write(json.dumps(payload) + '\n')
+                self.process.stdin.flush()
+            except (IOError, OSError) as e:  # the daemon died, e.g. a broken pipe
+                del self._pending[payload['id']]
+                self._exited = True
+                error = e
+            else:
+                error = None
+        if error is not None:
+            raise BundleError(self.get_exit_error(error))
+
+        response = waiter.get()
+        if response.get('error'):
+            raise BundleError(response['error'])
+        return response
+
+    def stop(self):
+        if self.process is None:
+            return
+        # closing stdin lets the daemon finish, save its cache and exit
+        try:
+            self.process.stdin.close()
+        except (IOError, OSError):  # it died already
+            pass
+        self.process.wait()
+        self._reader.join()
+        self.process = None
+
+
 class System(object):
 
     def __init__(self, **opts):
         self.opts = opts
         self.stdout = self.stdin = self.stderr = subprocess.PIPE
         self.cwd = None
+        self.daemon = None
+        self.artifact_cache = None
+        # the apps restored from the artifact cache instead of built
+        self.restored = set()
+        # app -> dependency tree used to bundle it, see `collect_traces`
+        self.traces = None
+        self.node_env = None
         self.version = None  # JSPM version
+        # bundles may be created from multiple threads, detect the version once
+        self._version_lock = threading.Lock()
 
     def _has_jspm_log(self):
         return self.jspm_version and self.jspm_version >= JSPM_LOG_VERSION
@@ -56,13 +316,93 @@ class System(object):
     @property
     def jspm_version(self):
         if not self.version:
-            options = self.opts.copy()
-            options.setdefault('jspm', settings.SYSTEMJS_JSPM_EXECUTABLE)
-            self.version = self.get_jspm_version(options)
+            with self._version_lock:
+                if not self.version:
+                    self.version = self.load_jspm_version()
         return self.version
 
-    def bundle(self, app):
-        bundle = SystemBundle(self, app, **self.opts)
+    def load_jspm_version(self):
+        """
+        Return the configured jspm version, or the detected one.
+
+        Detecting the version requires running jspm, so it's cached in
+        SYSTEMJS_CACHE_DIR.
+        """
+        if settings.SYSTEMJS_JSPM_VERSION:
+            return semantic_version.Version(settings.SYSTEMJS_JSPM_VERSION, partial=True)
+
+        options = self.opts.copy()
+        options.setdefault('jspm', settings.SYSTEMJS_JSPM_EXECUTABLE)
+        cache = JSPMVersionCache(options['jspm'], cwd=self.cwd)
+        version = cache.get()
+        if version is None:
+            version = self.get_jspm_version(options)
+            cache.set(version)
+        return version
+
+    def collect_traces(self, node_path=None):
+        """
+        Record the dependency tree of every bundled app in `self.traces`.
+
+        The apps are bundled by `bundle-trace.js` (or the daemon), which report
+        the tree the Builder traced to create the bundle, so that the apps
+        don't need to be traced separately for the depcache.
+        """
+        self.traces = {}
+        self.node_env = get_node_env(node_path)
+
+    def get_builder_cache_path(self):
+        """
+        Return the path of the file holding the jspm Builder cache for the
+        bundle options, or None if the Builder cache is disabled.
+        """
+        if not settings.SYSTEMJS_BUILDER_CACHE:
+            return None
+        options = {
+            'minify': bool(self.opts.get('minify')),
+            'sfx': bool(self.opts.get('sfx')),
+            'skip_source_maps': bool(self.opts.get('skip_source_maps')),
+        }
+        key = hashlib.sha1(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+        if not os.path.exists(settings.SYSTEMJS_CACHE_DIR):
+            os.makedirs(settings.SYSTEMJS_CACHE_DIR)
+        return os.path.join(settings.SYSTEMJS_CACHE_DIR, 'builder-{}.json'.format(key[:12]))
+
+    def start_daemon(self, node_path=None):
+        """
+        Send all bundle requests to a single, long-lived node process.
+
+        The compile cache of its Builder is persisted in SYSTEMJS_CACHE_DIR, so
+        the modules that did not change aren't transpiled again by the next run.
+        """
+        self.daemon = BundleDaemon(
+            cwd=os.path.dirname(locate_package_json()),
+            env=get_node_env(node_path),
+            cache_file=self.get_builder_cache_path(),
+        )
+        self.daemon.start()
+
+    def stop_daemon(self):
+        if self.daemon is not None:
+            self.daemon.stop()
+            self.daemon = None
+
+    def bundle(self, app, cache_key=None, exclude=None):
+        bundle = SystemBundle(self, app, exclude=exclude, **self.opts)
+        return bundle.bundle(cache_key=cache_key)
+
+    def bundle_common(self, modules):
+        """
+        Bundle the modules shared by the apps into the common bundle.
+        """
+        bundle = CommonBundle(self, modules, **self.opts)
+        return bundle.bundle()
+
+    def bundle_vendor(self, app, modules):
+        """
+        Bundle the modules of `app` installed by jspm into its vendor bundle.
+        """
+        bundle = VendorBundle(self, app, modules, **self.opts)
         return bundle.bundle()
 
     @staticmethod
@@ -70,7 +410,22 @@ class System(object):
         """
         Returns the path relative to STATIC_URL for the bundle for app.
         """
-        bundle = SystemBundle(None, app)
+        return get_bundle_path(app)
+
+    @staticmethod
+    def get_common_bundle_path():
+        """
+        Returns the path relative to STATIC_URL for the common bundle.
+        """
+        bundle = CommonBundle(None, [])
+        return bundle.get_paths()[1]
+
+    @staticmethod
+    def get_vendor_bundle_path(app):
+        """
+        Returns the path relative to STATIC_URL for the vendor bundle for app.
+        """
+        bundle = VendorBundle(None, app, [])
         return bundle.get_paths()[1]
 
 
@@ -79,7 +434,7 @@ class SystemBundle(object):
     Represents a single app to be bundled.
     """
 
-    def __init__(self, system, app, **options):
+    def __init__(self, system, app, exclude=None, **options):
         """
         Initialize a SystemBundle object.
 
@@ -89,6 +444,9 @@ class SystemBundle(object):
         :param app: string, the name of the JS package to bundle. This may be
         missing the '.js' extension.
 
+        :param exclude: names of the modules to leave out of the bundle,
+        because they're in the common bundle.
+
         :param options: dict containing the bundle-specific options. Possible
         options:
             `jspm`: `jspm` executable (if it's not on $PATH, for example)
@@ -100,6 +458,7 @@ class SystemBundle(object):
         """
         self.system = system
         self.app = app
+        self.exclude = exclude or []
 
         # set the bundle options
         options.setdefault('jspm', settings.SYSTEMJS_JSPM_EXECUTABLE)
@@ -107,17 +466,36 @@ class SystemBundle(object):
 
         bundle_cmd = self.get_bundle_sfx_cmd() if self.opts.get('sfx') else 'bundle'
         self.command = '{jspm} ' + bundle_cmd + ' {app} {outfile}'
+        # the command line that created the bundle, None for the bundle daemon
+        self.command_line = None
 
         self.stdout = self.stdin = self.stderr = subprocess.PIPE
 
+    def get_expression(self):
+        """
+        Return the jspm bundle arithmetic expression to build.
+        """
+        return self.app + ''.join(' - [{}]'.format(module) for module in self.exclude)
+
+    def get_expression_arg(self):
+        expression = self.get_expression()
+        return expression if expression == self.app else shlex_quote(expression)
+
+    def record_trace(self, trace):
+        """
+        Keep the dependency tree used to create the bundle, if the system
+        collects them.
+        """
+        # the trees of bundles with excluded modules are incomplete
+        if self.system.traces is not None and trace is not None and not self.exclude:
+            self.system.traces[self.app] = trace
+
     def get_bundle_sfx_cmd(self):
         spec = semantic_version.Spec('>=0.17.0')
         return 'build' if self.system.jspm_version in spec else 'bundle-sfx'
 
     def get_outfile(self):
-        js_file = '{app}{ext}'.format(app=self.app, ext='.js' if self.needs_ext() else '')
-        outfile = os.path.join(settings.STATIC_ROOT, settings.SYSTEMJS_OUTPUT_DIR, js_file)
-        return outfile
+        return get_bundle_outfile(self.app)
 
     def get_paths(self):
         """
@@ -131,17 +509,117 @@ class SystemBundle(object):
         """
         Check whether `self.app` is missing the '.js' extension and if it needs it.
         """
-        if settings.SYSTEMJS_DEFAULT_JS_EXTENSIONS:
-            name, ext = posixpath.splitext(self.app)
-            if not ext:
-                return True
-        return False
+        return needs_ext(self.app)
 
-    def bundle(self):
+    def bundle_with_daemon(self, outfile):
+        """
+        Let the long-lived bundle daemon of the system create the bundle.
+        """
+        try:
+            response = self.system.daemon.request(
+                app=self.app, expression=self.get_expression(), outfile=outfile, options={
+                    'minify': bool(self.opts.get('minify')),
+                    'sfx': bool(self.opts.get('sfx')),
+                    'sourceMaps': not self.opts.get('skip_source_maps'),
+                })
+        except BundleError as e:
+            fmt = 'Could not bundle \'%s\': \n%s'
+            logger.warn(fmt, self.app, e)
+            raise BundleError(fmt % (self.app, e))
+        self.record_trace(response.get('trace'))
+
+    def bundle_and_trace(self, outfile):
+        """
+        Create the bundle with `bundle-trace.js`, and record the dependency
+        tree that was used.
+        """
+        cmd = 'bundle-trace.js'
+        for option, flag in (('minify', '--minify'), ('sfx', '--sfx'),
+                             ('skip_source_maps', '--skip-source-maps')):
+            if self.opts.get(option):
+                cmd += ' ' + flag
+        cmd += ' {app} {outfile}'.format(app=shlex_quote(self.get_expression()), outfile=shlex_quote(outfile))
+        self.command_line = cmd
+
+        governor = get_governor()
+        try:
+            with governor.process():
+                proc = subprocess.Popen(
+                    governor.wrap_command(cmd), shell=True, cwd=os.path.dirname(locate_package_json()),
+                    env=governor.get_env(self.system.node_env), stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE, universal_newlines=True)
+                result, err = proc.communicate()  # block until it's done
+        except (IOError, OSError) as e:
+            raise BundleError('Unable to apply %s (%r): %s' % (
+                              self.__class__.__name__, cmd, e))
+        if proc.returncode:
+            fmt = 'Could not bundle \'%s\': \n%s'
+            logger.warn(fmt, self.app, err)
+            raise BundleError(fmt % (self.app, err))
+
+        try:
+            self.record_trace(json.loads(result))
+        except ValueError:
+            logger.warning("Could not read the dependency tree of '%s' from bundle-trace.js", self.app)
+
+    def bundle(self, cache_key=None):
         """
         Bundle the app and return the static url to the bundle.
+
+        :param cache_key: key of the bundle in the artifact cache of the
+        system, if any. On a hit, the cached bundle is restored instead of
+        built.
         """
         outfile, rel_path = self.get_paths()
+        cache = self.system.artifact_cache if cache_key is not None else None
+        sender = type(self)
+
+        start = time.time()
+        if cache is not None and cache.get(cache_key, outfile):
+            logger.info("Restored the bundle of '%s' from the artifact cache", self.app)
+            self.system.restored.add(self.app)
+            if signals.bundle_restored.has_listeners(sender):
+                signals.bundle_restored.send(
+                    sender=sender, app=self.app, bundle=self, outfile=outfile, key=cache_key,
+                    duration=time.time() - start, size=get_size(outfile))
+            return rel_path
+
+        if signals.pre_bundle.has_listeners(sender):
+            signals.pre_bundle.send(sender=sender, app=self.app, bundle=self, outfile=outfile)
+        remove_artifacts(outfile)
+        try:
+            self.build(outfile)
+        except BundleError as e:
+            self.send_post_bundle(outfile, start, error=e)
+            raise
+        self.send_post_bundle(outfile, start)
+
+        if cache is not None:
+            cache.set(cache_key, outfile)
+        return rel_path
+
+    def send_post_bundle(self, outfile, start, error=None):
+        sender = type(self)
+        if not signals.post_bundle.has_listeners(sender):
+            return
+        signals.post_bundle.send(
+            sender=sender, app=self.app, bundle=self, outfile=outfile, command=self.command_line,
+            duration=time.time() - start, size=get_size(outfile) if error is None else None,
+            error=error)
+
+    def build(self, outfile):
+        """
+        Let jspm create the bundle at `outfile`.
+        """
+        if self.system.daemon is not None:
+            self.bundle_with_daemon(outfile)
+            self.add_import_statement(outfile)
+            return
+
+        if self.system.traces is not None:
+            self.bundle_and_trace(outfile)
+            self.add_import_statement(outfile)
+            return
 
         options = self.opts
         if self.system._has_jspm_log():
@@ -155,12 +633,18 @@ class SystemBundle(object):
             self.command += ' --skip-source-maps'
 
         try:
-            cmd = self.command.format(app=self.app, outfile=outfile, **options)
-            proc = subprocess.Popen(
-                cmd, shell=True, cwd=self.system.cwd, stdout=self.stdout,
-                stdin=self.stdin, stderr=self.stderr)
-
-            result, err = proc.communicate()  # block until it's done
+            cmd = self.command.format(app=self.get_expression_arg(), outfile=outfile, **options)
+            self.command_line = cmd
+            governor = get_governor()
+            env = governor.get_env()
+            # the jspm CLI inherits the environment, unless the heap is limited
+            kwargs = {'env': env} if env is not None else {}
+            with governor.process():
+                proc = subprocess.Popen(
+                    governor.wrap_command(cmd), shell=True, cwd=self.system.cwd, stdout=self.stdout,
+                    stdin=self.stdin, stderr=self.stderr, **kwargs)
+
+                result, err = proc.communicate()  # block until it's done
             if err and self.system._has_jspm_log():
                 fmt = 'Could not bundle \'%s\': \n%s'
                 logger.warn(fmt, self.app, err)
@@ -173,16 +657,96 @@ class SystemBundle(object):
             raise BundleError('Unable to apply %s (%r): %s' % (
                               self.__class__.__name__, cmd, e))
         else:
-            if not options.get('sfx'):
-                # add the import statement, which is missing for non-sfx bundles
-                sourcemap = find_sourcemap_comment(outfile)
-                with open(outfile, 'a') as of:
-                    of.write("\nSystem.import('{app}{ext}');\n{sourcemap}".format(
-                        app=self.app,
-                        ext='.js' if self.needs_ext() else '',
-                        sourcemap=sourcemap if sourcemap else '',
-                    ))
-        return rel_path
+            self.add_import_statement(outfile)
+
+    def add_import_statement(self, outfile):
+        """
+        Add the import statement, which is missing for non-sfx bundles.
+        """
+        if self.opts.get('sfx'):
+            return
+        sourcemap = find_sourcemap_comment(outfile)
+        with open(outfile, 'a') as of:
+            of.write("\nSystem.import('{app}{ext}');\n{sourcemap}".format(
+                app=self.app,
+                ext='.js' if self.needs_ext() else '',
+                sourcemap=sourcemap if sourcemap else '',
+            ))
+
+
+class ModulesBundle(SystemBundle):
+    """
+    A bundle of a set of modules (without their dependencies), loaded before
+    the bundles of the apps using them.
+    """
+
+    def __init__(self, system, name, modules, **options):
+        super(ModulesBundle, self).__init__(system, name, **options)
+        self.modules = modules
+
+    def get_expression(self):
+        return ' + '.join('[{}]'.format(module) for module in self.modules)
+
+    def get_expression_arg(self):
+        return shlex_quote(self.get_expression())
+
+    def get_outfile(self):
+        return os.path.join(settings.STATIC_ROOT, settings.SYSTEMJS_OUTPUT_DIR, '{}.js'.format(self.app))
+
+    def record_trace(self, trace):
+        pass
+
+    def add_import_statement(self, outfile):
+        pass
+
+
+class CommonBundle(ModulesBundle):
+    """
+    The modules shared by multiple apps.
+    """
+
+    name = 'systemjs-common'
+
+    def __init__(self, system, modules, **options):
+        super(CommonBundle, self).__init__(system, self.name, modules, **options)
+
+
+class VendorBundle(ModulesBundle):
+    """
+    The modules of an app installed by jspm, which change a lot less often than
+    the app itself.
+    """
+
+    def __init__(self, system, app, modules, **options):
+        name, ext = posixpath.splitext(app)
+        super(VendorBundle, self).__init__(
+            system, '{}.vendor'.format(name if ext == '.js' else app), modules, **options)
+
+
+def find_shared_modules(dep_trees, min_apps):
+    """
+    Return the names of the modules used by at least `min_apps` apps.
+
+    :param dep_trees: dict of app -> dependency tree
+    """
+    counts = Counter()
+    for dep_tree in dep_trees.values():
+        counts.update(name for name, info in dep_tree.items() if not info.get('skip', False))
+    return sorted(name for name, count in counts.items() if count >= min_apps)
+
+
+def find_vendor_modules(dep_tree, prefix):
+    """
+    Return the names of the modules in `dep_tree` installed by jspm.
+
+    :param prefix: the path of the jspm packages directory, relative to the
+    baseURL, see `jspm.find_jspm_packages_prefix`
+    """
+    prefix = prefix.rstrip('/') + '/'
+    return sorted(
+        name for name, info in dep_tree.items()
+        if not info.get('skip', False) and posixpath.normpath(info.get('path') or '').startswith(prefix)
+    )
 
 
 class TraceError(Exception):
@@ -191,15 +755,20 @@ class TraceError(Exception):
 
 class SystemTracer(object):
 
-    def __init__(self, node_path=None):
-        node_env = os.environ.copy()
-        if node_path and NODE_ENV_VAR not in node_env:
-            node_env[NODE_ENV_VAR] = node_path
-        self.env = node_env
+    # minimum number of apps to trace per node process
+    min_batch_size = 25
+
+    def __init__(self, node_path=None, jobs=1):
+        self.env = get_node_env(node_path)
+        self.jobs = jobs or 1
         self.name = 'deps.json'
         self.storage = staticfiles_storage
         self._trace_cache = {}
+        self._hashes = {}
+        self._unchanged = {}
         self._package_json_dir = os.path.dirname(locate_package_json())
+        # app -> seconds spent tracing it
+        self.trace_times = {}
 
     @property
     def cache_file_path(self):
@@ -216,44 +785,296 @@ class SystemTracer(object):
         the result on the tracer instance.
         """
         if app not in self._trace_cache:
-            process = subprocess.Popen(
-                "trace-deps.js {}".format(app), shell=True,
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                env=self.env, universal_newlines=True, cwd=self._package_json_dir
-            )
-            out, err = process.communicate()
+            cmd = "trace-deps.js {}".format(app)
+            governor = get_governor()
+            with governor.process():
+                self.send_pre_trace([app], cmd)
+                start = time.time()
+                process = subprocess.Popen(
+                    governor.wrap_command(cmd), shell=True,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    env=governor.get_env(self.env), universal_newlines=True, cwd=self._package_json_dir
+                )
+                out, err = process.communicate()
+                self.trace_times[app] = time.time() - start
+            self.send_post_trace([app], cmd, self.trace_times[app], err)
             if err:
                 raise TraceError(err)
             self._trace_cache[app] = json.loads(out)
         return self._trace_cache[app]
 
-    def get_hash(self, path):
-        md5 = hashlib.md5()
-        with self.storage.open(path) as infile:
-            for chunk in infile.chunks():
-                md5.update(chunk)
-        return md5.hexdigest()
+    def add_traces(self, traces):
+        """
+        Use dependency trees that were obtained otherwise, e.g. while bundling.
+
+        :param traces: dict of app -> dependency tree
+        """
+        self._trace_cache.update(traces)
+
+    def trace_many(self, apps, jobs=None):
+        """
+        Trace the dependencies for multiple apps.
+
+        The apps are traced in batches by a single `trace-deps.js` call, so that
+        node starts once per batch and the apps share the trace cache of one
+        Builder. For large numbers of apps, the batches are divided over at most
+        `jobs` (default: `self.jobs`) node processes, each of them tracing at
+        least `min_batch_size` apps.
+
+        :return: dict of app -> dependency tree
+        """
+        todo = []
+        for app in apps:
+            if app not in self._trace_cache and app not in todo:
+                todo.append(app)
+
+        # a single app is traced by `self.trace` below
+        if len(todo) > 1:
+            processes = int(math.ceil(len(todo) / float(self.min_batch_size)))
+            processes = max(1, min(jobs or self.jobs, processes))
+            size = int(math.ceil(len(todo) / float(processes)))
+            batches = [todo[i:i + size] for i in range(0, len(todo), size)]
+
+            if len(batches) == 1:
+                results = [self._trace_batch(batches[0])]
+            else:
+                pool = ThreadPool(len(batches))
+                try:
+                    results = pool.map(self._trace_batch, batches)
+                finally:
+                    pool.close()
+                    pool.join()
+
+            for result in results:
+                self._trace_cache.update(result)
+        return {app: self.trace(app) for app in apps}
+
+    def _trace_batch(self, apps):
+        cmd = "trace-deps.js --many {}".format(' '.join(apps))
+        governor = get_governor()
+        with governor.process():
+            self.send_pre_trace(apps, cmd)
+            start = time.time()
+            process = subprocess.Popen(
+                governor.wrap_command(cmd), shell=True,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                env=governor.get_env(self.env), universal_newlines=True, cwd=self._package_json_dir
+            )
+            out, err = process.communicate()
+            duration = time.time() - start
+            # the apps of a batch share one node process
+            self.trace_times.update((app, duration / len(apps)) for app in apps)
+        self.send_post_trace(apps, cmd, duration, err)
+        if err:
+            raise TraceError(err)
+        return json.loads(out)
+
+    def send_pre_trace(self, apps, cmd):
+        if signals.pre_trace.has_listeners(SystemTracer):
+            signals.pre_trace.send(sender=SystemTracer, apps=apps, command=cmd)
+
+    def send_post_trace(self, apps, cmd, duration, err):
+        if signals.post_trace.has_listeners(SystemTracer):
+            signals.post_trace.send(
+                sender=SystemTracer, apps=apps, command=cmd, duration=duration, error=err or None)
+
+    def get_hash(self, path, algorithm=None):
+        """
+        Return the hex digest of the file at `path`.
+
+        Files shared by multiple apps are hashed only once per tracer.
+        """
+        algorithm = algorithm or settings.SYSTEMJS_HASH_ALGORITHM
+        key = (algorithm, path)
+        if key not in self._hashes:
+            digest = hashlib.new(algorithm)
+            with self.storage.open(path) as infile:
+                for chunk in infile.chunks():
+                    digest.update(chunk)
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def hash_files(self, paths, algorithm=None):
+        """
+        Hash the files with a pool of `self.jobs` threads.
+
+        :return: dict of path -> hex digest
+        """
+        algorithm = algorithm or settings.SYSTEMJS_HASH_ALGORITHM
+        todo = sorted(set(path for path in paths if (algorithm, path) not in self._hashes))
+        if self.jobs > 1 and len(todo) > 1:
+            pool = ThreadPool(min(self.jobs, len(todo)))
+            try:
+                pool.map(lambda path: self.get_hash(path, algorithm), todo)
+            finally:
+                pool.close()
+                pool.join()
+        return {path: self.get_hash(path, algorithm) for path in paths}
+
+    def get_tree_digest(self, dep_tree):
+        """
+        Return a digest of the contents of the modules in `dep_tree` and of the
+        jspm configuration files, or None if a module can't be read.
+        """
+        paths = sorted(info['path'] for info in dep_tree.values()
+                       if not info.get('skip', False) and info.get('path'))
+        try:
+            hashes = self.hash_files(paths)
+        except (IOError, OSError):
+            return None
+
+        digest = hashlib.sha1()
+        for path in paths:
+            digest.update('{}:{}\n'.format(path, hashes[path]).encode('utf-8'))
+        for path in sorted(find_config_files()):
+            with io.open(path, 'rb') as infile:
+                config_hash = hashlib.sha1(infile.read()).hexdigest()
+            # relative, the digest must not depend on the checkout location
+            name = os.path.relpath(path, self._package_json_dir).replace(os.sep, '/')
+            digest.update('{}:{}\n'.format(name, config_hash).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_tree_size(self, dep_tree):
+        """
+        Return the total size in bytes of the modules in `dep_tree`, or None if
+        the storage doesn't give access to the file system.
+        """
+        total = 0
+        for info in dep_tree.values():
+            if info.get('skip', False) or not info.get('path'):
+                continue
+            stat = self.get_stat(info['path'])
+            if stat is None:
+                return None
+            total += stat[0]
+        return total
+
+    def get_known_trees(self, apps):
+        """
+        Return the dependency trees of the apps that are known without tracing:
+        traced during this run, or unchanged since the depcache was written.
+        """
+        trees = {app: self._trace_cache[app] for app in apps if app in self._trace_cache}
+        try:
+            for app in apps:
+                if app not in trees and self.stats_unchanged(app):
+                    trees[app] = self.get_depcache(app)
+        except (IOError, OSError, ValueError, NotImplementedError):  # no (usable) depcache
+            pass
+        return trees
+
+    def get_stat(self, path):
+        """
+        Return [size, mtime in nanoseconds] of the file at `path`, or None if
+        the storage doesn't give access to the file system.
+        """
+        try:
+            stat = os.stat(self.storage.path(path))
+        except (NotImplementedError, OSError):
+            return None
+        return [stat.st_size, get_mtime_ns(stat)]
+
+    def get_timestamp(self, path):
+        """
+        Return the modification time of `path` in milliseconds, like jspm
+        reports it, or None if it can't be determined.
+        """
+        stat = self.get_stat(path)
+        return stat[1] // 1000000 if stat is not None else None
+
+    def get_modified_files(self, paths, hashes, stats):
+        """
+        Return the paths that need to be hashed.
+
+        If the size and mtime of a file match the stats recorded in the
+        depcache, the recorded hash is trusted and the file is not read.
+        """
+        modified = []
+        for path in paths:
+            stat = self.get_stat(path)
+            if path not in hashes or stat is None or stat != stats.get(path):
+                modified.append(path)
+        return modified
+
+    def get_config_stats(self):
+        """
+        Return the (size, mtime) for every jspm configuration file.
+        """
+        if not hasattr(self, '_config_stats'):
+            self._config_stats = {}
+            for path in find_config_files():
+                stat = os.stat(path)
+                self._config_stats[path] = [stat.st_size, stat.st_mtime]
+        return self._config_stats
 
     def write_depcache(self, app_deps, bundle_options):  # TODO: use storage
+        algorithm = settings.SYSTEMJS_HASH_ALGORITHM
         all_deps = {
-            'version': 1,
+            'version': DEPCACHE_VERSION,
             'packages': app_deps,
+            'index': self.build_index(app_deps),
             'hashes': {},
+            'hash_algorithm': algorithm,
+            'stats': {},
             'options': bundle_options,
+            'config': self.get_config_stats(),
         }
 
+        # re-use the hashes of the existing depcache for unmodified files
+        hashes, stats = {}, {}
+        if os.path.exists(self.cache_file_path) and self.get_hash_algorithm() == algorithm:
+            hashes, stats = self.get_hashes(), self.get_stats()
+
+        paths = set()
         for pkg_deptree in app_deps.values():
             for module, info in pkg_deptree.items():
                 # issue #13 - external resources are not included in the bundle,
                 # so don't include them in the depcache either
                 if info.get('skip', False):
                     continue
-                path = info['path']
-                if path not in all_deps['hashes']:
-                    all_deps['hashes'][path] = self.get_hash(path)
+                paths.add(info['path'])
+
+        modified = self.get_modified_files(paths, hashes, stats)
+        hashes.update(self.hash_files(modified, algorithm))
+        for path in paths:
+            all_deps['hashes'][path] = hashes[path]
+            all_deps['stats'][path] = self.get_stat(path)
 
         with open(self.cache_file_path, 'w') as outfile:
             json.dump(all_deps, outfile)
+        # read the new depcache on the next access
+        if hasattr(self, '_depcache'):
+            del self._depcache
+
+    def invalidate(self, apps=(), paths=()):
+        """
+        Forget the in-memory results for changed apps and files.
+
+        Used by long running processes that keep using the same tracer.
+
+        :param apps: the apps that need to be traced again
+        :param paths: the (depcache) paths of the files that changed
+        """
+        paths = set(paths)
+        for app in apps:
+            self._trace_cache.pop(app, None)
+        self._hashes = {key: value for key, value in self._hashes.items() if key[1] not in paths}
+        self._unchanged = {}
+        if hasattr(self, '_config_stats'):
+            del self._config_stats
+
+    def get_files(self):
+        """
+        Return the absolute paths of the files in the depcache and the jspm
+        config files.
+        """
+        paths = set(find_config_files())
+        for path in self.get_index():
+            try:
+                paths.add(self.storage.path(path))
+            except NotImplementedError:
+                pass
+        return sorted(paths)
 
     @property
     def cached_deps(self):
@@ -264,19 +1085,117 @@ class SystemTracer(object):
 
     def get_depcache(self, app):
         # cache in memory for faster lookup
-        if self.cached_deps.get('version') == 1:
+        if self.cached_deps.get('version') in DEPCACHE_VERSIONS:
             return self.cached_deps['packages'].get(app)
         else:
             raise NotImplementedError  # noqa
 
     def get_hashes(self):
-        if self.cached_deps.get('version') == 1:
+        if self.cached_deps.get('version') in DEPCACHE_VERSIONS:
             return self.cached_deps['hashes']
         else:
             raise NotImplementedError  # noqa
 
+    def get_stats(self):
+        if self.cached_deps.get('version') in DEPCACHE_VERSIONS:
+            # depcaches written by older versions don't have the stats
+            return self.cached_deps.get('stats', {})
+        else:
+            raise NotImplementedError  # noqa
+
+    def get_hash_algorithm(self):
+        if self.cached_deps.get('version') in DEPCACHE_VERSIONS:
+            return self.cached_deps.get('hash_algorithm', 'md5')
+        else:
+            raise NotImplementedError  # noqa
+
+    def get_apps(self):
+        """
+        Return the apps known in the depcache.
+        """
+        if self.cached_deps.get('version') in DEPCACHE_VERSIONS:
+            return sorted(self.cached_deps['packages'].keys())
+        else:
+            raise NotImplementedError  # noqa
+
+    def get_index(self):
+        """
+        Return the mapping of file path -> apps using the file.
+        """
+        version = self.cached_deps.get('version')
+        if version == DEPCACHE_VERSION:
+            return self.cached_deps['index']
+        elif version == 1:
+            return self.build_index(self.cached_deps['packages'])
+        else:
+            raise NotImplementedError  # noqa
+
+    @staticmethod
+    def build_index(app_deps):
+        index = {}
+        for app, dep_tree in app_deps.items():
+            for module, info in dep_tree.items():
+                if info.get('skip', False):
+                    continue
+                index.setdefault(info['path'], set()).add(app)
+        return {path: sorted(apps) for path, apps in index.items()}
+
+    def normalize_path(self, path):
+        """
+        Turn the path of a changed file into the path known in the depcache.
+
+        Paths within the storage or within the locations of the static files
+        finders are made relative to those locations. Relative paths are
+        resolved against the current directory first, e.g. the paths of
+        `git diff` run from the root of the repository, and otherwise
+        considered to be relative to the static files storage.
+        """
+        if not os.path.isabs(path):
+            resolved = self.get_location_path(os.path.abspath(path))
+            return resolved if resolved is not None else path.replace(os.sep, '/')
+        resolved = self.get_location_path(path)
+        return resolved if resolved is not None else path
+
+    def get_location_path(self, path):
+        """
+        Return the absolute `path` relative to the static files location it is
+        in, or None if it's in none of them.
+        """
+        locations = []
+        try:
+            locations.append(('', self.storage.path('')))
+        except NotImplementedError:
+            pass
+        for finder in finders.get_finders():
+            for storage in getattr(finder, 'storages', {}).values():
+                locations.append((getattr(storage, 'prefix', None) or '', storage.location))
+
+        for prefix, location in locations:
+            location = os.path.abspath(location)
+            if path.startswith(location + os.sep):
+                relative = os.path.relpath(path, location).replace(os.sep, '/')
+                return posixpath.join(prefix, relative) if prefix else relative
+        return None
+
+    def find_affected_apps(self, paths):
+        """
+        Find the apps that use any of the (changed) files, without tracing.
+
+        A change to one of the jspm config files affects all apps. Like the
+        other files, relative paths are resolved against the current directory.
+        """
+        config_files = set(find_config_files())
+        if any(os.path.abspath(path) in config_files for path in paths):
+            return self.get_apps()
+
+        index = self.get_index()
+        apps = set()
+        for path in paths:
+            apps.update(index.get(self.normalize_path(path), []))
+        return sorted(apps)
+
     def get_bundle_options(self):
-        if self.cached_deps.get('version') == 1:
+        if self.cached_deps.get('version') in DEPCACHE_VERSIONS:
             return self.cached_deps.get('options')
         else:
             raise NotImplementedError  # noqa
@@ -287,13 +1206,87 @@ class SystemTracer(object):
         cache.
         """
         hashes = self.get_hashes()
+        paths = [info['path'] for info in dep_tree.values() if not info.get('skip', False)]
+        if any(path not in hashes for path in paths):
+            return False
+
+        modified = self.get_modified_files(paths, hashes, self.get_stats())
+        # the depcache may have been written with a different algorithm
+        current = self.hash_files(modified, self.get_hash_algorithm())
+        return all(current[path] == hashes[path] for path in modified)
+
+    def config_unchanged(self):
+        """
+        Check that the jspm configuration files did not change since the
+        depcache was written.
+        """
+        cached = self.cached_deps.get('config')
+        # json turned the stat tuples into lists
+        return cached is not None and cached == self.get_config_stats()
+
+    def timestamps_match(self, dep_tree):
+        """
+        Compares the modification times of the modules in the dep tree with the
+        modification times on disk.
+        """
         for module, info in dep_tree.items():
-            md5 = self.get_hash(info['path'])
-            if md5 != hashes[info['path']]:
+            if info.get('skip', False):
+                continue
+            timestamp = self.get_timestamp(info['path'])
+            if timestamp is None or timestamp != info['timestamp']:
                 return False
         return True
 
+    def stats_unchanged(self, app):
+        """
+        Check, without tracing, whether the app is unchanged since the depcache
+        was written.
+
+        This is the case if the jspm configuration files and the files of all
+        the modules in the cached dep tree were not modified. If this returns
+        False, something may have changed and the app needs to be traced to find
+        out.
+        """
+        if app not in self._unchanged:
+            cached_deps = self.get_depcache(app)
+            self._unchanged[app] = bool(cached_deps) and self.config_unchanged() \
+                and self.timestamps_match(cached_deps)
+        return self._unchanged[app]
+
+    def get_changed_files(self, app):
+        """
+        Return the files that changed since the depcache was written, without
+        tracing: the modules in the cached dep tree of the app of which the
+        modification time changed, and the (absolute paths of the) changed jspm
+        configuration files.
+        """
+        modules = sorted(
+            info['path'] for info in self.get_depcache(app).values()
+            if not info.get('skip', False) and self.get_timestamp(info['path']) != info['timestamp']
+        )
+        cached_config = self.cached_deps.get('config') or {}
+        config = sorted(
+            path for path, stat in self.get_config_stats().items()
+            if cached_config.get(path) != stat
+        )
+        return modules + config
+
+    def get_dep_trees(self, apps):
+        """
+        Return the dependency trees for the apps.
+
+        The trees from the depcache are re-used for the apps that did not
+        change on disk, the other apps are traced.
+        """
+        deps = {app: self.get_depcache(app) for app in apps if self.stats_unchanged(app)}
+        deps.update(self.trace_many([app for app in apps if app not in deps]))
+        return deps
+
     def check_needs_update(self, app):
+        # fast path - nothing changed on disk, so no need to call out to node
+        if self.stats_unchanged(app):
+            return False
+
         cached_deps = self.get_depcache(app)
         deps = self.trace(app)
         # no re-bundle needed if the trees, mtimes and file hashes match
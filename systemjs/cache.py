@@ -0,0 +1,222 @@
+"""
+Cache of bundle artifacts, so that bundles built before (on another branch, by
+a previous deploy...) are restored instead of built again.
+
+Artifacts are addressed by the contents of the modules in the dependency tree
+of the app and by the bundle options, see :func:`get_cache_key`.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def get_artifacts(outfile):
+    """
+    Return the (name, path) of the files jspm produces for a bundle.
+    """
+    return [
+        ('bundle.js', outfile),
+        ('bundle.js.map', '{}.map'.format(outfile)),
+    ]
+
+
+def remove_artifacts(outfile):
+    """
+    Remove the files of a previous bundle.
+
+    They may be hardlinks into the artifact cache, so they must never be
+    overwritten in place.
+    """
+    for name, path in get_artifacts(outfile):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_cache_key(app, tree_digest, options, jspm_version):
+    """
+    Build the key of the bundle for `app`.
+
+    :param tree_digest: digest of the contents of the modules and config
+    files, see `SystemTracer.get_tree_digest`
+    :param options: the bundle options, and optionally the modules excluded
+    from the bundle
+    """
+    payload = {
+        'app': app,
+        'tree': tree_digest,
+        'minify': bool(options.get('minify')),
+        'sfx': bool(options.get('sfx')),
+        'skip_source_maps': bool(options.get('skip_source_maps')),
+        'jspm': str(jspm_version),
+        'output_dir': settings.SYSTEMJS_OUTPUT_DIR,
+        'default_js_extensions': bool(settings.SYSTEMJS_DEFAULT_JS_EXTENSIONS),
+    }
+    if options.get('exclude'):  # modules in the common bundle
+        payload['exclude'] = sorted(options['exclude'])
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class BaseArtifactCache(object):
+    """
+    Interface of the artifact cache backends.
+    """
+
+    def get(self, key, outfile):
+        """
+        Restore the artifacts stored under `key` to `outfile`.
+
+        :return: True if the artifacts were restored, False on a miss
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def set(self, key, outfile):
+        """
+        Store the artifacts of the bundle at `outfile` under `key`.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+
+class FileSystemArtifactCache(BaseArtifactCache):
+    """
+    Stores the artifacts in a directory, which may be shared by multiple
+    projects or CI runners.
+
+    The least recently used entries are evicted once the total size exceeds
+    `max_size` bytes. The total is kept up to date as entries are stored, so
+    the directory is only scanned once, and again when evicting.
+    """
+
+    def __init__(self, location=None, max_size=512 * 1024 * 1024):
+        self.location = location or os.path.join(settings.SYSTEMJS_CACHE_DIR, 'artifacts')
+        self.max_size = max_size
+        self._size = None  # see `get_size`
+        self._size_lock = threading.Lock()
+
+    def get_entry_path(self, key):
+        return os.path.join(self.location, key[:2], key)
+
+    @staticmethod
+    def link_or_copy(source, target):
+        try:
+            os.link(source, target)
+        except (AttributeError, OSError):  # no hardlinks on this platform or file system
+            shutil.copyfile(source, target)
+
+    def get(self, key, outfile):
+        entry = self.get_entry_path(key)
+        if not os.path.isfile(os.path.join(entry, 'bundle.js')):
+            return False
+
+        remove_artifacts(outfile)
+        try:
+            if not os.path.isdir(os.path.dirname(outfile)):
+                os.makedirs(os.path.dirname(outfile))
+            for name, path in get_artifacts(outfile):
+                source = os.path.join(entry, name)
+                if os.path.exists(source):
+                    self.link_or_copy(source, path)
+            os.utime(entry, None)  # mark as recently used
+        except (IOError, OSError) as e:  # e.g. evicted by a concurrent run
+            logger.warning("Could not restore '%s' from the artifact cache: %s", outfile, e)
+            remove_artifacts(outfile)
+            return False
+        return True
+
+    def set(self, key, outfile):
+        entry = self.get_entry_path(key)
+        if os.path.isdir(entry):
+            return
+
+        try:
+            if not os.path.isdir(os.path.dirname(entry)):
+                os.makedirs(os.path.dirname(entry))
+            # copy into a temporary directory and rename, so that readers
+            # never see an incomplete entry
+            tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(entry))
+            try:
+                size = 0
+                for name, path in get_artifacts(outfile):
+                    if os.path.exists(path):
+                        shutil.copyfile(path, os.path.join(tmp_dir, name))
+                        size += os.path.getsize(path)
+                os.rename(tmp_dir, entry)
+            except (IOError, OSError):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                if not os.path.isdir(entry):  # not stored by a concurrent run
+                    raise
+        except (IOError, OSError) as e:
+            logger.warning("Could not store '%s' in the artifact cache: %s", outfile, e)
+            return
+
+        if self.max_size is None:
+            return
+        with self._size_lock:
+            if self._size is not None:  # else the entry is counted by `get_size`
+                self._size += size
+        if self.get_size() > self.max_size:
+            self.evict()
+
+    def get_size(self):
+        """
+        Return the total size of the entries, scanning the directory only the
+        first time.
+
+        Entries stored by concurrent runs are only counted at the next
+        eviction, which scans the directory again.
+        """
+        with self._size_lock:
+            if self._size is None:
+                self._size = sum(size for last_used, size, path in self.get_entries())
+            return self._size
+
+    def get_entries(self):
+        """
+        Return (last used, size, path) for every entry, least recently used first.
+        """
+        entries = []
+        for root, dirs, files in os.walk(self.location):
+            if root == self.location or not files:
+                continue
+            if os.path.basename(root).startswith('.tmp-'):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(root, name)) for name in files)
+                entries.append((os.path.getmtime(root), size, root))
+            except OSError:  # evicted by a concurrent run
+                continue
+        return sorted(entries)
+
+    def evict(self):
+        with self._size_lock:
+            entries = self.get_entries()
+            total = sum(size for last_used, size, path in entries)
+            for last_used, size, path in entries:
+                if total <= self.max_size:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+            self._size = total
+
+
+def get_artifact_cache():
+    """
+    Return the configured artifact cache, or None if it's disabled.
+    """
+    config = settings.SYSTEMJS_ARTIFACT_CACHE
+    if not config:
+        return None
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 
+import hashlib
 import os
 
 from django.conf import settings
@@ -15,10 +16,41 @@ class SystemJSConf(AppConf):
     # Path to JSPM executable. Must be on the path, or a full path
     JSPM_EXECUTABLE = 'jspm'
 
+    # Version of the JSPM executable, detected (and cached) if not set
+    JSPM_VERSION = None
+
     OUTPUT_DIR = 'SYSTEMJS'
 
     CACHE_DIR = None
 
+    # hashlib algorithm used to detect changed files for the depcache
+    HASH_ALGORITHM = 'md5'
+
+    # Persist the jspm Builder cache of the bundle daemon between runs
+    BUILDER_CACHE = True
+
+    # Cache of bundle artifacts, keyed by the contents of the dependency tree
+    # and the bundle options. Disabled if None.
+    ARTIFACT_CACHE = None
+
+    # Limits for the jspm/node processes, see `systemjs.resources`: the
+    # maximum number running at the same time, the memory (MiB) a process needs
+    # to be started, the niceness increment, the ionice class ('best-effort' or
+    # 'idle') and the node heap limit (MiB)
+    MAX_PROCESSES = None
+    PROCESS_MEMORY = None
+    PROCESS_NICE = None
+    PROCESS_IONICE = None
+    NODE_MAX_OLD_SPACE_SIZE = None
+
+    # Seconds between the checks whether a deploy replaced the manifests, see
+    # `systemjs.manifest.ManifestReloader`. Never checked if None.
+    MANIFEST_CHECK_INTERVAL = 5
+
+    # Apps manifest (`systemjs_show_packages --json`) of the apps to warm the
+    # caches for when the app registry is ready, see `systemjs.warmup`.
+    WARMUP = None
+
     PACKAGE_JSON_DIR = getattr(settings, 'BASE_DIR', None)
 
     DEFAULT_JS_EXTENSIONS = True
@@ -37,12 +69,41 @@ class SystemJSConf(AppConf):
             )
         return os.path.abspath(value)
 
-    def configure_cache_dir(self, value):
-        base_dir = getattr(settings, 'BASE_DIR', None)
-        if not base_dir:
+    def configure_hash_algorithm(self, value):
+        try:
+            hashlib.new(value)
+        except ValueError:
             raise ImproperlyConfigured(
-                "Tried to set a default cache directory. Either set BASE_DIR "
-                "or SYSTEMJS_CACHE_DIR"
+                "'%s' is not a hash algorithm supported by hashlib" % value
             )
-        value = os.path.join(base_dir, '_cache', 'systemjs')
+        return value
+
+    def configure_jspm_version(self, value):
+        if value is not None:
+            # only needed when bundling, keep it out of the web workers
+            import semantic_version
+            try:
+                semantic_version.Version(value, partial=True)
+            except ValueError:
+                raise ImproperlyConfigured(
+                    "'%s' is not a valid SYSTEMJS_JSPM_VERSION" % value
+                )
+        return value
+
+    def configure_cache_dir(self, value):
+        if value is None:
+            base_dir = getattr(settings, 'BASE_DIR', None)
+            if not base_dir:
+                raise ImproperlyConfigured(
+                    "Tried to set a default cache directory. Either set BASE_DIR "
+                    "or SYSTEMJS_CACHE_DIR"
+                )
+            value = os.path.join(base_dir, '_cache', 'systemjs')
         return os.path.abspath(value)
+
+    def configure_process_ionice(self, value):
+        if value is not None and value not in ('best-effort', 'idle'):
+            raise ImproperlyConfigured(
+                "SYSTEMJS_PROCESS_IONICE must be 'best-effort' or 'idle', not '%s'" % value
+            )
+        return value
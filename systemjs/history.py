@@ -0,0 +1,141 @@
+"""
+History of the bundle runs, used to schedule the apps that take longest first.
+
+With parallel bundling, the total run time is decided by the app that finishes
+last. Starting the slowest apps first keeps one big app from running on its
+own at the end.
+"""
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+import os
+
+from django.conf import settings
+
+from .utils import write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class BundleHistory(object):
+    """
+    Remembers the wall time, module count and output size of every bundled app.
+
+    Apps without history are estimated from the number and size of the modules
+    in their dependency tree, at the rates observed for the other apps.
+    """
+
+    name = 'bundle-history.json'
+
+    # used until there is history to derive the rates from
+    default_seconds_per_module = 0.02
+    default_seconds_per_byte = 0.000002
+
+    def __init__(self):
+        self.entries = self.read()
+
+    @property
+    def cache_file_path(self):
+        return os.path.join(settings.SYSTEMJS_CACHE_DIR, self.name)
+
+    def read(self):
+        try:
+            with io.open(self.cache_file_path) as infile:
+                data = json.load(infile)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self):
+        try:
+            write_atomic(self.cache_file_path, json.dumps(self.entries, sort_keys=True))
+        except (IOError, OSError) as e:
+            logger.warning("Could not save the bundle history: %s", e)
+
+    def record(self, app, duration, modules=None, size=None, input_size=None):
+        """
+        Record a bundle run of `app`.
+
+        :param modules: number of modules in the dependency tree, if known
+        :param size: size of the bundle in bytes
+        :param input_size: total size of the modules in bytes, if known
+        """
+        entry = self.entries.get(app, {})
+        entry['duration'] = round(duration, 3)
+        for key, value in (('modules', modules), ('size', size), ('input_size', input_size)):
+            if value is not None:
+                entry[key] = value
+        self.entries[app] = entry
+
+    def get_rates(self):
+        """
+        Return the seconds spent per module and per byte of input, derived from
+        the apps in the history.
+        """
+        def rate(key, default):
+            entries = [entry for entry in self.entries.values() if entry.get(key)]
+            total = sum(entry[key] for entry in entries)
+            if not total:
+                return default
+            return sum(entry['duration'] for entry in entries) / float(total)
+
+        return (
+            rate('modules', self.default_seconds_per_module),
+            rate('input_size', self.default_seconds_per_byte),
+        )
+
+    def estimate(self, app, modules=None, input_size=None):
+        """
+        Return the expected duration of bundling `app` in seconds, or None if
+        there's nothing to base an estimate on.
+        """
+        if app in self.entries:
+            return self.entries[app]['duration']
+        per_module, per_byte = self.get_rates()
+        estimates = []
+        if modules is not None:
+            estimates.append(modules * per_module)
+        if input_size is not None:
+            estimates.append(input_size * per_byte)
+        if not estimates:
+            return None
+        return sum(estimates) / len(estimates)
+
+
+def schedule(apps, estimates):
+    """
+    Order the apps longest first.
+
+    Apps without an estimate go first, they may well be the slow ones. The
+    order of `apps` is kept for ties.
+    """
+    def key(app):
+        estimate = estimates.get(app)
+        return (estimate is not None, -(estimate or 0))
+    return sorted(apps, key=key)
+
+
+def estimate_remaining(estimates, running, pending, jobs):
+    """
+    Return the expected number of seconds until all apps are bundled, or None
+    if not all apps could be estimated.
+
+    :param running: dict of app -> seconds it's been bundling
+    :param pending: the apps that did not start yet
+    """
+    work = []
+    for app, elapsed in running.items():
+        if estimates.get(app) is None:
+            return None
+        work.append(max(estimates[app] - elapsed, 0))
+    for app in pending:
+        if estimates.get(app) is None:
+            return None
+        work.append(estimates[app])
+    if not work:
+        return 0
+    # the remaining work is spread over the workers, but can't take less time
+    # than the longest app
+    return max(sum(work) / float(min(jobs, len(work))), max(work))
@@ -30,9 +30,10 @@ def parse_package_json():
     return data
 
 
-def find_systemjs_location():
+def _find_directories():
     """
-    Figure out where `jspm_packages/system.js` will be put by JSPM.
+    Return the location of package.json, the baseURL and the jspm packages
+    directory as configured in package.json.
     """
     location = os.path.abspath(os.path.dirname(locate_package_json()))
     conf = parse_package_json()
@@ -53,4 +54,55 @@ def find_systemjs_location():
     # check for explicit location, else fall back to the default as jspm does
     jspm_packages = conf['packages'] if 'packages' in conf else 'jspm_packages'
     base = conf['baseURL'] if 'baseURL' in conf else '.'
+    return location, base, jspm_packages
+
+
+def find_systemjs_location():
+    """
+    Figure out where `jspm_packages/system.js` will be put by JSPM.
+    """
+    location, base, jspm_packages = _find_directories()
     return os.path.join(location, base, jspm_packages, 'system.js')
+
+
+def find_jspm_packages_prefix():
+    """
+    Return the path of the jspm packages directory relative to the baseURL.
+
+    The traced paths of the modules installed by jspm start with this prefix.
+    """
+    location, base, jspm_packages = _find_directories()
+    packages_dir = os.path.dirname(find_systemjs_location())
+    prefix = os.path.relpath(packages_dir, os.path.join(location, base))
+    return prefix.replace(os.sep, '/')
+
+
+def find_config_files():
+    """
+    Return the absolute paths to the files holding the jspm configuration.
+
+    Changes to these files can change the dependency trees of the apps. Only the
+    files that exist are returned, `package.json` is always included.
+    """
+    package_json = locate_package_json()
+    location = os.path.abspath(os.path.dirname(package_json))
+    try:
+        conf = parse_package_json()
+    except ValueError:  # invalid json, at least package.json itself is tracked
+        conf = {}
+
+    if not isinstance(conf, dict):
+        conf = {}
+    if 'jspm' in conf:
+        conf = conf['jspm']
+
+    if 'configFiles' in conf:  # jspm 0.17
+        names = conf['configFiles'].values()
+    elif 'configFile' in conf:  # jspm 0.16
+        names = [conf['configFile']]
+    else:  # the defaults of both versions
+        base = conf.get('directories', {}).get('baseURL', '.')
+        names = [os.path.join(base, 'config.js'), 'jspm.config.js', 'jspm.browser.js']
+
+    paths = [package_json] + sorted(os.path.normpath(os.path.join(location, name)) for name in names)
+    return [path for path in paths if os.path.isfile(path)]
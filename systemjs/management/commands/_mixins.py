@@ -4,6 +4,8 @@ Mixin for various command to retreive locations of systemjs_import calls.
 from __future__ import unicode_literals
 
 import io
+import math
+import multiprocessing
 import os
 import re
 from collections import OrderedDict
@@ -24,8 +26,52 @@ SYSTEMJS_TAG_RE = re.compile(r"""systemjs_import\s+(['\"])(?P<app>.*)\1""")
 RESOLVE_CONTEXT = {}
 
 
+def default_jobs():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:  # pragma: no cover
+        return 1
+
+
+def scan_templates(files, charset):
+    """
+    Extract the apps imported by the template files.
+
+    Runs in the worker processes of the parallel scan, so it must not rely
+    on the settings.
+
+    :param files: list of (template name, path)
+    :return: list of (template name, apps) for the templates importing apps
+    """
+    found = []
+    for tpl_name, fp in files:
+        with io.open(fp, 'r', encoding=charset) as template_file:
+            src_data = template_file.read()
+
+        apps = []
+        for t in Lexer(src_data).tokenize():
+            if t.token_type == TOKEN_BLOCK:
+                imatch = SYSTEMJS_TAG_RE.match(t.contents)
+                if imatch:
+                    apps.append(imatch.group('app'))
+        if apps:
+            found.append((tpl_name, apps))
+    return found
+
+
+def _scan_templates(args):
+    return scan_templates(*args)
+
+
 class TemplateDiscoveryMixin(object):
 
+    # below this number of templates, starting the worker processes takes
+    # longer than scanning the templates
+    parallel_scan_threshold = 500
+
+    # chunks per worker process, to even out templates of different sizes
+    scan_chunks_per_job = 4
+
     def add_arguments(self, parser):
         tpl_group = parser.add_mutually_exclusive_group()
         tpl_group.add_argument(
@@ -43,11 +89,16 @@ class TemplateDiscoveryMixin(object):
             '--symlinks', '-s', action='store_true', dest='symlinks',
             default=False, help='Follows symlinks to directories when examining '
                                 'source code and templates for SystemJS imports.')
+        parser.add_argument(
+            '--jobs', '-j', type=int, default=default_jobs(),
+            help='Number of processes to scan the templates with, and of apps to process '
+                 'in parallel (default: the number of CPUs)')
 
         super(TemplateDiscoveryMixin, self).add_arguments(parser)
 
     def handle(self, **options):
         self.symlinks = options.get('symlinks')
+        self.scan_jobs = options.get('jobs') or 1
         extensions = options.get('extensions') or ['html']
         self.extensions = handle_extensions(extensions)
 
@@ -84,19 +135,11 @@ class TemplateDiscoveryMixin(object):
         all_apps = OrderedDict()
 
         if not templates:
-            all_files = self.discover_templates()
-            for tpl_name, fp in all_files:
-                # this is the most performant - a testcase that used the loader with tpl_name
-                # was about 8x slower for a project with ~5 apps in different templates :(
-                with io.open(fp, 'r', encoding=settings.FILE_CHARSET) as template_file:
-                    src_data = template_file.read()
-
-                for t in Lexer(src_data).tokenize():
-                    if t.token_type == TOKEN_BLOCK:
-                        imatch = SYSTEMJS_TAG_RE.match(t.contents)
-                        if imatch:
-                            all_apps.setdefault(tpl_name, [])
-                            all_apps[tpl_name].append(imatch.group('app'))
+            # this is the most performant - a testcase that used the loader with tpl_name
+            # was about 8x slower for a project with ~5 apps in different templates :(
+            for tpl_name, apps in self.scan_templates(self.discover_templates()):
+                all_apps.setdefault(tpl_name, [])
+                all_apps[tpl_name].extend(apps)
         else:
             for tpl_name in templates:
                 try:
@@ -117,6 +160,29 @@ class TemplateDiscoveryMixin(object):
 
         return all_apps
 
+    def scan_templates(self, all_files):
+        """
+        Scan the template files, divided over `self.scan_jobs` processes for
+        large numbers of templates.
+
+        :return: list of (template name, apps), in the order of `all_files`
+        """
+        charset = settings.FILE_CHARSET
+        jobs = min(getattr(self, 'scan_jobs', 1), len(all_files))
+        if jobs <= 1 or len(all_files) < self.parallel_scan_threshold:
+            return scan_templates(all_files, charset)
+
+        size = int(math.ceil(len(all_files) / float(jobs * self.scan_chunks_per_job)))
+        chunks = [(all_files[i:i + size], charset) for i in range(0, len(all_files), size)]
+        pool = multiprocessing.Pool(jobs)
+        try:
+            # map keeps the order of the chunks
+            results = pool.map(_scan_templates, chunks)
+        finally:
+            pool.close()
+            pool.join()
+        return [found for chunk in results for found in chunk]
+
 
 class BundleOptionsMixin(object):
 
@@ -132,7 +198,19 @@ class BundleOptionsMixin(object):
         parser.add_argument('--minify', action='store_true', help='Let jspm minify the bundle')
         parser.add_argument('--minimal', action='store_true', help='Only (re)bundle if changes detected')
         parser.add_argument('--skip-source-maps', action='store_true', help='Skip source maps generation')
+        parser.add_argument(
+            '--common', type=int, metavar='K',
+            help='Bundle the modules used by at least K apps into a common bundle, '
+                 'which is loaded before the app bundles')
+        parser.add_argument(
+            '--vendor', action='store_true',
+            help='Split the modules installed by jspm off into a vendor bundle per app')
 
     def get_system_opts(self, options):
         system_options = ['minimal', 'minify', 'sfx', 'skip_source_maps']
-        return {opt: options.get(opt) for opt in system_options}
+        system_opts = {opt: options.get(opt) for opt in system_options}
+        # only if set, so that existing depcaches keep matching
+        for opt in ('common', 'vendor'):
+            if options.get(opt):
+                system_opts[opt] = options[opt]
+        return system_opts
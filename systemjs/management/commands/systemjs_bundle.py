@@ -1,24 +1,76 @@
 from __future__ import unicode_literals
 
+import json
 import os
 import logging
+import sys
+import threading
+import time
 from collections import OrderedDict
 from copy import copy
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.core.exceptions import SuspiciousFileOperation
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core.files.storage import FileSystemStorage
 
-from systemjs.base import System, SystemTracer
-from systemjs.jspm import find_systemjs_location
+from systemjs import signals
+from systemjs.base import (
+    BundleError, System, SystemTracer, TraceError, find_shared_modules, find_vendor_modules
+)
+from systemjs.cache import get_artifact_cache, get_cache_key
+from systemjs.history import BundleHistory, estimate_remaining, schedule
+from systemjs.jspm import find_jspm_packages_prefix, find_systemjs_location
+from systemjs.manifest import BundleManifest
+from systemjs.paths import clear_url_cache
+from systemjs.report import BuildReport
+from systemjs.watch import get_watcher
 from ._mixins import BundleOptionsMixin, TemplateDiscoveryMixin
 
 
 logger = logging.getLogger(__name__)
 
 
+class Progress(object):
+    """
+    Keeps track of the bundling apps, and reports the estimated remaining time
+    whenever an app is done.
+
+    Nothing is reported if all apps run at the same time - the order then
+    doesn't matter and the output stays the same as with sequential bundling.
+    """
+
+    def __init__(self, command, estimates, total):
+        self.command = command
+        self.estimates = estimates
+        self.total = total
+        self.report = total > command.jobs
+        self.started = {}
+        self.durations = {}
+        self.lock = threading.Lock()
+
+    def start(self, app):
+        with self.lock:
+            self.started[app] = time.time()
+
+    def finish(self, app):
+        with self.lock:
+            now = time.time()
+            self.durations[app] = now - self.started.pop(app)
+            if not self.report:
+                return
+            running = {name: now - start for name, start in self.started.items()}
+            pending = [name for name in self.estimates if name not in running and name not in self.durations]
+            remaining = estimate_remaining(self.estimates, running, pending, self.command.jobs)
+            msg = '[{done}/{total}] {app} took {duration:.1f}s'.format(
+                done=len(self.durations), total=self.total, app=app, duration=self.durations[app])
+            if remaining is not None and len(self.durations) < self.total:
+                msg += ', about {remaining:.0f}s remaining'.format(remaining=remaining)
+            self.command.stdout.write(msg)
+
+
 class Command(BundleOptionsMixin, TemplateDiscoveryMixin, BaseCommand):
     help = "Find {% systemjs_import %} tags and bundle the JS apps."
     requires_system_checks = False
@@ -38,30 +90,292 @@ class Command(BundleOptionsMixin, TemplateDiscoveryMixin, BaseCommand):
             action='store_false', dest='post_process', default=True,
             help="Do NOT post process collected files.")
 
-    def handle(self, **options):
-        super(Command, self).handle(**options)
+        parser.add_argument(
+            '--daemon', action='store_true',
+            help="Bundle all apps with a single, long-lived jspm process (bundle-daemon.js).")
 
-        self.post_process = options['post_process']
-        self.minimal = options.get('minimal')
+        parser.add_argument(
+            '--changed-files', nargs='+', metavar='FILE',
+            help="Only rebundle the apps using these files, according to the depcache. "
+                 "Use '-' to read the file names from stdin, one per line.")
 
-        self.verbosity = 2
-        self.storage = copy(staticfiles_storage)
-        self.storage.systemjs_bundling = True  # set flag to check later
+        parser.add_argument(
+            '--plan', action='store_true',
+            help="Report which apps need to be bundled and why, and the estimated duration, "
+                 "without bundling anything.")
 
-        # initialize SystemJS specific objects to process the bundles
-        tracer = SystemTracer(node_path=options.get('node_path'))
-        system_opts = self.get_system_opts(options)
-        system = System(**system_opts)
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Output the --plan as JSON.")
+
+        parser.add_argument(
+            '--report', metavar='PATH',
+            help="Write a JSON report with the timings and sizes per app to PATH.")
+
+        parser.add_argument(
+            '--prometheus', metavar='PATH',
+            help="Write the metrics of the report in the Prometheus text format to PATH, "
+                 "e.g. for the textfile collector of the node exporter.")
+
+        parser.add_argument(
+            '--watch', action='store_true',
+            help="Keep running, and rebundle the apps affected by changes to the files in the depcache. "
+                 "Implies --minimal.")
+
+    def bundle_apps(self, tracer, system, apps, cache_keys=None, excludes=None):
+        """
+        Bundle the apps, running at most `self.jobs` jspm processes at the same time.
+
+        The heavy lifting happens in the jspm subprocesses, so threads are
+        sufficient. A failing app does not stop the other workers - the errors
+        are collected and returned.
+
+        The apps that took longest in previous runs (see `BundleHistory`) are
+        started first, and the duration of this run is recorded.
+
+        :param cache_keys: dict of app -> key in the artifact cache
+        :param excludes: dict of app -> modules to leave out of the bundle
+        :return: list of (app, rel_path, error) tuples, in the order of `apps`
+        """
+        cache_keys = cache_keys or {}
+        excludes = excludes or {}
+
+        history = BundleHistory()
+        sizes = self.get_tree_sizes(tracer, tracer.get_known_trees(apps))
+        estimates = {app: history.estimate(app, *sizes.get(app, (None, None))) for app in apps}
+        progress = Progress(self, estimates, len(apps))
+
+        def _bundle(app):
+            kwargs = {'cache_key': cache_keys[app]} if app in cache_keys else {}
+            if excludes.get(app):
+                kwargs['exclude'] = excludes[app]
+            progress.start(app)
+            try:
+                return app, system.bundle(app, **kwargs), None
+            except BundleError as e:
+                return app, None, e
+            finally:
+                progress.finish(app)
+
+        results = dict((result[0], result) for result in self.map(_bundle, schedule(apps, estimates)))
+
+        if system.traces is not None:  # the trees are known now
+            sizes.update(self.get_tree_sizes(tracer, {
+                app: system.traces[app] for app in apps if app in system.traces}))
+        for app, rel_path, error in results.values():
+            if error is not None:
+                self.report.add_failure(app, error, progress.durations[app])
+                continue
+            self.report.add_bundle(app, rel_path, progress.durations[app], cache_hit=app in system.restored)
+            # restored bundles say nothing about how long building takes
+            if app in system.restored:
+                continue
+            try:
+                size = self.bundle_storage.size(rel_path)
+            except OSError:
+                size = None
+            modules, input_size = sizes.get(app, (None, None))
+            history.record(app, progress.durations[app], modules=modules, size=size, input_size=input_size)
+        history.save()
+        return [results[app] for app in apps]
+
+    @staticmethod
+    def get_tree_sizes(tracer, trees):
+        """
+        :return: dict of app -> (number of modules, size of the modules in bytes)
+        """
+        return {
+            app: (len([info for info in tree.values() if not info.get('skip', False)]),
+                  tracer.get_tree_size(tree))
+            for app, tree in trees.items()
+        }
+
+    def bundle_vendor(self, system, apps):
+        """
+        Bundle the vendor modules of the apps, like `bundle_apps`.
+        """
+        def _bundle(app):
+            label = '{app} (vendor)'.format(app=app)
+            try:
+                return label, system.bundle_vendor(app, self.vendor_modules[app]), None
+            except BundleError as e:
+                return label, None, e
+
+        return self.map(_bundle, apps)
+
+    def map(self, func, items):
+        """
+        Call `func` for every item with at most `self.jobs` threads.
+        """
+        if self.jobs <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        pool = ThreadPool(min(self.jobs, len(items)))
+        try:
+            # one item per task, `pool.map` would hand out the items in chunks
+            # and break the scheduling order
+            return list(pool.imap(func, items))
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_cache_keys(self, tracer, system, apps, excludes=None):
+        """
+        Compute the artifact cache keys of the apps from their dependency trees.
+
+        The trees of apps that changed on disk are traced, the depcache may
+        miss modules they import now.
+
+        :return: dict of app -> key, without the apps that can't be traced
+        """
+        excludes = excludes or {}
+        if system.artifact_cache is None or not apps:
+            return {}
+        try:
+            trees = tracer.get_dep_trees(apps)
+        except TraceError as e:
+            logger.warning("Not using the artifact cache, tracing failed: %s", e)
+            return {}
+
+        keys = {}
+        for app in apps:
+            digest = tracer.get_tree_digest(trees[app])
+            if digest is not None:
+                options = dict(system.opts, exclude=excludes.get(app))
+                keys[app] = get_cache_key(app, digest, options, system.jspm_version)
+        return keys
+
+    def use_bundle_traces(self, tracer, system, apps):
+        """
+        Hand the dependency trees recorded while bundling the apps to the tracer.
+        """
+        if system.traces is None:
+            return
+        tracer.add_traces({app: system.traces.pop(app) for app in apps if app in system.traces})
+
+    def find_changed_apps(self, tracer, changed_files, system_opts, stdin):
+        """
+        Look up the apps affected by the changed files in the depcache.
+        """
+        if not os.path.exists(tracer.cache_file_path):
+            raise CommandError(
+                '--changed-files needs a depcache, run systemjs_write_depcaches first')
+        cached_opts = tracer.get_bundle_options() or {}
+        differences = [
+            '--{} (depcache: {}, now: {})'.format(
+                opt.replace('_', '-'), cached_opts.get(opt), system_opts.get(opt))
+            for opt in sorted(set(cached_opts) | set(system_opts))
+            if cached_opts.get(opt) != system_opts.get(opt)
+        ]
+        if differences:
+            raise CommandError(
+                '--changed-files must run with the bundle options the depcache was written '
+                'with (sfx, minify, minimal...), but these differ: {}'.format(', '.join(differences)))
+
+        if '-' in changed_files:
+            changed_files = [path for path in changed_files if path != '-']
+            changed_files += [line.strip() for line in stdin if line.strip()]
+        return tracer.find_affected_apps(changed_files)
+
+    def plan_split_bundles(self, tracer, all_apps, to_bundle):
+        """
+        Work out which modules go in the common bundle and in the vendor
+        bundles, and which modules to exclude from the app bundles.
+
+        The common bundle holds the modules used by at least `self.common`
+        apps. If those are not the modules of the current common bundle, all
+        apps need to be bundled again. A vendor bundle holds the (not shared)
+        modules of an app installed by jspm, and is only bundled again if those
+        modules changed.
+
+        :return: the apps to bundle
+        """
+        trees = tracer.get_dep_trees(all_apps) if self.minimal else tracer.trace_many(all_apps)
+        manifest = BundleManifest.load()
+
+        self.shared = []
+        if self.common:
+            self.shared = find_shared_modules(trees, self.common)
+            common_exists = self.storage.exists(System.get_common_bundle_path())
+            if self.shared != manifest.common.get('modules', []) or (self.shared and not common_exists):
+                to_bundle = list(all_apps)
+
+        self.vendor_modules, self.vendor_digests, self.vendor_to_bundle = {}, {}, []
+        if self.vendor:
+            prefix = find_jspm_packages_prefix()
+            for app in all_apps:
+                modules = sorted(set(find_vendor_modules(trees[app], prefix)).difference(self.shared))
+                if not modules:
+                    continue
+                self.vendor_modules[app] = modules
+                self.vendor_digests[app] = tracer.get_tree_digest({name: trees[app][name] for name in modules})
+                vendor_exists = self.storage.exists(System.get_vendor_bundle_path(app))
+                digest = self.vendor_digests[app]
+                if digest is None or digest != manifest.vendor.get(app) or not vendor_exists:
+                    self.vendor_to_bundle.append(app)
+
+        self.excludes = {
+            app: sorted(set(self.shared).intersection(trees[app]).union(self.vendor_modules.get(app, [])))
+            for app in all_apps
+        }
+        return to_bundle
+
+    def bundle_common(self, system, shared):
+        """
+        Bundle the shared modules.
 
+        :return: the path of the common bundle, or None if it failed
+        """
+        try:
+            rel_path = system.bundle_common(shared)
+        except BundleError as e:
+            self.stderr.write('Could not bundle the common modules: {error}'.format(error=e))
+            return None
+        self.stdout.write('Bundled {count} modules shared by at least {min_apps} apps into {out}'.format(
+            count=len(shared), min_apps=self.common, out=rel_path))
+        return rel_path
+
+    def write_manifest(self, all_apps, failed):
+        """
+        Record which bundles the apps need to load first, for the template tag.
+        """
+        if not (self.shared or self.vendor_modules):
+            BundleManifest.delete()
+            return
+
+        common_path = System.get_common_bundle_path()
+        preloads = {}
+        for app in all_apps:
+            if set(self.shared).intersection(self.excludes[app]):
+                preloads.setdefault(app, []).append(common_path)
+            if app in self.vendor_modules:
+                preloads.setdefault(app, []).append(System.get_vendor_bundle_path(app))
+
+        # failed vendor bundles are bundled again by the next run
+        vendor = {app: digest for app, digest in self.vendor_digests.items()
+                  if digest is not None and '{app} (vendor)'.format(app=app) not in failed}
+        common = {'min_apps': self.common, 'modules': self.shared} if self.shared else {}
+        BundleManifest(preloads=preloads, common=common, vendor=vendor).save()
+
+    def find_apps_to_bundle(self, tracer, system_opts, options):
+        """
+        Discover the apps in the templates, and check which ones need bundling.
+
+        :return: tuple of all the apps and the apps to bundle
+        """
         has_different_options = self.minimal and tracer.get_bundle_options() != system_opts
 
         # discover the apps being imported in the templates
         all_apps = self.find_apps(templates=options.get('templates'))
-        all_apps = set(sum(all_apps.values(), []))
+        # sorted, so that the output and post-processing order is stable
+        all_apps = sorted(set(sum(all_apps.values(), [])))
 
-        bundled_files = OrderedDict()
-        # FIXME: this should be configurable, if people use S3BotoStorage for example, it needs to end up there
-        storage = FileSystemStorage(settings.STATIC_ROOT, base_url=settings.STATIC_URL)
+        if self.minimal:
+            # trace the apps that may have changed in as few node processes as possible
+            stale = [app for app in all_apps if not tracer.stats_unchanged(app)]
+            tracer.trace_many(stale)
+
+        to_bundle = []
         for app in all_apps:
             # do we need to generate the bundle for this app?
             if self.minimal and not (has_different_options or tracer.check_needs_update(app)):
@@ -70,21 +384,234 @@ class Command(BundleOptionsMixin, TemplateDiscoveryMixin, BaseCommand):
                 bundle_path = System.get_bundle_path(app)
                 if self.storage.exists(bundle_path):
                     self.stdout.write('Checked bundle for app \'{app}\', no changes found'.format(app=app))
+                    self.report.skip(app, 'up-to-date')
                     continue
+            to_bundle.append(app)
+        return all_apps, to_bundle
+
+    def classify_app(self, tracer, app, options_changed):
+        """
+        Find out whether the app needs to be bundled by a --minimal run, and why.
+
+        Only traces the app if the jspm configuration changed and none of its
+        modules did - then the dependency tree may have changed.
+
+        :return: tuple of the status and the changed files
+        """
+        if options_changed:
+            return 'options-changed', []
+        if not self.storage.exists(System.get_bundle_path(app)):
+            return 'missing', []
+        if tracer.get_depcache(app) is None:
+            return 'new', []
+        if tracer.stats_unchanged(app):
+            return 'up-to-date', []
+
+        changed = tracer.get_changed_files(app)
+        if any(not os.path.isabs(path) for path in changed):
+            return 'changed', changed
+        # only the configuration changed
+        return ('changed', changed) if tracer.check_needs_update(app) else ('up-to-date', [])
+
+    def plan(self, tracer, system_opts, options):
+        """
+        Report which apps need to be bundled, without starting jspm.
+        """
+        all_apps = self.find_apps(templates=options.get('templates'))
+        all_apps = sorted(set(sum(all_apps.values(), [])))
+
+        has_depcache = os.path.exists(tracer.cache_file_path)
+        options_changed = has_depcache and tracer.get_bundle_options() != system_opts
+
+        history = BundleHistory()
+        apps = []
+        for app in all_apps:
+            if has_depcache:
+                status, changed = self.classify_app(tracer, app, options_changed)
+            else:
+                status, changed = 'new', []
+            tree = tracer.get_depcache(app) if has_depcache else None
+            modules, input_size = self.get_tree_sizes(tracer, {app: tree}).get(app) if tree else (None, None)
+            apps.append(OrderedDict([
+                ('app', app),
+                ('status', status),
+                # without --minimal, all apps are bundled
+                ('bundle', status != 'up-to-date' or not self.minimal),
+                ('changed_files', changed),
+                ('estimate', history.estimate(app, modules, input_size)),
+            ]))
+
+        to_bundle = [info for info in apps if info['bundle']]
+        duration = estimate_remaining(
+            {info['app']: info['estimate'] for info in to_bundle}, {},
+            [info['app'] for info in to_bundle], self.jobs)
+        plan = OrderedDict([
+            ('apps', apps),
+            ('to_bundle', len(to_bundle)),
+            ('jobs', self.jobs),
+            ('estimated_duration', duration),
+        ])
+
+        if options.get('json'):
+            self.stdout.write(json.dumps(plan, indent=2))
+            return
+
+        for info in apps:
+            line = '{app}: {status}'.format(**info)
+            if info['changed_files']:
+                line += ' ({files})'.format(files=', '.join(info['changed_files']))
+            self.stdout.write(line)
+        summary = '{count} of {total} apps to bundle'.format(count=len(to_bundle), total=len(apps))
+        if duration is not None and to_bundle:
+            summary += ', estimated {duration:.1f}s with {jobs} jobs'.format(duration=duration, jobs=self.jobs)
+        self.stdout.write(summary)
+
+    def handle(self, **options):
+        super(Command, self).handle(**options)
+
+        self.post_process = options['post_process']
+        self.watching = options.get('watch')
+        if self.watching:
+            # watching needs an up to date depcache
+            options['minimal'] = True
+        self.minimal = options.get('minimal')
+        self.jobs = options.get('jobs') or 1
+        if settings.SYSTEMJS_MAX_PROCESSES:
+            # more threads would only wait for a jspm process slot
+            self.jobs = min(self.jobs, settings.SYSTEMJS_MAX_PROCESSES)
+        self.common = options.get('common')
+        self.vendor = options.get('vendor')
+        self.shared, self.excludes, self.vendor_modules = [], {}, {}
+        self.vendor_digests, self.vendor_to_bundle = {}, []
+        if options.get('plan') and (options.get('changed_files') or self.watching):
+            raise CommandError('--plan can not be combined with --changed-files or --watch')
+        if options.get('json') and not options.get('plan'):
+            raise CommandError('--json is only supported with --plan')
+        if self.common is not None and self.common < 2:
+            raise CommandError('--common needs modules to be shared by at least 2 apps')
+        if self.common or self.vendor:
+            if options.get('sfx'):
+                raise CommandError('Self-executing bundles can not be split with --common or --vendor')
+            if options.get('changed_files') or self.watching:
+                raise CommandError('--common and --vendor can not be combined with --changed-files or --watch')
 
-            rel_path = system.bundle(app)
+        self.verbosity = 2
+        self.storage = copy(staticfiles_storage)
+        self.storage.systemjs_bundling = True  # set flag to check later
+
+        # initialize SystemJS specific objects to process the bundles
+        tracer = SystemTracer(node_path=options.get('node_path'), jobs=self.jobs)
+        system_opts = self.get_system_opts(options)
+        self.report = BuildReport(options=system_opts)
+        if options.get('plan'):
+            self.plan(tracer, system_opts, options)
+            return
+        system = System(**system_opts)
+        # FIXME: this should be configurable, if people use S3BotoStorage for example, it needs to end up there
+        self.bundle_storage = FileSystemStorage(settings.STATIC_ROOT, base_url=settings.STATIC_URL)
+
+        changed_files = options.get('changed_files')
+        if self.minimal or changed_files:
+            # bundles are looked up by the contents of their dependency trees. With
+            # --minimal those are known already; the apps affected by
+            # --changed-files are traced for it first, see `get_cache_keys`
+            system.artifact_cache = get_artifact_cache()
+        if changed_files or self.watching:
+            # the apps are not traced up front, get the trees for the depcache while bundling
+            system.collect_traces(node_path=options.get('node_path'))
+        if changed_files:
+            # the depcache knows which apps use the files, no discovery or tracing needed
+            to_bundle = self.find_changed_apps(
+                tracer, changed_files, system_opts, options.get('stdin', sys.stdin))
+            if not to_bundle:
+                self.stdout.write('No apps use the changed files')
+        else:
+            all_apps, to_bundle = self.find_apps_to_bundle(tracer, system_opts, options)
+
+        if self.common or self.vendor:
+            to_bundle = self.plan_split_bundles(tracer, all_apps, to_bundle)
+
+        if options.get('daemon') and (to_bundle or self.vendor_to_bundle or self.watching):
+            system.start_daemon(node_path=options.get('node_path'))
+        try:
+            failed = []
+            common_path = None
+            if self.shared and to_bundle:
+                common_path = self.bundle_common(system, self.shared)
+                if common_path is None:
+                    failed.append('common bundle')
+                    # there is no common bundle to load the shared modules from,
+                    # bundle them into the apps. The next run tries again
+                    self.shared = []
+                    self.excludes = {app: self.vendor_modules.get(app, []) for app in all_apps}
+
+            results = self.bundle_vendor(system, self.vendor_to_bundle)
+            cache_keys = self.get_cache_keys(tracer, system, to_bundle, self.excludes)
+            results += self.bundle_apps(tracer, system, to_bundle, cache_keys, self.excludes)
+            bundled_files, failed_apps = self.collect_bundles(results)
+            failed += failed_apps
+            self.use_bundle_traces(tracer, system, to_bundle)
+
+            if common_path is not None:
+                bundled_files[common_path] = (self.bundle_storage, common_path)
+            if not changed_files and (to_bundle or self.vendor_to_bundle):
+                self.write_manifest(all_apps, failed)
+
+            if changed_files and bundled_files:
+                self.stdout.write('Updating the depcache...')
+                self.update_depcache(tracer, to_bundle, system_opts)
+            elif self.minimal and bundled_files:
+                self.stdout.write('Generating the new depcache and writing to file...')
+                all_deps = tracer.get_dep_trees(all_apps)
+                tracer.write_depcache(all_deps, system_opts)
+
+            self.post_process_bundles(bundled_files, include_systemjs=True)
+            self.write_report(tracer, options)
+
+            if self.watching:
+                self.watch(tracer, system, system_opts)
+        finally:
+            system.stop_daemon()
+
+        if failed:
+            raise CommandError('Bundling failed for: {apps}'.format(apps=', '.join(failed)))
+
+    def collect_bundles(self, results):
+        """
+        Report the bundle results.
+
+        :return: tuple of the bundled files to post-process and the failed apps
+        """
+        bundled_files = OrderedDict()
+        failed = []
+        for app, rel_path, error in results:
+            if error is not None:
+                failed.append(app)
+                self.stderr.write('Could not bundle {app}: {error}'.format(app=app, error=error))
+                continue
             if not self.storage.exists(rel_path):
                 self.stderr.write('Could not bundle {app}'.format(app=app))
             else:
                 self.stdout.write('Bundled {app} into {out}'.format(app=app, out=rel_path))
-            bundled_files[rel_path] = (storage, rel_path)
+            bundled_files[rel_path] = (self.bundle_storage, rel_path)
+        return bundled_files, failed
 
-        if self.minimal and bundled_files:
-            self.stdout.write('Generating the new depcache and writing to file...')
-            all_deps = {app: tracer.trace(app) for app in all_apps}
-            tracer.write_depcache(all_deps, system_opts)
+    def update_depcache(self, tracer, apps, system_opts):
+        """
+        Write the depcache, tracing only `apps`.
 
-        if self.post_process and hasattr(self.storage, 'post_process'):
+        The other apps were not rebundled, so their trees in the depcache are
+        still valid.
+        """
+        all_deps = {app: tracer.get_depcache(app) for app in tracer.get_apps()}
+        all_deps.update(tracer.trace_many(apps))
+        tracer.write_depcache(all_deps, system_opts)
+
+    def post_process_bundles(self, bundled_files, include_systemjs=False):
+        if not (self.post_process and hasattr(self.storage, 'post_process')):
+            return
+
+        if include_systemjs:
             # post-process system.js if it's within settings.STATIC_ROOT
             systemjs_path = find_systemjs_location()
             try:
@@ -93,17 +620,81 @@ class Command(BundleOptionsMixin, TemplateDiscoveryMixin, BaseCommand):
                 within_static_root = False
             if within_static_root:
                 relative = os.path.relpath(systemjs_path, settings.STATIC_ROOT)
-                bundled_files[relative] = (storage, relative)
-
-            processor = self.storage.post_process(bundled_files, dry_run=False)
-            for original_path, processed_path, processed in processor:
-                if isinstance(processed, Exception):  # pragma: no cover
-                    self.stderr.write("Post-processing '%s' failed!" % original_path)
-                    # Add a blank line before the traceback, otherwise it's
-                    # too easy to miss the relevant part of the error message.
-                    self.stderr.write("")
-                    raise processed
-                if processed:  # pragma: no cover
-                    self.log("Post-processed '%s' as '%s'" % (original_path, processed_path), level=1)
-                else:
-                    self.log("Skipped post-processing '%s'" % original_path)  # pragma: no cover
+                bundled_files[relative] = (self.bundle_storage, relative)
+
+        processor = self.storage.post_process(bundled_files, dry_run=False)
+        start = time.time()
+        for original_path, processed_path, processed in processor:
+            # the work for a file happens before it's yielded
+            now = time.time()
+            self.report.add_post_process_time(original_path, now - start)
+            if signals.post_process.has_listeners(Command):
+                signals.post_process.send(
+                    sender=Command, path=original_path, processed_path=processed_path,
+                    processed=processed, duration=now - start)
+            start = now
+            if isinstance(processed, Exception):  # pragma: no cover
+                self.stderr.write("Post-processing '%s' failed!" % original_path)
+                # Add a blank line before the traceback, otherwise it's
+                # too easy to miss the relevant part of the error message.
+                self.stderr.write("")
+                raise processed
+            if processed:  # pragma: no cover
+                self.log("Post-processed '%s' as '%s'" % (original_path, processed_path), level=1)
+            else:
+                self.log("Skipped post-processing '%s'" % original_path)  # pragma: no cover
+        # the post-processed names (e.g. hashes) may have changed
+        clear_url_cache()
+
+    def write_report(self, tracer, options):
+        """
+        Write the report of the run, if requested.
+        """
+        if not (options.get('report') or options.get('prometheus')):
+            return
+        self.report.finish()
+        for app, duration in tracer.trace_times.items():
+            if app in self.report.apps:
+                self.report.add_time(app, 'trace_time', duration)
+        tree_sizes = self.get_tree_sizes(tracer, tracer.get_known_trees(list(self.report.apps)))
+        self.report.add_sizes(self.bundle_storage, tree_sizes)
+
+        if options.get('report'):
+            self.report.write_json(options['report'])
+        if options.get('prometheus'):
+            self.report.write_prometheus(options['prometheus'])
+
+    def watch(self, tracer, system, system_opts):
+        """
+        Rebundle the apps affected by changes to the files in the depcache,
+        until interrupted.
+        """
+        watcher = get_watcher(tracer.get_files())
+        self.stdout.write('Watching for changes, press CTRL+C to stop...')
+        try:
+            for changed in watcher.changes():
+                self.rebundle_changed(tracer, system, system_opts, changed)
+                # new modules may have been imported
+                watcher.set_paths(tracer.get_files())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
+    def rebundle_changed(self, tracer, system, system_opts, changed):
+        apps = tracer.find_affected_apps(changed)
+        tracer.invalidate(apps=apps, paths=[tracer.normalize_path(path) for path in changed])
+        if not apps:
+            return
+        if system.daemon is not None:
+            system.daemon.request(invalidate=sorted(changed))
+
+        self.stdout.write('Changes detected, rebundling {apps}'.format(apps=', '.join(apps)))
+        cache_keys = self.get_cache_keys(tracer, system, apps)
+        bundled_files, failed = self.collect_bundles(self.bundle_apps(tracer, system, apps, cache_keys))
+        self.use_bundle_traces(tracer, system, apps)
+        try:
+            self.update_depcache(tracer, apps, system_opts)
+        except TraceError as e:  # e.g. a syntax error while editing
+            self.stderr.write('Could not update the depcache: {error}'.format(error=e))
+        self.post_process_bundles(bundled_files)
@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+import json
+
 from django.core.management.base import BaseCommand
 
 from ._mixins import TemplateDiscoveryMixin
@@ -9,10 +11,22 @@ class Command(TemplateDiscoveryMixin, BaseCommand):
     help = "Find packages imported in the templates and list them"
     requires_system_checks = False
 
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Output the templates and apps as JSON, e.g. for SYSTEMJS_WARMUP.")
+
     def handle(self, **options):
         super(Command, self).handle(**options)
 
         all_apps = self.find_apps(templates=options.get('templates'))
+        if options.get('json'):
+            apps = sorted(set(app for tpl_apps in all_apps.values() for app in tpl_apps))
+            templates = {tpl_name: sorted(set(tpl_apps)) for tpl_name, tpl_apps in all_apps.items()}
+            self.stdout.write(json.dumps({'apps': apps, 'templates': templates}, indent=2, sort_keys=True))
+            return
+
         for tpl_name, apps in sorted(all_apps.items()):
             self.stdout.write(self.style.MIGRATE_LABEL(tpl_name))
             for app in apps:
@@ -16,11 +16,9 @@ class Command(BundleOptionsMixin, TemplateDiscoveryMixin, BaseCommand):
         system_opts = self.get_system_opts(options)
 
         all_apps = self.find_apps(templates=options.get('templates'))
-        all_apps = set(sum(all_apps.values(), []))
+        all_apps = sorted(set(sum(all_apps.values(), [])))
 
-        tracer = SystemTracer(node_path=options.get('node_path'))
+        tracer = SystemTracer(node_path=options.get('node_path'), jobs=options.get('jobs'))
 
-        all_deps = {
-            app: tracer.trace(app) for app in all_apps
-        }
+        all_deps = tracer.trace_many(all_apps)
         tracer.write_depcache(all_deps, system_opts)
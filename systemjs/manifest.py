@@ -0,0 +1,234 @@
+"""
+The bundle manifest records the bundles that need to be loaded before the
+bundle of an app, like the common bundle with the modules shared by apps and
+the vendor bundles with the modules installed by jspm.
+
+It's written by `systemjs_bundle` next to the bundles, and read by the
+`systemjs_import` template tag.
+
+Long running processes keep the manifests in memory, see `ManifestReloader`.
+"""
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+import os
+import posixpath
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.encoding import force_text
+
+from .paths import clear_url_cache, get_url_cache_generation
+
+logger = logging.getLogger(__name__)
+
+
+class BundleManifest(object):
+
+    name = 'bundles.json'
+    version = 1
+
+    _cached = None  # (generation, manifest), see `get`
+
+    # True for the empty manifest `load` returns when there is no manifest
+    missing = False
+
+    def __init__(self, preloads=None, common=None, vendor=None):
+        """
+        :param preloads: dict of app -> list of the bundles (paths relative to
+        STATIC_ROOT) to load before the bundle of the app
+        :param common: dict describing the common bundle, see `systemjs_bundle --common`
+        :param vendor: dict of app -> digest of the modules in its vendor
+        bundle, see `systemjs_bundle --vendor`
+        """
+        self.preloads = preloads or {}
+        self.common = common or {}
+        self.vendor = vendor or {}
+
+    @classmethod
+    def get_path(cls):
+        return os.path.join(settings.STATIC_ROOT, settings.SYSTEMJS_OUTPUT_DIR, cls.name)
+
+    @classmethod
+    def get_name(cls):
+        """
+        Return the name of the manifest in the static files storage.
+        """
+        return posixpath.join(settings.SYSTEMJS_OUTPUT_DIR, cls.name)
+
+    @classmethod
+    def get(cls):
+        """
+        Return the manifest, loaded once per generation of the URL cache.
+        """
+        generation = get_url_cache_generation()
+        cached = cls._cached
+        if cached is None or cached[0] != generation:
+            manifest = cls.load()
+            if manifest.missing and settings.SYSTEMJS_ENABLED:
+                cls.warn_missing()
+            cached = cls._cached = (generation, manifest)
+        return cached[1]
+
+    @classmethod
+    def warn_missing(cls):
+        """
+        Warn if the manifest can't be found on a host without bundles.
+
+        Without a split, `systemjs_bundle` writes no manifest, so a missing
+        manifest next to the bundles is normal. Without the bundle directory,
+        e.g. with a remote storage or on hosts without a collected
+        STATIC_ROOT, there's no telling whether the bundles were built with
+        `--common` or `--vendor`. If so, they're loaded without the bundles
+        they need and break in the browser.
+        """
+        if os.path.isdir(os.path.dirname(cls.get_path())):
+            return
+        logger.warning(
+            "The bundle manifest '%s' was not found in the static files storage, and '%s' "
+            "does not exist. Bundles built with --common or --vendor are loaded without "
+            "their common and vendor bundles.", cls.get_name(), os.path.dirname(cls.get_path()))
+
+    @classmethod
+    def read(cls):
+        """
+        Read the manifest through the static files storage, falling back to
+        the local STATIC_ROOT where `systemjs_bundle` writes it.
+
+        :return: the contents, or None if there is no manifest
+        """
+        try:
+            with staticfiles_storage.open(cls.get_name()) as infile:
+                return force_text(infile.read())
+        except Exception:  # remote storages raise their own errors for missing files
+            logger.debug("Could not read '%s' from the static files storage", cls.get_name(), exc_info=True)
+        try:
+            with io.open(cls.get_path()) as infile:
+                return infile.read()
+        except (IOError, OSError):
+            return None
+
+    @classmethod
+    def load(cls):
+        """
+        Load the manifest, or return an empty manifest if there is none.
+        """
+        content = cls.read()
+        if content is None:
+            manifest = cls()
+            manifest.missing = True
+            return manifest
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return cls()
+        if not isinstance(data, dict) or data.get('version') != cls.version:
+            return cls()
+        return cls(preloads=data.get('preload'), common=data.get('common'), vendor=data.get('vendor'))
+
+    def save(self):
+        path = self.get_path()
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        data = {
+            'version': self.version,
+            'preload': self.preloads,
+            'common': self.common,
+            'vendor': self.vendor,
+        }
+        with io.open(path, 'w') as outfile:
+            outfile.write(force_text(json.dumps(data, sort_keys=True)))
+        clear_url_cache()
+
+    @classmethod
+    def delete(cls):
+        try:
+            os.remove(cls.get_path())
+        except OSError:
+            pass
+        clear_url_cache()
+
+    def get_preloads(self, app):
+        return self.preloads.get(app, [])
+
+
+class ManifestReloader(object):
+    """
+    Reloads the manifests when a deploy replaced them, without restarting the
+    workers.
+
+    The bundle manifest and the manifest of the static files storage (e.g.
+    `staticfiles.json`, which maps the bundles to their hashed names) are
+    loaded once and kept in memory. At most every `SYSTEMJS_MANIFEST_CHECK_INTERVAL`
+    seconds they are `stat`-ed, and if the modification time, size or inode of
+    either changed, the hashed names are loaded again and the URL cache is
+    cleared.
+    """
+
+    def __init__(self):
+        self.checked = None
+        self.state = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_files():
+        files = [BundleManifest.get_path()]
+        manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+        if manifest_name:
+            try:
+                files.append(staticfiles_storage.path(manifest_name))
+            except NotImplementedError:  # remote storage
+                pass
+        return files
+
+    def get_state(self):
+        state = []
+        for path in self.get_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                state.append((path, None))
+            else:
+                state.append((path, (stat.st_mtime, stat.st_size, stat.st_ino)))
+        return state
+
+    def check(self):
+        """
+        Reload the manifests if they changed, and the last check was long
+        enough ago.
+        """
+        interval = settings.SYSTEMJS_MANIFEST_CHECK_INTERVAL
+        if interval is None:
+            return
+        now = time.time()
+        if self.checked is not None and now - self.checked < interval:
+            return
+        with self.lock:
+            if self.checked is not None and now - self.checked < interval:
+                return  # checked by another thread in the mean time
+            self.checked = now
+            state = self.get_state()
+            if self.state is not None and state != self.state:
+                self.reload()
+            self.state = state
+
+    def reload(self):
+        if hasattr(staticfiles_storage, 'load_manifest'):
+            try:
+                hashed_files = staticfiles_storage.load_manifest()
+                # collectstatic deletes the manifest before writing the new one,
+                # load_manifest returns no hashed names at all in the mean time
+                if not hashed_files and staticfiles_storage.read_manifest() is None:
+                    raise ValueError("'%s' does not exist" % staticfiles_storage.manifest_name)
+            except ValueError as e:  # a partial write, or a version we don't know
+                logger.warning("Could not reload the static files manifest, keeping the old one: %s", e)
+            else:
+                staticfiles_storage.hashed_files = hashed_files
+        clear_url_cache()
+
+
+manifest_reloader = ManifestReloader()
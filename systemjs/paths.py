@@ -0,0 +1,96 @@
+"""
+The paths and URLs of the bundles, as needed when rendering the template tag.
+
+Kept apart from `systemjs.base`, so that web workers don't import the
+bundling machinery (subprocesses, jspm version detection, tracing...).
+"""
+from __future__ import unicode_literals
+
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.lru_cache import lru_cache
+
+# maximum number of URLs remembered by `get_bundle_url` and `get_static_url`
+URL_CACHE_SIZE = 1024
+
+# settings that the bundle URLs depend on
+URL_SETTINGS = ('STATIC_URL', 'STATIC_ROOT', 'STATICFILES_STORAGE')
+
+
+def needs_ext(app):
+    """
+    Check whether `app` is missing the '.js' extension and if it needs it.
+    """
+    if settings.SYSTEMJS_DEFAULT_JS_EXTENSIONS:
+        name, ext = posixpath.splitext(app)
+        if not ext:
+            return True
+    return False
+
+
+def get_bundle_outfile(app):
+    """
+    Return the absolute path of the bundle of `app`.
+    """
+    js_file = '{app}{ext}'.format(app=app, ext='.js' if needs_ext(app) else '')
+    return os.path.join(settings.STATIC_ROOT, settings.SYSTEMJS_OUTPUT_DIR, js_file)
+
+
+def get_bundle_path(app):
+    """
+    Return the path of the bundle of `app`, relative to STATIC_ROOT.
+    """
+    return os.path.relpath(get_bundle_outfile(app), settings.STATIC_ROOT)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def get_static_url(rel_path):
+    """
+    Return the URL of the bundle at `rel_path`, relative to STATIC_ROOT.
+
+    Used for the common and vendor bundles an app preloads, see
+    `BundleManifest.get_preloads`.
+
+    Called for every bundle on every render of the template tag, so the
+    results are cached. See `clear_url_cache`.
+    """
+    return staticfiles_storage.url(rel_path)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def get_bundle_url(app):
+    """
+    Return the URL of the bundle of `app`, cached like `get_static_url`.
+    """
+    return staticfiles_storage.url(get_bundle_path(app))
+
+
+# bumped whenever the URL cache is cleared, output derived from the URLs is
+# valid as long as the generation doesn't change
+_url_cache_generation = 0
+
+
+def get_url_cache_generation():
+    return _url_cache_generation
+
+
+def clear_url_cache():
+    """
+    Forget the cached bundle URLs, e.g. after the bundles were post-processed
+    again.
+    """
+    global _url_cache_generation
+    _url_cache_generation += 1
+    get_static_url.cache_clear()
+    get_bundle_url.cache_clear()
+
+
+@receiver(setting_changed)
+def clear_url_cache_on_setting_changed(setting, **kwargs):
+    if setting in URL_SETTINGS or setting.startswith('SYSTEMJS_'):
+        clear_url_cache()
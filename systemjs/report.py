@@ -0,0 +1,156 @@
+"""
+Report of a `systemjs_bundle` run, with the timings and sizes per app.
+
+Written as JSON (``--report``) and/or in the Prometheus text format
+(``--prometheus``), for the textfile collector of the node exporter.
+"""
+from __future__ import unicode_literals
+
+import gzip
+import io
+import json
+import time
+from collections import OrderedDict
+
+from django.utils.encoding import force_text
+
+from .utils import write_atomic
+
+REPORT_VERSION = 1
+
+# app field -> (metric name, help text)
+METRICS = OrderedDict([
+    ('trace_time', ('systemjs_trace_duration_seconds', 'Time spent tracing the app.')),
+    ('bundle_time', ('systemjs_bundle_duration_seconds', 'Time spent bundling the app.')),
+    ('post_process_time', ('systemjs_post_process_duration_seconds', 'Time spent post-processing the bundle.')),
+    ('modules', ('systemjs_bundle_modules', 'Number of modules in the dependency tree of the app.')),
+    ('bytes', ('systemjs_bundle_size_bytes', 'Size of the bundle.')),
+    ('gzip_bytes', ('systemjs_bundle_gzip_size_bytes', 'Size of the gzipped bundle.')),
+])
+
+
+def get_gzip_size(path):
+    """
+    Return the size of the file at `path` after gzip compression.
+    """
+    out = io.BytesIO()
+    with io.open(path, 'rb') as infile:
+        with gzip.GzipFile(fileobj=out, mode='wb', mtime=0) as gz:
+            for chunk in iter(lambda: infile.read(64 * 1024), b''):
+                gz.write(chunk)
+    return len(out.getvalue())
+
+
+def format_labels(**labels):
+    escaped = (
+        (key, force_text(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in sorted(labels.items())
+    )
+    return '{' + ','.join('{}="{}"'.format(key, value) for key, value in escaped) + '}'
+
+
+class BuildReport(object):
+    """
+    Collects the metrics of a bundle run.
+
+    The status of an app is one of 'bundled', 'restored' (from the artifact
+    cache), 'skipped' (see `reason`) or 'failed'.
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.started = time.time()
+        self.duration = None
+        self.apps = OrderedDict()
+        # bundle path -> app, to attribute the post-processing
+        self.paths = {}
+
+    def get(self, app):
+        if app not in self.apps:
+            self.apps[app] = OrderedDict([
+                ('status', None),
+                ('reason', None),
+                ('cache_hit', False),
+                ('path', None),
+            ] + [(field, None) for field in METRICS])
+        return self.apps[app]
+
+    def skip(self, app, reason):
+        self.get(app).update(status='skipped', reason=reason)
+
+    def add_bundle(self, app, rel_path, duration, cache_hit=False):
+        self.get(app).update(
+            status='restored' if cache_hit else 'bundled', cache_hit=cache_hit,
+            path=rel_path, bundle_time=round(duration, 3))
+        self.paths[rel_path] = app
+
+    def add_failure(self, app, error, duration=None):
+        self.get(app).update(
+            status='failed', reason=force_text(error),
+            bundle_time=round(duration, 3) if duration is not None else None)
+
+    def add_time(self, app, field, duration):
+        info = self.get(app)
+        info[field] = round((info[field] or 0) + duration, 3)
+
+    def add_post_process_time(self, path, duration):
+        if path in self.paths:
+            self.add_time(self.paths[path], 'post_process_time', duration)
+
+    def add_sizes(self, storage, tree_sizes=None):
+        """
+        Measure the bundles in `storage`, and add the module counts.
+
+        :param tree_sizes: dict of app -> (number of modules, input size)
+        """
+        for app, info in self.apps.items():
+            if app in (tree_sizes or {}):
+                info['modules'] = tree_sizes[app][0]
+            if info['path'] is None:
+                continue
+            try:
+                info['bytes'] = storage.size(info['path'])
+                info['gzip_bytes'] = get_gzip_size(storage.path(info['path']))
+            except (IOError, OSError, NotImplementedError):
+                pass
+
+    def finish(self):
+        self.duration = round(time.time() - self.started, 3)
+
+    def as_dict(self):
+        return OrderedDict([
+            ('version', REPORT_VERSION),
+            ('started', self.started),
+            ('duration', self.duration),
+            ('options', self.options),
+            ('apps', self.apps),
+        ])
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.as_dict(), indent=2))
+
+    def format_prometheus(self):
+        lines = [
+            '# HELP systemjs_build_duration_seconds Duration of the systemjs_bundle run.',
+            '# TYPE systemjs_build_duration_seconds gauge',
+            'systemjs_build_duration_seconds {}'.format(self.duration or 0),
+            '# HELP systemjs_build_timestamp_seconds Start of the systemjs_bundle run.',
+            '# TYPE systemjs_build_timestamp_seconds gauge',
+            'systemjs_build_timestamp_seconds {}'.format(self.started),
+            '# HELP systemjs_bundle_status Outcome of the run for the app.',
+            '# TYPE systemjs_bundle_status gauge',
+        ]
+        lines += [
+            'systemjs_bundle_status{} 1'.format(format_labels(app=app, status=info['status']))
+            for app, info in self.apps.items()
+        ]
+        for field, (name, help_text) in METRICS.items():
+            values = [(app, info[field]) for app, info in self.apps.items() if info[field] is not None]
+            if not values:
+                continue
+            lines += ['# HELP {} {}'.format(name, help_text), '# TYPE {} gauge'.format(name)]
+            lines += ['{}{} {}'.format(name, format_labels(app=app), value) for app, value in values]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        write_atomic(path, self.format_prometheus())
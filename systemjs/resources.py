@@ -0,0 +1,155 @@
+"""
+Limits for the jspm/node processes, so that bundling doesn't starve other
+processes on the same host (e.g. web servers handling live requests).
+
+See the ``SYSTEMJS_MAX_PROCESSES``, ``SYSTEMJS_PROCESS_MEMORY``,
+``SYSTEMJS_PROCESS_NICE``, ``SYSTEMJS_PROCESS_IONICE`` and
+``SYSTEMJS_NODE_MAX_OLD_SPACE_SIZE`` settings.
+"""
+from __future__ import unicode_literals
+
+import io
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    from shutil import which
+except ImportError:  # Py2
+    from distutils.spawn import find_executable as which
+
+logger = logging.getLogger(__name__)
+
+
+IONICE_CLASSES = {
+    'best-effort': 2,
+    'idle': 3,
+}
+
+
+def get_available_memory():
+    """
+    Return the memory available for new processes in bytes, or None if it
+    can't be determined (only Linux is supported).
+    """
+    try:
+        with io.open('/proc/meminfo') as infile:
+            for line in infile:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class ResourceGovernor(object):
+    """
+    Decides when jspm/node processes may start, and how.
+
+    :param max_processes: maximum number of processes running at the same time
+    :param process_memory: memory in MiB a process is expected to need. No new
+      process is started while less memory is available, unless nothing is
+      running - so the concurrency scales down when memory gets low.
+    :param nice: niceness increment of the processes
+    :param ionice: IO scheduling class of the processes, see `IONICE_CLASSES`
+    :param max_old_space_size: heap limit of node in MiB
+    """
+
+    poll_interval = 0.5
+
+    def __init__(self, max_processes=None, process_memory=None, nice=None, ionice=None,
+                 max_old_space_size=None):
+        self.max_processes = max_processes
+        self.process_memory = process_memory
+        self.nice = nice
+        self.ionice = ionice
+        self.max_old_space_size = max_old_space_size
+        self.running = 0
+        self.condition = threading.Condition()
+
+    def has_memory(self):
+        if not self.process_memory:
+            return True
+        available = get_available_memory()
+        return available is None or available >= self.process_memory * 1024 * 1024
+
+    def can_start(self):
+        if self.running == 0:
+            return True
+        if self.max_processes and self.running >= self.max_processes:
+            return False
+        return self.has_memory()
+
+    @contextmanager
+    def process(self):
+        """
+        Block until a process may start, and keep its slot while in the block.
+        """
+        with self.condition:
+            while not self.can_start():
+                # the available memory changes without notification, check again
+                self.condition.wait(self.poll_interval)
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.running -= 1
+                self.condition.notify()
+
+    def wrap_command(self, cmd):
+        """
+        Prefix the (shell) command with nice/ionice, if configured and available.
+        """
+        prefix = []
+        if self.nice is not None:
+            if which('nice'):
+                prefix.append('nice -n {}'.format(self.nice))
+            else:  # pragma: no cover
+                logger.warning("SYSTEMJS_PROCESS_NICE is set, but 'nice' is not available")
+        if self.ionice is not None:
+            if which('ionice'):
+                prefix.append('ionice -c {}'.format(IONICE_CLASSES[self.ionice]))
+            else:
+                logger.debug("SYSTEMJS_PROCESS_IONICE is set, but 'ionice' is not available")
+        return ' '.join(prefix + [cmd])
+
+    def get_env(self, env=None):
+        """
+        Add the node heap limit to the environment.
+
+        :param env: the environment to extend, by default `os.environ`
+        :return: the environment, None for the unchanged `os.environ`
+        """
+        if not self.max_old_space_size:
+            return env
+        env = (env if env is not None else os.environ).copy()
+        option = '--max-old-space-size={}'.format(self.max_old_space_size)
+        env['NODE_OPTIONS'] = ' '.join(filter(None, [env.get('NODE_OPTIONS'), option]))
+        return env
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """
+    Return the governor shared by all processes, for the current settings.
+    """
+    global _governor
+    config = dict(
+        max_processes=settings.SYSTEMJS_MAX_PROCESSES,
+        process_memory=settings.SYSTEMJS_PROCESS_MEMORY,
+        nice=settings.SYSTEMJS_PROCESS_NICE,
+        ionice=settings.SYSTEMJS_PROCESS_IONICE,
+        max_old_space_size=settings.SYSTEMJS_NODE_MAX_OLD_SPACE_SIZE,
+    )
+    with _governor_lock:
+        if _governor is None or _governor.config != config:
+            _governor = ResourceGovernor(**config)
+            _governor.config = config
+        return _governor
@@ -0,0 +1,40 @@
+"""
+Signals sent around the work of django-systemjs, e.g. for profiling.
+
+The senders check `has_listeners` before collecting the arguments, and the
+receivers per sender are cached, so the signals cost (next to) nothing when
+no receivers are connected - `systemjs_import_rendered` is sent on every
+render of the template tag.
+"""
+from __future__ import unicode_literals
+
+from django.dispatch import Signal
+
+# sender: SystemTracer. `apps` is a list, `trace-deps.js --many` traces
+# multiple apps at once.
+pre_trace = Signal(providing_args=['apps', 'command'], use_caching=True)
+
+# `error` is the output on stderr if tracing failed, None otherwise
+post_trace = Signal(providing_args=['apps', 'command', 'duration', 'error'], use_caching=True)
+
+# sender: the SystemBundle (sub)class
+pre_bundle = Signal(providing_args=['app', 'bundle', 'outfile'], use_caching=True)
+
+# `command` is None for bundles created by the bundle daemon, `size` is the
+# size of the bundle in bytes, `error` the BundleError if bundling failed.
+post_bundle = Signal(
+    providing_args=['app', 'bundle', 'outfile', 'command', 'duration', 'size', 'error'],
+    use_caching=True)
+
+# sent instead of pre/post_bundle when the bundle is restored from the artifact cache
+bundle_restored = Signal(
+    providing_args=['app', 'bundle', 'outfile', 'key', 'duration', 'size'], use_caching=True)
+
+# sender: the systemjs_bundle command class, sent for every file yielded by
+# the post_process method of the static files storage
+post_process = Signal(
+    providing_args=['path', 'processed_path', 'processed', 'duration'], use_caching=True)
+
+# sender: SystemImportNode
+systemjs_import_rendered = Signal(
+    providing_args=['app', 'context', 'output', 'duration'], use_caching=True)
@@ -2,14 +2,16 @@ from __future__ import unicode_literals
 
 import posixpath
 import re
+import time
 
 from django import template
 from django.conf import settings
-from django.contrib.staticfiles.storage import staticfiles_storage
 from django.forms.utils import flatatt
-from django.template.base import token_kwargs
+from django.template.base import FilterExpression, Variable, token_kwargs
 
-from systemjs.base import System
+from systemjs import signals
+from systemjs.manifest import BundleManifest, manifest_reloader
+from systemjs.paths import get_bundle_url, get_static_url, get_url_cache_generation
 
 register = template.Library()
 
@@ -18,17 +20,81 @@ register = template.Library()
 kwarg_re = re.compile(r"(?:(\w+)=)?(.+)")
 
 
+def get_literal(value):
+    """
+    Return the string `value` compiles to, or None if it depends on the context.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, FilterExpression) and not value.filters and not isinstance(value.var, Variable):
+        return value.var
+    return None
+
+
 class SystemImportNode(template.Node):
 
     def __init__(self, path, tag_attrs=None):
         self.path = path
-        self.tag_attrs = tag_attrs
+        self.tag_attrs = tag_attrs or {}
+
+        # With a literal path and attributes, the output only depends on the
+        # settings and the bundle manifest: build it once per generation of
+        # the URL cache instead of on every render.
+        self.literal_path = get_literal(path)
+        self.literal_attrs = {key: get_literal(value) for key, value in self.tag_attrs.items()}
+        if self.literal_path is None or None in self.literal_attrs.values():
+            self.literal_path = self.literal_attrs = None
+        self.compiled = None  # (generation, preloads, output)
 
     def render(self, context):
+        if not signals.systemjs_import_rendered.has_listeners(SystemImportNode):
+            return self.render_tags(context)
+
+        start = time.time()
+        output = self.render_tags(context)
+        signals.systemjs_import_rendered.send(
+            sender=SystemImportNode, app=self.path.resolve(context), context=context,
+            output=output, duration=time.time() - start)
+        return output
+
+    def render_tags(self, context):
+        manifest_reloader.check()
+        if self.literal_path is not None:
+            compiled = self.compiled
+            generation = get_url_cache_generation()
+            if compiled is None or compiled[0] != generation:
+                compiled = self.compiled = (generation,) + self.compile(self.literal_path, self.literal_attrs)
+            preloads, output = compiled[1:]
+        else:
+            tag_attrs = {
+                key: value if isinstance(value, bool) else value.resolve(context)
+                for key, value in self.tag_attrs.items()
+            }
+            preloads, output = self.compile(self.path.resolve(context), tag_attrs)
+
+        if not preloads:
+            return output
+
+        # bundles shared with other apps come first, but only once per page.
+        # {% include %} pushes a new render context, so keep track in the root
+        loaded = context.render_context.dicts[0].setdefault('systemjs_preloaded', set())
+        tags = []
+        for preload, tag in preloads:
+            if preload in loaded:
+                continue
+            loaded.add(preload)
+            tags.append(tag)
+        tags.append(output)
+        return '\n'.join(tags)
+
+    @staticmethod
+    def compile(module_path, tag_attrs):
         """
-        Build the filepath by appending the extension.
+        Build the script tags for `module_path`.
+
+        :return: a list of (preload, script tag) for the bundles to load first,
+          and the script tag of the app itself.
         """
-        module_path = self.path.resolve(context)
         if not settings.SYSTEMJS_ENABLED:
             if settings.SYSTEMJS_DEFAULT_JS_EXTENSIONS:
                 name, ext = posixpath.splitext(module_path)
@@ -39,21 +105,20 @@ class SystemImportNode(template.Node):
                 tpl = """<script src="{url}{app}" type="text/javascript"></script>"""
             else:
                 tpl = """<script type="text/javascript">System.import('{app}');</script>"""
-            return tpl.format(app=module_path, url=settings.SYSTEMJS_SERVER_URL)
+            return [], tpl.format(app=module_path, url=settings.SYSTEMJS_SERVER_URL)
 
         # else: create a bundle
-        rel_path = System.get_bundle_path(module_path)
-        url = staticfiles_storage.url(rel_path)
-
-        tag_attrs = {'type': 'text/javascript'}
-        for key, value in self.tag_attrs.items():
-            if not isinstance(value, bool):
-                value = value.resolve(context)
-            tag_attrs[key] = value
-
-        return """<script{attrs} src="{url}"></script>""".format(
-            url=url, attrs=flatatt(tag_attrs)
+        attrs = {'type': 'text/javascript'}
+        attrs.update(tag_attrs)
+        attrs = flatatt(attrs)
+        preloads = [
+            (preload, """<script{attrs} src="{url}"></script>""".format(url=get_static_url(preload), attrs=attrs))
+            for preload in BundleManifest.get().get_preloads(module_path)
+        ]
+        output = """<script{attrs} src="{url}"></script>""".format(
+            url=get_bundle_url(module_path), attrs=attrs
         )
+        return preloads, output
 
     @classmethod
     def handle_token(cls, parser, token):
@@ -0,0 +1,24 @@
+"""
+File helpers shared by the caches, the bundle history and the build report.
+"""
+from __future__ import unicode_literals
+
+import io
+import os
+import tempfile
+
+from django.utils.encoding import force_text
+
+
+def write_atomic(path, content):
+    """
+    Write and rename, so that readers (concurrent runs, the node exporter)
+    never see a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with io.open(fd, 'w') as outfile:
+        outfile.write(force_text(content))
+    os.rename(tmp_path, path)
@@ -0,0 +1,78 @@
+"""
+Fill the in-memory caches when a worker starts, instead of on its first
+requests. See the ``SYSTEMJS_WARMUP`` setting.
+"""
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+
+from .manifest import BundleManifest, manifest_reloader
+from .paths import get_bundle_url, get_static_url
+
+logger = logging.getLogger(__name__)
+
+
+def load_apps_manifest(path):
+    """
+    Read the apps manifest written by ``systemjs_show_packages --json``.
+
+    :return: the list of apps and the list of templates importing them
+    """
+    with io.open(path) as infile:
+        data = json.load(infile)
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object with 'apps' and 'templates'")
+    return list(data.get('apps') or []), sorted(data.get('templates') or {})
+
+
+def warmup(path):
+    """
+    Load the manifests, and cache the URLs of the bundles and the compiled
+    templates for the apps in the apps manifest at `path`.
+
+    Problems are logged, they must never keep a worker from starting.
+
+    :return: the time it took in seconds
+    """
+    start = time.time()
+    try:
+        apps, templates = load_apps_manifest(path)
+    except (IOError, OSError, ValueError) as e:
+        logger.warning("Could not read the apps manifest '%s' for SYSTEMJS_WARMUP: %s", path, e)
+        return time.time() - start
+
+    errors = []
+    if settings.SYSTEMJS_ENABLED:
+        manifest_reloader.check()
+        manifest = BundleManifest.get()
+        for app in apps:
+            try:
+                for preload in manifest.get_preloads(app):
+                    get_static_url(preload)
+                get_bundle_url(app)
+            except (IOError, OSError, ValueError) as e:  # e.g. not in the static files manifest
+                errors.append('{}: {}'.format(app, e))
+
+    # only sticks with the cached template loader
+    for template_name in templates:
+        try:
+            get_template(template_name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            errors.append('{}: {!r}'.format(template_name, e))
+
+    if errors:
+        logger.warning(
+            "Could not warm up %d of the apps and templates, e.g. %s", len(errors), errors[0])
+
+    duration = time.time() - start
+    logger.info(
+        "Warmed up the systemjs caches for %d apps and %d templates in %.1fms",
+        len(apps), len(templates), duration * 1000)
+    return duration
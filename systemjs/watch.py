@@ -0,0 +1,146 @@
+"""
+Watch files for changes, used by `systemjs_bundle --watch`.
+
+inotify is used if `inotify_simple` is installed (Linux only), otherwise the
+files are polled with `os.stat`.
+"""
+from __future__ import unicode_literals
+
+import os
+import time
+
+try:
+    import inotify_simple
+except ImportError:  # pragma: no cover
+    inotify_simple = None
+
+
+class BaseWatcher(object):
+
+    def __init__(self, paths):
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        """
+        (Re)configure the absolute paths of the files to watch.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def wait(self, timeout=None):
+        """
+        Block until any of the files changed, or until `timeout` seconds passed.
+
+        :return: set of changed paths, empty if the timeout passed
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def changes(self, debounce=0.3):
+        """
+        Yield the sets of changed paths.
+
+        Changes are collected until no file changed for `debounce` seconds, so
+        that a burst of changes (saving multiple files, a git checkout...) is
+        handled at once.
+        """
+        while True:
+            changed = self.wait()
+            while True:
+                more = self.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            yield changed
+
+    def close(self):
+        pass
+
+
+class PollingWatcher(BaseWatcher):
+
+    def __init__(self, paths, interval=0.5):
+        self.interval = interval
+        super(PollingWatcher, self).__init__(paths)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def set_paths(self, paths):
+        self.stats = {path: self._stat(path) for path in paths}
+
+    def poll(self):
+        changed = set()
+        for path, old_stat in self.stats.items():
+            stat = self._stat(path)
+            if stat != old_stat:
+                self.stats[path] = stat
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            remaining = self.interval if deadline is None else deadline - time.time()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+
+class InotifyWatcher(BaseWatcher):
+    """
+    Watches the directories of the files, so that files replaced by editors
+    (write to a temporary file and rename) are detected as well.
+    """
+
+    def __init__(self, paths):
+        self.inotify = inotify_simple.INotify()
+        self.descriptors = {}
+        super(InotifyWatcher, self).__init__(paths)
+
+    def set_paths(self, paths):
+        flags = inotify_simple.flags
+        mask = flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+
+        # symlinked files (collectstatic --link) are changed at their target
+        self.paths = {}
+        for path in paths:
+            self.paths.setdefault(os.path.realpath(path), set()).add(path)
+
+        directories = set(os.path.dirname(path) for path in self.paths)
+        for wd, directory in list(self.descriptors.items()):
+            if directory not in directories:
+                self.inotify.rm_watch(wd)
+                del self.descriptors[wd]
+        watched = set(self.descriptors.values())
+        for directory in directories - watched:
+            if os.path.isdir(directory):
+                self.descriptors[self.inotify.add_watch(directory, mask)] = directory
+
+    def wait(self, timeout=None):
+        timeout_ms = None if timeout is None else int(timeout * 1000)
+        while True:
+            changed = set()
+            for event in self.inotify.read(timeout=timeout_ms):
+                directory = self.descriptors.get(event.wd)
+                if directory is None:
+                    continue
+                changed.update(self.paths.get(os.path.join(directory, event.name), ()))
+            # without timeout, ignore the events for files we're not interested in
+            if changed or timeout is not None:
+                return changed
+
+    def close(self):
+        self.inotify.close()
+
+
+def get_watcher(paths):
+    if inotify_simple is not None:
+        return InotifyWatcher(paths)
+    return PollingWatcher(paths)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Import-time benchmark of the template tag library, as loaded by web workers.
+
+Reports the modules that ``{% load system_tags %}`` imports on top of a set up
+Django, and with Python 3.7+ the cumulative import times from
+``python -X importtime``. Run from the root of the repository::
+
+    python tests/bench_import.py [--top N]
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# prints the modules imported by the template tag library, as JSON
+IMPORT_SCRIPT = """
+import json, sys
+import django
+django.setup()
+before = set(sys.modules)
+import systemjs.templatetags.system_tags
+print(json.dumps(sorted(set(sys.modules) - before)))
+"""
+
+
+def run(args=()):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='tests.settings', PYTHONPATH=ROOT)
+    process = subprocess.Popen(
+        [sys.executable] + list(args) + ['-c', IMPORT_SCRIPT],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr)
+    return json.loads(stdout), stderr
+
+
+def get_imported_modules():
+    """
+    Return the modules imported by the template tag library, after `django.setup()`.
+    """
+    return run()[0]
+
+
+def get_import_times():
+    """
+    Return (cumulative microseconds, module) for the modules imported by the
+    template tag library, slowest first. Requires Python 3.7+.
+    """
+    modules, stderr = run(['-X', 'importtime'])
+    modules = set(modules)
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if parts[2] in modules:
+            times.append((int(parts[1]), parts[2]))
+    return sorted(times, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top', type=int, default=15, help="number of modules to show")
+    args = parser.parse_args()
+
+    modules = get_imported_modules()
+    print('{} modules imported by systemjs.templatetags.system_tags:'.format(len(modules)))
+    print('  ' + ', '.join(modules))
+
+    if sys.version_info < (3, 7):
+        print('python -X importtime requires Python 3.7+, skipping the timings')
+        return
+
+    times = get_import_times()
+    print('cumulative import times:')
+    for us, module in times[:args.top]:
+        print('{:>10.1f} ms  {}'.format(us / 1000.0, module))
+
+
+if __name__ == '__main__':
+    main()
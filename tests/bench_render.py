@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Microbenchmark of the per-tag render cost of ``{% systemjs_import %}``, with
+and without the bundle URL cache.
+
+The URLs are looked up on every render for an app in a variable; with a literal
+app the output is built once (``literal``).
+
+Run from the root of the repository::
+
+    python tests/bench_render.py [--number N] [--storage dotted.path.to.Storage]
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import sys
+import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help="renders per measurement")
+    parser.add_argument(
+        '--storage', default='django.contrib.staticfiles.storage.StaticFilesStorage',
+        help="STATICFILES_STORAGE to resolve the URLs with")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.settings'
+
+    import django
+    from django.template import Context, engines
+    from django.test.utils import override_settings
+
+    django.setup()
+
+    from systemjs.paths import get_bundle_url, get_static_url
+
+    with override_settings(SYSTEMJS_ENABLED=True, STATICFILES_STORAGE=args.storage):
+        template = engines['django'].from_string("{% load system_tags %}{% systemjs_import app %}")
+        literal_template = engines['django'].from_string(
+            "{% load system_tags %}{% systemjs_import 'myapp/main' %}")
+        context = Context({'app': 'myapp/main'})
+
+        def uncached():
+            # only the URL caches: clear_url_cache also reloads the bundle
+            # manifest and rebuilds the output of literal tags
+            get_bundle_url.cache_clear()
+            get_static_url.cache_clear()
+            template.render(context)
+
+        def cached():
+            template.render(context)
+
+        def literal():
+            literal_template.render(context)
+
+        for name, func in (('uncached', uncached), ('cached', cached), ('literal', literal)):
+            func()  # warm up
+            best = min(timeit.repeat(func, number=args.number, repeat=5))
+            print('{name:>10}: {us:.2f} us per tag'.format(name=name, us=best / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 PROJECT_DIR = os.path.dirname(__file__)
 BASE_DIR = PROJECT_DIR  # setting present in new startproject
@@ -44,3 +45,18 @@ TEMPLATES = [
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(PROJECT_DIR, 'static')
+
+# keep the bundle history and other caches out of the source tree
+SYSTEMJS_CACHE_DIR = tempfile.mkdtemp()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'null': {'class': 'logging.NullHandler'},
+    },
+    'loggers': {
+        # most tests render without a bundle manifest
+        'systemjs.manifest': {'handlers': ['null'], 'propagate': False},
+    },
+}
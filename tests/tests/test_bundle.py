@@ -1,17 +1,23 @@
 from __future__ import unicode_literals
 
+import json
 import mock
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.test import SimpleTestCase, override_settings
 
 from semantic_version import Version
 
-from systemjs.base import System, BundleError
+from systemjs.base import (
+    BundleDaemon, BundleError, System, find_shared_modules, find_vendor_modules
+)
 from .helpers import mock_Popen
 from .test_management import _bundle
 
@@ -178,6 +184,119 @@ class BundleTests(SimpleTestCase):
             system.bundle('app/dummy')
 
 
+@override_settings(STATIC_ROOT=tempfile.mkdtemp())
+class BundleTraceTests(SimpleTestCase):
+    """
+    Test bundling with `bundle-trace.js`, recording the dependency trees.
+    """
+
+    def setUp(self):
+        super(BundleTraceTests, self).setUp()
+        patcher = mock.patch.object(System, 'get_jspm_version', return_value=Version('0.16.3'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT, True)
+
+        self.system = System(minify=True)
+        self.system.collect_traces()
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle_and_trace(self, mock_subproc_popen):
+        tree = {'app/dummy.js': {'name': 'app/dummy.js', 'path': 'app/dummy.js', 'timestamp': 1, 'skip': False}}
+
+        def side_effect(*args, **kwargs):
+            _bundle('app/dummy')
+            return (json.dumps(tree), '')
+        process_mock = mock_Popen(mock_subproc_popen, side_effect=side_effect)
+        process_mock.returncode = 0
+
+        path = self.system.bundle('app/dummy')
+
+        outfile = os.path.join(settings.STATIC_ROOT, path)
+        command = mock_subproc_popen.call_args[0][0]
+        self.assertEqual(command, 'bundle-trace.js --minify app/dummy {}'.format(outfile))
+        self.assertEqual(self.system.traces, {'app/dummy': tree})
+        with open(outfile) as infile:
+            self.assertIn("System.import('app/dummy.js');", infile.read())
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle_and_trace_error(self, mock_subproc_popen):
+        process_mock = mock_Popen(mock_subproc_popen, return_value=('', 'Error: not found'))
+        process_mock.returncode = 1
+
+        with self.assertRaises(BundleError):
+            self.system.bundle('app/dummy')
+        self.assertEqual(self.system.traces, {})
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp())
+class CommonBundleTests(SimpleTestCase):
+
+    def setUp(self):
+        super(CommonBundleTests, self).setUp()
+        patcher = mock.patch.object(System, 'get_jspm_version', return_value=Version('0.16.3'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT, True)
+
+    def test_find_shared_modules(self):
+        trees = {
+            'app/a': {'lib.js': {}, 'a.js': {}, 'gmaps': {'skip': True}},
+            'app/b': {'lib.js': {}, 'b.js': {}, 'gmaps': {'skip': True}},
+            'app/c': {'c.js': {}},
+        }
+        self.assertEqual(find_shared_modules(trees, 2), ['lib.js'])
+        self.assertEqual(find_shared_modules(trees, 3), [])
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle_excluding_shared(self, mock_subproc_popen):
+        process_mock = mock_Popen(mock_subproc_popen, return_value=('', ''))
+        process_mock.communicate.side_effect = lambda: (_bundle('app/dummy'), ('', ''))[1]
+
+        System().bundle('app/dummy', exclude=['lib.js', 'npm:jquery@2.2.0.js'])
+
+        command = mock_subproc_popen.call_args[0][0]
+        outfile = os.path.join(settings.STATIC_ROOT, 'SYSTEMJS', 'app/dummy.js')
+        self.assertEqual(
+            command,
+            "jspm bundle 'app/dummy - [lib.js] - [npm:jquery@2.2.0.js]' {} --log err".format(outfile))
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle_common(self, mock_subproc_popen):
+        mock_Popen(mock_subproc_popen, return_value=('', ''))
+
+        rel_path = System().bundle_common(['lib.js', 'npm:jquery@2.2.0.js'])
+
+        self.assertEqual(rel_path, os.path.join('SYSTEMJS', 'systemjs-common.js'))
+        self.assertEqual(System.get_common_bundle_path(), rel_path)
+        command = mock_subproc_popen.call_args[0][0]
+        self.assertEqual(command, "jspm bundle '[lib.js] + [npm:jquery@2.2.0.js]' {} --log err".format(
+            os.path.join(settings.STATIC_ROOT, rel_path)))
+
+    def test_find_vendor_modules(self):
+        tree = {
+            'app/a.js': {'path': 'app/a.js'},
+            'npm:jquery@2.2.0.js': {'path': 'jspm_packages/npm/jquery@2.2.0.js'},
+            'github:foo/bar@1.0.0.js': {'path': './jspm_packages/github/foo/bar@1.0.0.js'},
+            'gmaps': {'path': None, 'skip': True},
+        }
+        self.assertEqual(
+            find_vendor_modules(tree, 'jspm_packages'),
+            ['github:foo/bar@1.0.0.js', 'npm:jquery@2.2.0.js'])
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle_vendor(self, mock_subproc_popen):
+        mock_Popen(mock_subproc_popen, return_value=('', ''))
+
+        rel_path = System().bundle_vendor('app/dummy', ['npm:jquery@2.2.0.js'])
+
+        self.assertEqual(rel_path, os.path.join('SYSTEMJS', 'app/dummy.vendor.js'))
+        self.assertEqual(System.get_vendor_bundle_path('app/dummy'), rel_path)
+        command = mock_subproc_popen.call_args[0][0]
+        self.assertEqual(command, "jspm bundle '[npm:jquery@2.2.0.js]' {} --log err".format(
+            os.path.join(settings.STATIC_ROOT, rel_path)))
+
+
 class JSPMIntegrationTests(SimpleTestCase):
 
     @mock.patch('subprocess.Popen')
@@ -200,6 +319,51 @@ class JSPMIntegrationTests(SimpleTestCase):
         self.assertEqual(command, 'jspm --version')
         self.assertEqual(process_mock.communicate.call_count, 1)
 
+    @override_settings(SYSTEMJS_JSPM_VERSION='0.16.3')
+    @mock.patch.object(System, 'get_jspm_version')
+    def test_jspm_version_setting(self, mock_version):
+        system = System()
+        self.assertEqual(system.jspm_version, Version('0.16.3'))
+        self.assertFalse(mock_version.called)
+
+    def test_invalid_jspm_version_setting(self):
+        from systemjs.conf import SystemJSConf
+
+        with self.assertRaises(ImproperlyConfigured):
+            SystemJSConf().configure_jspm_version('not-a-version')
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    @mock.patch.object(System, 'get_jspm_version')
+    def test_jspm_version_cached(self, mock_version):
+        """
+        Assert that the detected version is reused by the next runs, until the
+        executable changes.
+        """
+        mock_version.return_value = Version('0.16.3')
+        fd, executable = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, executable)
+
+        self.assertEqual(System(jspm=executable).jspm_version, Version('0.16.3'))
+        self.assertEqual(System(jspm=executable).jspm_version, Version('0.16.3'))
+        self.assertEqual(mock_version.call_count, 1)
+
+        # upgraded jspm
+        mock_version.return_value = Version('0.17.0')
+        stat = os.stat(executable)
+        os.utime(executable, (stat.st_atime, stat.st_mtime + 10))
+        self.assertEqual(System(jspm=executable).jspm_version, Version('0.17.0'))
+        self.assertEqual(mock_version.call_count, 2)
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    @mock.patch.object(System, 'get_jspm_version')
+    def test_jspm_version_not_cached_unknown_executable(self, mock_version):
+        mock_version.return_value = Version('0.16.3')
+        System(jspm='surely-not-an-executable').jspm_version
+        System(jspm='surely-not-an-executable').jspm_version
+        self.assertEqual(mock_version.call_count, 2)
+        self.assertEqual(os.listdir(settings.SYSTEMJS_CACHE_DIR), [])
+
     @mock.patch('subprocess.Popen')
     def test_jspm_version_suprocess_error(self, mock_subproc_popen):
         """
@@ -381,3 +545,144 @@ proident, sunt in culpa qui officia deserunt mollit anim id est laborum.
             js = of.read()
         self.assertEqual(js, "alert('{}')\nSystem.import('app/dummy.js');\n"
                              "//# sourceMappingURL=dummy.js.map".format(lorem))
+
+
+FAKE_DAEMON = """
+import io, json, os, sys
+
+for line in iter(sys.stdin.readline, ''):
+    request = json.loads(line)
+    if request['app'] == 'app/crash':
+        sys.exit(3)
+    error = None
+    if request['app'] == 'app/broken':
+        error = 'Something went wrong'
+    else:
+        if not os.path.isdir(os.path.dirname(request['outfile'])):
+            os.makedirs(os.path.dirname(request['outfile']))
+        with io.open(request['outfile'], 'w') as outfile:
+            outfile.write(u"alert('foo')")
+    trace = {request['app'] + '.js': {'name': request['app'] + '.js', 'path': request['app'] + '.js'}}
+    sys.stdout.write(json.dumps({'id': request['id'], 'error': error, 'trace': trace}) + '\\n')
+    sys.stdout.flush()
+"""
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp(), SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+class BundleDaemonTests(SimpleTestCase):
+    """
+    Test the communication with a long-lived bundle process.
+
+    A small Python script stands in for `bundle-daemon.js`.
+    """
+
+    def setUp(self):
+        super(BundleDaemonTests, self).setUp()
+        fd, script = tempfile.mkstemp(suffix='.py')
+        with os.fdopen(fd, 'w') as outfile:
+            outfile.write(FAKE_DAEMON)
+        self.addCleanup(os.remove, script)
+
+        command = '"{}" "{}"'.format(sys.executable, script)
+        patcher = mock.patch.object(BundleDaemon, 'command', command)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.system = System()
+        self.system.start_daemon()
+        self.addCleanup(self.system.stop_daemon)
+
+    def tearDown(self):
+        super(BundleDaemonTests, self).tearDown()
+        try:
+            shutil.rmtree(settings.STATIC_ROOT)
+        except (OSError, IOError):
+            pass
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle(self, mock_subproc_popen):
+        path = self.system.bundle('app/dummy')
+
+        self.assertEqual(path, os.path.join('SYSTEMJS', 'app/dummy.js'))
+        with open(os.path.join(settings.STATIC_ROOT, path), 'r') as of:
+            js = of.read()
+        self.assertEqual(js, "alert('foo')\nSystem.import('app/dummy.js');\n")
+        # no jspm processes were started
+        self.assertFalse(mock_subproc_popen.called)
+
+    def test_bundle_traces(self):
+        self.system.bundle('app/dummy')
+        self.assertIsNone(self.system.traces)
+
+        self.system.collect_traces()
+        self.system.bundle('app/dummy')
+        self.assertEqual(self.system.traces, {
+            'app/dummy': {'app/dummy.js': {'name': 'app/dummy.js', 'path': 'app/dummy.js'}}
+        })
+
+    def test_bundle_error(self):
+        with self.assertRaises(BundleError) as ctx:
+            self.system.bundle('app/broken')
+        self.assertEqual(ctx.exception.args[0], "Could not bundle 'app/broken': \nSomething went wrong")
+
+        # the daemon is still usable after a failed bundle
+        self.assertEqual(self.system.bundle('app/dummy'), os.path.join('SYSTEMJS', 'app/dummy.js'))
+
+    def test_concurrent_requests(self):
+        apps = ['app/dummy{}'.format(i) for i in range(10)]
+        pool = ThreadPool(4)
+        self.addCleanup(pool.close)
+        paths = pool.map(self.system.bundle, apps)
+        self.assertEqual(paths, [os.path.join('SYSTEMJS', '{}.js'.format(app)) for app in apps])
+
+    def test_stopped(self):
+        daemon = self.system.daemon
+        self.system.stop_daemon()
+        with self.assertRaises(BundleError):
+            daemon.request(app='app/dummy', outfile='dummy.js', options={})
+
+    def test_daemon_died(self):
+        """
+        A daemon that dies fails the pending and later bundles, instead of
+        crashing the run.
+        """
+        with self.assertRaises(BundleError) as ctx:
+            self.system.bundle('app/crash')
+        self.assertIn('exited unexpectedly with exit code 3', ctx.exception.args[0])
+
+        with self.assertRaises(BundleError):
+            self.system.bundle('app/dummy')
+
+    def test_broken_pipe(self):
+        daemon = self.system.daemon
+        with mock.patch.object(daemon.process, 'stdin') as mock_stdin:
+            mock_stdin.write.side_effect = IOError(32, 'Broken pipe')
+            with self.assertRaises(BundleError) as ctx:
+                daemon.request(app='app/dummy', outfile='dummy.js', options={})
+        self.assertIn('Broken pipe', ctx.exception.args[0])
+        self.assertEqual(daemon._pending, {})
+
+        # later requests fail right away
+        with self.assertRaises(BundleError):
+            daemon.request(app='app/dummy', outfile='dummy.js', options={})
+
+    @mock.patch('subprocess.Popen')
+    def test_builder_cache(self, mock_subproc_popen):
+        """
+        Assert that the daemon is told where to keep the Builder cache, per
+        set of bundle options.
+        """
+        mock_subproc_popen.return_value.stdout.readline.return_value = ''
+        system = System()
+        system.start_daemon()
+        system.daemon._reader.join()
+        command = mock_subproc_popen.call_args[0][0]
+        cache_file = System().get_builder_cache_path()
+        self.assertTrue(command.endswith(' --cache {}'.format(cache_file)))
+        self.assertEqual(os.path.dirname(cache_file), settings.SYSTEMJS_CACHE_DIR)
+
+        self.assertNotEqual(System(minify=True).get_builder_cache_path(), cache_file)
+        self.assertEqual(System(minify=False, jspm='jspm').get_builder_cache_path(), cache_file)
+
+        with self.settings(SYSTEMJS_BUILDER_CACHE=False):
+            self.assertIsNone(System().get_builder_cache_path())
@@ -0,0 +1,200 @@
+from __future__ import unicode_literals
+
+import io
+import mock
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from semantic_version import Version
+
+from systemjs.base import System, SystemTracer
+from systemjs.cache import FileSystemArtifactCache, get_artifact_cache, get_cache_key
+from .helpers import mock_Popen
+from .test_management import _bundle
+
+
+def _write(path, content):
+    with io.open(path, 'w') as outfile:
+        outfile.write(content)
+
+
+def _read(path):
+    with io.open(path) as infile:
+        return infile.read()
+
+
+class FileSystemArtifactCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        super(FileSystemArtifactCacheTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+        self.cache = FileSystemArtifactCache(location=os.path.join(self.tmpdir, 'cache'))
+        self.outfile = os.path.join(self.tmpdir, 'out', 'main.js')
+        os.makedirs(os.path.dirname(self.outfile))
+
+    def test_miss(self):
+        self.assertFalse(self.cache.get('abcdef', self.outfile))
+        self.assertFalse(os.path.exists(self.outfile))
+
+    def test_set_get(self):
+        _write(self.outfile, 'alert("foo");')
+        _write(self.outfile + '.map', '{}')
+        self.cache.set('abcdef', self.outfile)
+
+        os.remove(self.outfile)
+        os.remove(self.outfile + '.map')
+        self.assertTrue(self.cache.get('abcdef', self.outfile))
+        self.assertEqual(_read(self.outfile), 'alert("foo");')
+        self.assertEqual(_read(self.outfile + '.map'), '{}')
+
+    def test_get_replaces_outfile(self):
+        _write(self.outfile, 'alert("foo");')
+        self.cache.set('abcdef', self.outfile)
+
+        _write(self.outfile, 'alert("bar");')
+        _write(self.outfile + '.map', '{}')
+        self.assertTrue(self.cache.get('abcdef', self.outfile))
+        self.assertEqual(_read(self.outfile), 'alert("foo");')
+        # the stale sourcemap is not left behind
+        self.assertFalse(os.path.exists(self.outfile + '.map'))
+
+    def test_evict_least_recently_used(self):
+        cache = FileSystemArtifactCache(location=self.cache.location, max_size=25)
+        for key, mtime in (('aaaaaa', 1000), ('bbbbbb', 3000), ('cccccc', 2000)):
+            _write(self.outfile, '0123456789')
+            cache.set(key, self.outfile)
+            os.utime(cache.get_entry_path(key), (mtime, mtime))
+
+        _write(self.outfile, '0123456789')
+        cache.set('dddddd', self.outfile)
+
+        # 40 bytes were stored, the 2 least recently used entries are gone
+        self.assertFalse(os.path.isdir(cache.get_entry_path('aaaaaa')))
+        self.assertFalse(os.path.isdir(cache.get_entry_path('cccccc')))
+        self.assertTrue(os.path.isdir(cache.get_entry_path('bbbbbb')))
+        self.assertTrue(os.path.isdir(cache.get_entry_path('dddddd')))
+
+    def test_size_tracked(self):
+        """
+        The directory is scanned once for the total size, not on every set.
+        """
+        cache = FileSystemArtifactCache(location=self.cache.location, max_size=35)
+        with mock.patch.object(cache, 'get_entries', wraps=cache.get_entries) as mock_get_entries:
+            for key in ('aaaaaa', 'bbbbbb', 'cccccc'):
+                _write(self.outfile, '0123456789')
+                cache.set(key, self.outfile)
+            self.assertEqual(mock_get_entries.call_count, 1)
+            self.assertEqual(cache.get_size(), 30)
+
+            _write(self.outfile, '0123456789')
+            cache.set('dddddd', self.outfile)
+            self.assertEqual(mock_get_entries.call_count, 2)  # evicted
+            self.assertEqual(cache.get_size(), 30)
+
+    @override_settings(SYSTEMJS_ARTIFACT_CACHE=None)
+    def test_disabled(self):
+        self.assertIsNone(get_artifact_cache())
+
+    @override_settings(SYSTEMJS_ARTIFACT_CACHE={
+        'BACKEND': 'systemjs.cache.FileSystemArtifactCache',
+        'OPTIONS': {'location': '/tmp/shared', 'max_size': 100},
+    })
+    def test_configured(self):
+        cache = get_artifact_cache()
+        self.assertIsInstance(cache, FileSystemArtifactCache)
+        self.assertEqual(cache.location, '/tmp/shared')
+        self.assertEqual(cache.max_size, 100)
+
+    def test_cache_key(self):
+        key = get_cache_key('app/main', 'digest', {'minify': False}, Version('0.16.3'))
+        self.assertEqual(key, get_cache_key('app/main', 'digest', {}, Version('0.16.3')))
+        self.assertNotEqual(key, get_cache_key('app/main', 'digest', {'minify': True}, Version('0.16.3')))
+        self.assertNotEqual(key, get_cache_key('app/main', 'other', {}, Version('0.16.3')))
+        self.assertNotEqual(key, get_cache_key('app/main', 'digest', {}, Version('0.17.0')))
+        self.assertNotEqual(key, get_cache_key('app/other', 'digest', {}, Version('0.16.3')))
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp(), SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+class BundleArtifactCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        super(BundleArtifactCacheTests, self).setUp()
+        patcher = mock.patch.object(System, 'get_jspm_version', return_value=Version('0.15.0'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT, True)
+        self.addCleanup(shutil.rmtree, settings.SYSTEMJS_CACHE_DIR, True)
+
+        self.system = System()
+        self.system.artifact_cache = FileSystemArtifactCache()
+
+    @mock.patch('subprocess.Popen')
+    def test_restored_from_cache(self, mock_subproc_popen):
+        def side_effect(*args, **kwargs):
+            _bundle('app/dummy')
+            return ('output', '')
+        mock_Popen(mock_subproc_popen, side_effect=side_effect)
+
+        path = self.system.bundle('app/dummy', cache_key='abcdef')
+        self.assertEqual(mock_subproc_popen.call_count, 1)
+        outfile = os.path.join(settings.STATIC_ROOT, path)
+        content = _read(outfile)
+        self.assertIn("System.import('app/dummy.js');", content)
+
+        os.remove(outfile)
+        self.assertEqual(self.system.bundle('app/dummy', cache_key='abcdef'), path)
+        # no jspm involved, and the import statement is not added twice
+        self.assertEqual(mock_subproc_popen.call_count, 1)
+        self.assertEqual(_read(outfile), content)
+
+        self.system.bundle('app/dummy', cache_key='123456')
+        self.assertEqual(mock_subproc_popen.call_count, 2)
+
+    @mock.patch('subprocess.Popen')
+    def test_rebuild_does_not_modify_cache(self, mock_subproc_popen):
+        """
+        Assert that restored (hardlinked) bundles are not overwritten in place.
+        """
+        def side_effect(*args, **kwargs):
+            _bundle('app/dummy', content='alert("{}")'.format(mock_subproc_popen.call_count))
+            return ('output', '')
+        mock_Popen(mock_subproc_popen, side_effect=side_effect)
+
+        path = self.system.bundle('app/dummy', cache_key='abcdef')
+        self.system.bundle('app/dummy', cache_key='abcdef')
+        self.system.bundle('app/dummy', cache_key='123456')
+        self.assertEqual(mock_subproc_popen.call_count, 2)
+
+        self.system.bundle('app/dummy', cache_key='abcdef')
+        self.assertTrue(_read(os.path.join(settings.STATIC_ROOT, path)).startswith('alert("1")'))
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp())
+class TreeDigestTests(SimpleTestCase):
+
+    def setUp(self):
+        super(TreeDigestTests, self).setUp()
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT, True)
+        os.makedirs(os.path.join(settings.STATIC_ROOT, 'app'))
+        _write(os.path.join(settings.STATIC_ROOT, 'app', 'main.js'), 'alert("foo");')
+        self.tree = {
+            'app/main.js': {'name': 'app/main.js', 'path': 'app/main.js', 'timestamp': 0, 'skip': False},
+            'google-maps': {'name': 'google-maps', 'path': None, 'timestamp': None, 'skip': True},
+        }
+
+    def test_digest_follows_contents(self):
+        digest = SystemTracer().get_tree_digest(self.tree)
+        self.assertEqual(SystemTracer().get_tree_digest(self.tree), digest)
+
+        _write(os.path.join(settings.STATIC_ROOT, 'app', 'main.js'), 'alert("bar");')
+        self.assertNotEqual(SystemTracer().get_tree_digest(self.tree), digest)
+
+    def test_missing_module(self):
+        os.remove(os.path.join(settings.STATIC_ROOT, 'app', 'main.js'))
+        self.assertIsNone(SystemTracer().get_tree_digest(self.tree))
@@ -0,0 +1,54 @@
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from systemjs.history import BundleHistory, estimate_remaining, schedule
+
+
+@override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+class BundleHistoryTests(SimpleTestCase):
+
+    def setUp(self):
+        super(BundleHistoryTests, self).setUp()
+        self.addCleanup(shutil.rmtree, settings.SYSTEMJS_CACHE_DIR, True)
+
+    def test_record_and_load(self):
+        history = BundleHistory()
+        history.record('app/main', 2.5, modules=10, size=1000, input_size=4000)
+        history.save()
+
+        history = BundleHistory()
+        self.assertEqual(history.entries, {
+            'app/main': {'duration': 2.5, 'modules': 10, 'size': 1000, 'input_size': 4000},
+        })
+        # unknown values keep the previous ones
+        history.record('app/main', 3)
+        self.assertEqual(history.entries['app/main']['modules'], 10)
+        self.assertEqual(history.estimate('app/main'), 3)
+
+    def test_estimate_without_history(self):
+        history = BundleHistory()
+        self.assertIsNone(history.estimate('app/new'))
+        self.assertEqual(history.estimate('app/new', modules=100), 100 * history.default_seconds_per_module)
+
+        # the rates are derived from the other apps
+        history.record('app/main', 2, modules=10, input_size=1000)
+        history.record('app/other', 4, modules=30, input_size=3000)
+        self.assertEqual(history.get_rates(), (0.15, 0.0015))
+        self.assertAlmostEqual(history.estimate('app/new', modules=20, input_size=4000), (3 + 6) / 2.0)
+
+    def test_schedule_longest_first(self):
+        estimates = {'a': 1, 'b': 10, 'c': None, 'd': 5}
+        self.assertEqual(schedule(['a', 'b', 'c', 'd'], estimates), ['c', 'b', 'd', 'a'])
+
+    def test_estimate_remaining(self):
+        estimates = {'a': 10, 'b': 4, 'c': 2, 'd': None}
+        self.assertEqual(estimate_remaining(estimates, {'a': 6}, ['b', 'c'], 2), 5)
+        # one long app sets the pace
+        self.assertEqual(estimate_remaining(estimates, {'a': 0}, ['c'], 4), 10)
+        self.assertEqual(estimate_remaining(estimates, {}, [], 2), 0)
+        self.assertIsNone(estimate_remaining(estimates, {}, ['d'], 2))
@@ -0,0 +1,19 @@
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase
+
+from tests.bench_import import get_imported_modules
+
+
+class TemplateTagImportTests(SimpleTestCase):
+    """
+    Web workers load the template tag library, but never bundle.
+    """
+
+    def test_bundling_machinery_not_imported(self):
+        modules = get_imported_modules()
+
+        self.assertIn('systemjs.templatetags.system_tags', modules)
+        for module in ('systemjs.base', 'systemjs.jspm', 'systemjs.cache', 'systemjs.resources',
+                       'semantic_version', 'subprocess', 'multiprocessing'):
+            self.assertNotIn(module, modules)
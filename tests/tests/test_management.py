@@ -18,6 +18,11 @@ from django.test import SimpleTestCase, override_settings
 
 from semantic_version import Version
 
+from systemjs.base import BundleError
+from systemjs.history import BundleHistory
+from systemjs.management.commands._mixins import TemplateDiscoveryMixin
+from systemjs.management.commands.systemjs_show_packages import Command as ShowPackagesCommand
+from systemjs.manifest import BundleManifest
 from .helpers import add_tpl_dir
 
 
@@ -219,6 +224,98 @@ class ManagementCommandTests(MockFindSystemJSLocation, ClearStaticMixin, SimpleT
         self.assertEqual(bundle_mock.call_count, 1)
         self.assertEqual(bundle_mock.call_args, mock.call('app/dummy'))
 
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    def test_jobs_option(self, bundle_mock):
+        """
+        Test that bundling in parallel bundles every app, with stable output.
+        """
+        bundle_mock.side_effect = _bundle
+
+        self.assertEqual(_num_files(settings.STATIC_ROOT), 0)
+        call_command('systemjs_bundle', '--jobs', '2', stdout=self.out, stderr=self.err)
+        self.assertEqual(_num_files(settings.STATIC_ROOT), 2)
+
+        self.assertEqual(bundle_mock.call_count, 2)
+        self.assertEqual(
+            sorted(bundle_mock.call_args_list),
+            [mock.call('app/dummy'), mock.call('dummy2')]
+        )
+        self.out.seek(0)
+        self.assertEqual(self.out.read(), (
+            'Bundled app/dummy into SYSTEMJS/app/dummy.js\n'
+            'Bundled dummy2 into SYSTEMJS/dummy2.js\n'
+        ))
+
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    def test_longest_first(self, bundle_mock):
+        """
+        Test that the apps that took longest in previous runs are bundled first.
+        """
+        bundle_mock.side_effect = _bundle
+        history = BundleHistory()
+        history.record('app/dummy', 1)
+        history.record('dummy2', 10)
+        history.save()
+
+        call_command('systemjs_bundle', stdout=self.out, stderr=self.err)
+
+        self.assertEqual(bundle_mock.call_args_list, [mock.call('dummy2'), mock.call('app/dummy')])
+        self.out.seek(0)
+        output = self.out.read()
+        self.assertIn('[1/2] dummy2 took', output)
+        self.assertIn('about 1s remaining', output)
+        # the results are reported in a stable order
+        self.assertLess(output.index('Bundled app/dummy'), output.index('Bundled dummy2'))
+
+        # the durations of this run are recorded, with the bundle size
+        entries = BundleHistory().entries
+        self.assertLess(entries['dummy2']['duration'], 10)
+        self.assertEqual(entries['dummy2']['size'], os.path.getsize(
+            os.path.join(settings.STATIC_ROOT, 'SYSTEMJS', 'dummy2.js')))
+
+    def test_report(self, bundle_mock):
+        bundle_mock.side_effect = _bundle
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        report_path = os.path.join(tmpdir, 'report.json')
+        prometheus_path = os.path.join(tmpdir, 'systemjs.prom')
+
+        call_command('systemjs_bundle', '--report', report_path, '--prometheus', prometheus_path,
+                     stdout=self.out, stderr=self.err)
+
+        with open(report_path) as infile:
+            report = json.load(infile)
+        app = report['apps']['app/dummy']
+        self.assertEqual(app['status'], 'bundled')
+        self.assertEqual(app['path'], 'SYSTEMJS/app/dummy.js')
+        self.assertEqual(app['bytes'], os.path.getsize(
+            os.path.join(settings.STATIC_ROOT, 'SYSTEMJS', 'app', 'dummy.js')))
+        self.assertGreater(app['gzip_bytes'], 0)
+        self.assertIsNotNone(app['bundle_time'])
+        with open(prometheus_path) as infile:
+            self.assertIn('systemjs_bundle_status{app="app/dummy",status="bundled"} 1', infile.read())
+
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    def test_jobs_error_collected(self, bundle_mock):
+        """
+        Test that a failing app does not prevent the other apps from being bundled.
+        """
+        def side_effect(app):
+            if app == 'app/dummy':
+                raise BundleError('jspm failed')
+            return _bundle(app)
+
+        bundle_mock.side_effect = side_effect
+
+        with self.assertRaises(CommandError):
+            call_command('systemjs_bundle', '--jobs', '2', stdout=self.out, stderr=self.err)
+
+        self.assertEqual(bundle_mock.call_count, 2)
+        self.assertEqual(_num_files(settings.STATIC_ROOT), 1)
+        self.err.seek(0)
+        self.assertEqual(self.err.read(), 'Could not bundle app/dummy: jspm failed\n')
+
     @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
     @mock.patch('systemjs.base.SystemTracer.trace')
     def test_minimal_bundle(self, trace_mock, bundle_mock):
@@ -287,6 +384,356 @@ class ManagementCommandTests(MockFindSystemJSLocation, ClearStaticMixin, SimpleT
         # no new bundles should have been created
         self.assertEqual(bundle_mock.call_count, 1)
 
+    def _create_bundle(self):
+        dirs = os.path.join(settings.STATIC_ROOT, 'SYSTEMJS', 'app')
+        os.makedirs(dirs)
+        with open(os.path.join(dirs, 'dummy.js'), 'w') as bundle:
+            bundle.write('I am bundle')
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    @mock.patch('systemjs.base.SystemTracer.trace')
+    def test_plan(self, trace_mock, bundle_mock):
+        """
+        Assert that --plan reports the changed files without tracing or bundling.
+        """
+        self._create_deps_json()
+        self._create_bundle()
+        call_command('collectstatic', link=True, interactive=False, stdout=self.out, sterr=self.err)
+        self.out = StringIO()
+
+        call_command('systemjs_bundle', '--minimal', '--plan', '--json', stdout=self.out, stderr=self.err)
+
+        self.assertFalse(bundle_mock.called)
+        self.assertFalse(trace_mock.called)
+        self.out.seek(0)
+        plan = json.loads(self.out.read())
+        self.assertEqual(plan['to_bundle'], 1)
+        app = plan['apps'][0]
+        self.assertEqual(app['app'], 'app/dummy')
+        self.assertEqual(app['status'], 'changed')
+        self.assertTrue(app['bundle'])
+        # the modification time in the depcache is off
+        self.assertEqual(app['changed_files'][0], 'app/dummy.js')
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    def test_plan_statuses(self, bundle_mock):
+        call_command('systemjs_bundle', '--minimal', '--plan', stdout=self.out, stderr=self.err)
+        self.out.seek(0)
+        self.assertEqual(self.out.read(), 'app/dummy: new\n1 of 1 apps to bundle\n')
+
+        self._create_deps_json()
+        self.out = StringIO()
+        call_command('systemjs_bundle', '--minimal', '--plan', stdout=self.out, stderr=self.err)
+        self.out.seek(0)
+        self.assertEqual(self.out.read(), (
+            'app/dummy: missing\n'
+            '1 of 1 apps to bundle, estimated 0.0s with 1 jobs\n'
+        ))
+
+        self._create_bundle()
+        self.out = StringIO()
+        call_command('systemjs_bundle', '--minimal', '--sfx', '--plan', stdout=self.out, stderr=self.err)
+        self.out.seek(0)
+        self.assertEqual(self.out.read().splitlines()[0], 'app/dummy: options-changed')
+
+        self.out = StringIO()
+        with mock.patch('systemjs.base.SystemTracer.stats_unchanged', return_value=True):
+            call_command('systemjs_bundle', '--minimal', '--plan', stdout=self.out, stderr=self.err)
+        self.out.seek(0)
+        self.assertEqual(self.out.read(), 'app/dummy: up-to-date\n0 of 1 apps to bundle\n')
+        self.assertFalse(bundle_mock.called)
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    @mock.patch('systemjs.base.SystemTracer.trace')
+    def test_changed_files(self, trace_mock, bundle_mock):
+        """
+        Assert that only the apps using the changed files are rebundled.
+        """
+        bundle_mock.side_effect = _bundle
+        trace_mock.return_value = {
+            'app/dummy.js': {
+                'name': 'app/dummy.js',
+                'timestamp': self.now,
+                'path': 'app/dummy.js',
+            }
+        }
+        self._create_deps_json(options={
+            'minimal': False, 'sfx': False, 'minify': False, 'skip_source_maps': False
+        })
+        call_command('collectstatic', link=True, interactive=False, stdout=self.out, sterr=self.err)
+
+        call_command('systemjs_bundle', '--changed-files', 'app/unknown.js', stdout=self.out, stderr=self.err)
+        self.assertEqual(bundle_mock.call_count, 0)
+        self.assertEqual(trace_mock.call_count, 0)
+
+        call_command('systemjs_bundle', '--changed-files', 'app/unknown.js', 'app/dummy.js',
+                     stdout=self.out, stderr=self.err)
+        self.assertEqual(bundle_mock.call_count, 1)
+        self.assertEqual(bundle_mock.call_args, mock.call('app/dummy'))
+        # the dependencies of the rebundled app are refreshed
+        trace_mock.assert_called_once_with('app/dummy')
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    @mock.patch('systemjs.base.SystemTracer.trace')
+    def test_changed_files_stdin(self, trace_mock, bundle_mock):
+        bundle_mock.side_effect = _bundle
+        trace_mock.return_value = {}
+        self._create_deps_json(options={
+            'minimal': False, 'sfx': False, 'minify': False, 'skip_source_maps': False
+        })
+        call_command('collectstatic', link=True, interactive=False, stdout=self.out, sterr=self.err)
+
+        stdin = StringIO('app/unknown.js\napp/dummy.js\n')
+        call_command('systemjs_bundle', '--changed-files', '-', stdin=stdin, stdout=self.out, stderr=self.err)
+        self.assertEqual(bundle_mock.call_count, 1)
+        self.assertEqual(bundle_mock.call_args, mock.call('app/dummy'))
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    def test_changed_files_different_options(self, bundle_mock):
+        self._create_deps_json()  # written with --minimal
+        with self.assertRaises(CommandError) as ctx:
+            call_command('systemjs_bundle', '--changed-files', 'app/dummy.js', stdout=self.out, stderr=self.err)
+        self.assertIn('--minimal (depcache: True, now: False)', str(ctx.exception))
+        self.assertEqual(bundle_mock.call_count, 0)
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    def test_changed_files_no_depcache(self, bundle_mock):
+        with self.assertRaises(CommandError):
+            call_command('systemjs_bundle', '--changed-files', 'app/dummy.js', stdout=self.out, stderr=self.err)
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp(), SYSTEMJS_ARTIFACT_CACHE={
+        'BACKEND': 'systemjs.cache.FileSystemArtifactCache'})
+    @mock.patch('systemjs.base.System.get_jspm_version')
+    @mock.patch('systemjs.base.SystemTracer.trace')
+    def test_minimal_bundle_artifact_cache(self, trace_mock, version_mock, bundle_mock):
+        """
+        Assert that the bundles are looked up in the artifact cache by their contents.
+        """
+        bundle_mock.side_effect = _bundle
+        version_mock.return_value = Version('0.16.3')
+        trace_mock.return_value = {
+            'app/dummy.js': {
+                'name': 'app/dummy.js',
+                'timestamp': self.now,
+                'path': 'app/dummy.js',
+            }
+        }
+        self._create_deps_json()
+        call_command('collectstatic', link=True, interactive=False, stdout=self.out, sterr=self.err)
+        call_command('systemjs_bundle', '--minimal', stdout=self.out, stderr=self.err)
+
+        self.assertEqual(bundle_mock.call_count, 1)
+        cache_key = bundle_mock.call_args[1]['cache_key']
+        self.assertEqual(len(cache_key), 40)
+
+    @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+    @mock.patch('systemjs.management.commands.systemjs_bundle.get_watcher')
+    @mock.patch('systemjs.base.SystemTracer.trace')
+    def test_watch(self, trace_mock, get_watcher_mock, bundle_mock):
+        """
+        Assert that the apps using changed files are rebundled while watching.
+        """
+        bundle_mock.side_effect = _bundle
+        trace_mock.return_value = {
+            'app/dummy.js': {
+                'name': 'app/dummy.js',
+                'timestamp': self.now,
+                'path': 'app/dummy.js',
+            }
+        }
+        self._create_deps_json()
+        call_command('collectstatic', link=True, interactive=False, stdout=self.out, sterr=self.err)
+
+        changed = os.path.join(settings.STATIC_ROOT, 'app', 'dummy.js')
+        watcher = get_watcher_mock.return_value
+        watcher.changes.return_value = iter([{os.path.join(settings.STATIC_ROOT, 'app', 'unknown.js')}, {changed}])
+
+        call_command('systemjs_bundle', '--watch', stdout=self.out, stderr=self.err)
+
+        # the initial bundle, and the rebundle after the change
+        self.assertEqual(bundle_mock.call_count, 2)
+        self.assertEqual(bundle_mock.call_args, mock.call('app/dummy'))
+        self.assertIn(changed, get_watcher_mock.call_args[0][0])
+        self.assertEqual(watcher.set_paths.call_count, 2)
+        watcher.close.assert_called_once_with()
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp(), SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+class BundleTracesTests(MockFindSystemJSLocation, ClearStaticMixin, SimpleTestCase):
+    """
+    Test that the dependency trees recorded while bundling are used.
+    """
+
+    def setUp(self):
+        super(BundleTracesTests, self).setUp()
+        self.out = StringIO()
+        self.err = StringIO()
+        self._clear_static()
+
+        now = int(time.time())
+        self.tree = {
+            'app/dummy.js': {'name': 'app/dummy.js', 'timestamp': now, 'path': 'app/dummy.js'},
+            'app/dependency.js': {'name': 'app/dependency.js', 'timestamp': now, 'path': 'app/dependency.js'},
+        }
+
+    @mock.patch('subprocess.Popen')
+    def test_changed_files(self, mock_subproc_popen):
+        def bundle_and_trace(system, app, **kwargs):
+            system.traces[app] = self.tree
+            return _bundle(app)
+
+        with open(os.path.join(settings.SYSTEMJS_CACHE_DIR, 'deps.json'), 'w') as outfile:
+            json.dump({
+                'version': 2,
+                'packages': {'app/dummy': {'app/dummy.js': self.tree['app/dummy.js']}},
+                'index': {'app/dummy.js': ['app/dummy']},
+                'hashes': {},
+                'options': {'minimal': False, 'sfx': False, 'minify': False, 'skip_source_maps': False},
+            }, outfile)
+        call_command('collectstatic', link=True, interactive=False, stdout=self.out, sterr=self.err)
+
+        with mock.patch('systemjs.base.System.bundle', autospec=True, side_effect=bundle_and_trace):
+            call_command('systemjs_bundle', '--changed-files', 'app/dummy.js', stdout=self.out, stderr=self.err)
+
+        # the tree recorded while bundling is stored, no separate trace needed
+        self.assertFalse(mock_subproc_popen.called)
+        with open(os.path.join(settings.SYSTEMJS_CACHE_DIR, 'deps.json')) as infile:
+            deps = json.load(infile)
+        self.assertEqual(deps['packages']['app/dummy'], self.tree)
+        self.assertEqual(deps['index']['app/dependency.js'], ['app/dummy'])
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp())
+@mock.patch('systemjs.base.System.bundle_common')
+@mock.patch('systemjs.base.System.bundle')
+class CommonBundleTests(MockFindSystemJSLocation, ClearStaticMixin, SimpleTestCase):
+
+    def setUp(self):
+        super(CommonBundleTests, self).setUp()
+        self.out = StringIO()
+        self.err = StringIO()
+        self._clear_static()
+
+        patcher = mock.patch('systemjs.base.SystemTracer.trace_many')
+        trace_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        trace_mock.return_value = {
+            'app/dummy': {'app/dummy.js': {}, 'lib.js': {}},
+            'dummy2': {'dummy2.js': {}, 'lib.js': {}},
+        }
+
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    def test_common_bundle(self, bundle_mock, bundle_common_mock):
+        bundle_mock.side_effect = _bundle
+        bundle_common_mock.side_effect = lambda modules: _bundle('systemjs-common')
+
+        call_command('systemjs_bundle', '--common', '2', stdout=self.out, stderr=self.err)
+
+        bundle_common_mock.assert_called_once_with(['lib.js'])
+        self.assertEqual(bundle_mock.call_count, 2)
+        bundle_mock.assert_any_call('app/dummy', exclude=['lib.js'])
+        bundle_mock.assert_any_call('dummy2', exclude=['lib.js'])
+
+        common_path = os.path.join(settings.SYSTEMJS_OUTPUT_DIR, 'systemjs-common.js')
+        manifest = BundleManifest.load()
+        self.assertEqual(manifest.get_preloads('app/dummy'), [common_path])
+        self.assertEqual(manifest.get_preloads('dummy2'), [common_path])
+
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    def test_common_bundle_failed(self, bundle_mock, bundle_common_mock):
+        bundle_mock.side_effect = _bundle
+        bundle_common_mock.side_effect = BundleError('Bundle error')
+
+        with self.assertRaises(CommandError) as ctx:
+            call_command('systemjs_bundle', '--common', '2', stdout=self.out, stderr=self.err)
+        self.assertIn('common bundle', str(ctx.exception))
+
+        # the apps don't rely on the missing common bundle
+        bundle_mock.assert_any_call('app/dummy')
+        bundle_mock.assert_any_call('dummy2')
+        self.assertEqual(BundleManifest.load().get_preloads('app/dummy'), [])
+        self.assertFalse(os.path.exists(BundleManifest.get_path()))
+
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    def test_no_shared_modules(self, bundle_mock, bundle_common_mock):
+        bundle_mock.side_effect = _bundle
+        BundleManifest(preloads={'app/dummy': ['SYSTEMJS/systemjs-common.js']}).save()
+
+        call_command('systemjs_bundle', '--common', '3', stdout=self.out, stderr=self.err)
+
+        self.assertFalse(bundle_common_mock.called)
+        bundle_mock.assert_any_call('app/dummy')
+        # the previous manifest is gone
+        self.assertFalse(os.path.exists(BundleManifest.get_path()))
+
+    def test_incompatible_options(self, bundle_mock, bundle_common_mock):
+        with self.assertRaises(CommandError):
+            call_command('systemjs_bundle', '--common', '2', '--sfx', stdout=self.out, stderr=self.err)
+        with self.assertRaises(CommandError):
+            call_command('systemjs_bundle', '--common', '1', stdout=self.out, stderr=self.err)
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp())
+@mock.patch('systemjs.base.System.bundle_vendor')
+@mock.patch('systemjs.base.System.bundle')
+class VendorBundleTests(MockFindSystemJSLocation, ClearStaticMixin, SimpleTestCase):
+
+    def setUp(self):
+        super(VendorBundleTests, self).setUp()
+        self.out = StringIO()
+        self.err = StringIO()
+        self._clear_static()
+
+        patcher = mock.patch('systemjs.base.SystemTracer.trace_many')
+        trace_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        trace_mock.return_value = {
+            'app/dummy': {
+                'app/dummy.js': {'path': 'app/dummy.js'},
+                'npm:jquery@2.2.0.js': {'path': 'jspm_packages/npm/jquery@2.2.0.js'},
+            },
+            'dummy2': {'dummy2.js': {'path': 'dummy2.js'}},
+        }
+
+        patcher = mock.patch('systemjs.base.SystemTracer.get_tree_digest', return_value='digest')
+        self.digest_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch(
+            'systemjs.management.commands.systemjs_bundle.find_jspm_packages_prefix',
+            return_value='jspm_packages')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @add_tpl_dir(os.path.join(os.path.dirname(__file__), 'templates2'))
+    def test_vendor_bundle(self, bundle_mock, bundle_vendor_mock):
+        bundle_mock.side_effect = _bundle
+        bundle_vendor_mock.side_effect = lambda app, modules: _bundle('app/dummy.vendor')
+
+        call_command('systemjs_bundle', '--vendor', stdout=self.out, stderr=self.err)
+
+        bundle_vendor_mock.assert_called_once_with('app/dummy', ['npm:jquery@2.2.0.js'])
+        bundle_mock.assert_any_call('app/dummy', exclude=['npm:jquery@2.2.0.js'])
+        bundle_mock.assert_any_call('dummy2')
+
+        vendor_path = os.path.join(settings.SYSTEMJS_OUTPUT_DIR, 'app/dummy.vendor.js')
+        manifest = BundleManifest.load()
+        self.assertEqual(manifest.get_preloads('app/dummy'), [vendor_path])
+        self.assertEqual(manifest.get_preloads('dummy2'), [])
+
+        # the vendor modules did not change, the vendor bundle is kept
+        call_command('systemjs_bundle', '--vendor', stdout=self.out, stderr=self.err)
+        self.assertEqual(bundle_vendor_mock.call_count, 1)
+        self.assertEqual(BundleManifest.load().get_preloads('app/dummy'), [vendor_path])
+
+        self.digest_mock.return_value = 'other'
+        call_command('systemjs_bundle', '--vendor', stdout=self.out, stderr=self.err)
+        self.assertEqual(bundle_vendor_mock.call_count, 2)
+
+    def test_incompatible_options(self, bundle_mock, bundle_vendor_mock):
+        with self.assertRaises(CommandError):
+            call_command('systemjs_bundle', '--vendor', '--sfx', stdout=self.out, stderr=self.err)
+
 
 @override_settings(STATIC_ROOT=tempfile.mkdtemp())
 class FailedBundleTests(MockFindSystemJSLocation, ClearStaticMixin, SimpleTestCase):
@@ -512,6 +959,57 @@ class ShowPackagesTests(SimpleTestCase):
         self.assertIn('base.html', output)
         self.assertIn('app/dummy', output)
 
+    def test_json(self):
+        stdout = StringIO()
+        call_command('systemjs_show_packages', json=True, stdout=stdout)
+        output = json.loads(stdout.getvalue())
+        self.assertIn('app/dummy', output['apps'])
+        self.assertEqual(len(output['apps']), len(set(output['apps'])))
+        self.assertIn('app/dummy', output['templates']['base.html'])
+
+
+class TemplateDiscoveryTests(SimpleTestCase):
+
+    def setUp(self):
+        super(TemplateDiscoveryTests, self).setUp()
+        self.tpl_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tpl_dir)
+        for i in range(40):
+            with io.open(os.path.join(self.tpl_dir, 'page{:02d}.html'.format(i)), 'w') as outfile:
+                if i % 3:
+                    outfile.write("{{% load system_tags %}}{{% systemjs_import 'app/page{}' %}}".format(i))
+                else:
+                    outfile.write("<p>{{ nothing }}</p>")
+        settings_patcher = add_tpl_dir(self.tpl_dir)
+        settings_patcher.enable()
+        self.addCleanup(settings_patcher.disable)
+
+    def find_apps(self, jobs, threshold=0):
+        command = ShowPackagesCommand()
+        command.parallel_scan_threshold = threshold
+        TemplateDiscoveryMixin.handle(command, jobs=jobs)  # only the discovery options
+        return command.find_apps()
+
+    def test_parallel_scan(self):
+        serial = self.find_apps(jobs=1)
+        parallel = self.find_apps(jobs=3)
+
+        self.assertEqual(list(parallel.items()), list(serial.items()))
+        self.assertEqual(serial['page01.html'], ['app/page1'])
+        self.assertNotIn('page03.html', serial)
+        self.assertIn('base.html', serial)
+
+    @mock.patch('systemjs.management.commands._mixins.multiprocessing.Pool')
+    def test_few_templates_scanned_serially(self, mock_pool):
+        self.find_apps(jobs=4, threshold=500)
+        self.assertFalse(mock_pool.called)
+
+    def test_jobs_option(self):
+        stdout = StringIO()
+        with mock.patch.object(TemplateDiscoveryMixin, 'parallel_scan_threshold', 0):
+            call_command('systemjs_show_packages', jobs=2, stdout=stdout)
+        self.assertIn('app/page1', stdout.getvalue())
+
 
 class WriteDepCachesTests(SimpleTestCase):
 
@@ -4,14 +4,20 @@ relevant information.
 """
 from __future__ import unicode_literals
 
+import json
 import mock
 import os
+import shutil
+import tempfile
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.test import SimpleTestCase, override_settings
 
-from systemjs.jspm import find_systemjs_location, locate_package_json, parse_package_json
+from systemjs.jspm import (
+    find_config_files, find_jspm_packages_prefix, find_systemjs_location, locate_package_json,
+    parse_package_json
+)
 
 
 overridden_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'files'))
@@ -86,6 +92,15 @@ class PackageJsonTests(SimpleTestCase):
         expected_location = os.path.join(settings.STATIC_ROOT, 'jspm_packages', 'system.js')
         self.assertEqual(location, expected_location)
 
+    @override_settings(STATIC_ROOT=os.path.join(overridden_path, 'static'))
+    @mock.patch('systemjs.jspm.locate_package_json')
+    def test_jspm_packages_prefix(self, mock):
+        mock.return_value = nested
+        self.assertEqual(find_jspm_packages_prefix(), 'jspm')
+
+        mock.return_value = simple
+        self.assertEqual(find_jspm_packages_prefix(), 'jspm_packages')
+
     @mock.patch('systemjs.jspm.parse_package_json')
     def test_invalid_package_json(self, mock):
         mock.return_value = 'I am invalid'
@@ -113,3 +128,40 @@ class PackageJsonTests(SimpleTestCase):
     def test_invalid_systemjs_package_json_dir_setting(self):
         with self.assertRaises(ImproperlyConfigured):
             locate_package_json()
+
+
+class ConfigFilesTests(SimpleTestCase):
+
+    def setUp(self):
+        super(ConfigFilesTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _write(self, name, content=''):
+        with open(os.path.join(self.tmpdir, name), 'w') as outfile:
+            outfile.write(content)
+        return os.path.join(self.tmpdir, name)
+
+    def test_jspm_017_config_files(self):
+        package_json = self._write('package.json', json.dumps({
+            'jspm': {
+                'configFiles': {
+                    'jspm': 'jspm.config.js',
+                    'jspm:browser': 'jspm.browser.js',
+                    'jspm:dev': 'jspm.dev.js',
+                }
+            }
+        }))
+        config = self._write('jspm.config.js')
+        browser = self._write('jspm.browser.js')
+
+        with self.settings(SYSTEMJS_PACKAGE_JSON_DIR=self.tmpdir):
+            # jspm.dev.js does not exist
+            self.assertEqual(find_config_files(), [package_json, browser, config])
+
+    def test_default_config_files(self):
+        package_json = self._write('package.json', '{invalid json')
+        config = self._write('config.js')
+
+        with self.settings(SYSTEMJS_PACKAGE_JSON_DIR=self.tmpdir):
+            self.assertEqual(find_config_files(), [package_json, config])
@@ -0,0 +1,77 @@
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from systemjs.report import BuildReport, get_gzip_size
+
+
+class BuildReportTests(SimpleTestCase):
+
+    def setUp(self):
+        super(BuildReportTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+        self.storage = FileSystemStorage(self.tmpdir)
+        with io.open(os.path.join(self.tmpdir, 'main.js'), 'w') as outfile:
+            outfile.write('alert("foo");\n' * 100)
+
+        self.report = BuildReport(options={'minify': True})
+        self.report.add_bundle('app/main', 'main.js', 1.23456)
+        self.report.add_post_process_time('main.js', 0.5)
+        self.report.add_post_process_time('other.js', 0.5)
+        self.report.add_time('app/main', 'trace_time', 0.25)
+        self.report.skip('app/other', 'up-to-date')
+        self.report.add_failure('app/broken', 'jspm failed', 0.1)
+        self.report.add_sizes(self.storage, {'app/main': (3, 1000)})
+        self.report.finish()
+
+    def test_gzip_size(self):
+        path = os.path.join(self.tmpdir, 'main.js')
+        size = get_gzip_size(path)
+        self.assertGreater(size, 0)
+        self.assertLess(size, os.path.getsize(path))
+        # stable, the gzip header has no timestamp
+        self.assertEqual(get_gzip_size(path), size)
+
+    def test_json(self):
+        path = os.path.join(self.tmpdir, 'reports', 'report.json')
+        self.report.write_json(path)
+        with io.open(path) as infile:
+            data = json.load(infile)
+
+        self.assertEqual(data['version'], 1)
+        self.assertEqual(data['options'], {'minify': True})
+        self.assertEqual(data['apps']['app/main'], {
+            'status': 'bundled',
+            'reason': None,
+            'cache_hit': False,
+            'path': 'main.js',
+            'trace_time': 0.25,
+            'bundle_time': 1.235,
+            'post_process_time': 0.5,
+            'modules': 3,
+            'bytes': 1400,
+            'gzip_bytes': get_gzip_size(os.path.join(self.tmpdir, 'main.js')),
+        })
+        self.assertEqual(data['apps']['app/other']['status'], 'skipped')
+        self.assertEqual(data['apps']['app/other']['reason'], 'up-to-date')
+        self.assertEqual(data['apps']['app/broken']['status'], 'failed')
+        self.assertEqual(data['apps']['app/broken']['reason'], 'jspm failed')
+
+    def test_prometheus(self):
+        output = self.report.format_prometheus()
+        self.assertIn('# TYPE systemjs_bundle_duration_seconds gauge\n', output)
+        self.assertIn('systemjs_bundle_duration_seconds{app="app/main"} 1.235\n', output)
+        self.assertIn('systemjs_bundle_size_bytes{app="app/main"} 1400\n', output)
+        self.assertIn('systemjs_bundle_status{app="app/other",status="skipped"} 1\n', output)
+        self.assertIn('systemjs_build_duration_seconds ', output)
+        # unknown values are left out
+        self.assertNotIn('systemjs_bundle_size_bytes{app="app/other"}', output)
@@ -0,0 +1,108 @@
+from __future__ import unicode_literals
+
+import mock
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from semantic_version import Version
+
+from systemjs.base import System
+from systemjs.resources import ResourceGovernor, get_governor
+from .helpers import mock_Popen
+
+
+class ResourceGovernorTests(SimpleTestCase):
+
+    def _run_concurrently(self, governor, count=4):
+        """
+        Run `count` fake processes and return the maximum number running at
+        the same time.
+        """
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def run(i):
+            with governor.process():
+                with lock:
+                    state['running'] += 1
+                    state['max'] = max(state['max'], state['running'])
+                time.sleep(0.02)
+                with lock:
+                    state['running'] -= 1
+
+        pool = ThreadPool(count)
+        try:
+            pool.map(run, range(count))
+        finally:
+            pool.close()
+            pool.join()
+        return state['max']
+
+    def test_max_processes(self):
+        self.assertEqual(self._run_concurrently(ResourceGovernor(max_processes=2)), 2)
+
+    @mock.patch('systemjs.resources.get_available_memory')
+    def test_low_memory(self, mock_memory):
+        governor = ResourceGovernor(process_memory=1024)
+        governor.poll_interval = 0.01
+
+        mock_memory.return_value = 512 * 1024 * 1024
+        self.assertEqual(self._run_concurrently(governor), 1)
+
+        mock_memory.return_value = 4096 * 1024 * 1024
+        self.assertEqual(self._run_concurrently(governor), 4)
+
+        # unknown, e.g. not on Linux
+        mock_memory.return_value = None
+        self.assertTrue(governor.has_memory())
+
+    @mock.patch('systemjs.resources.which', return_value='/usr/bin/nice')
+    def test_wrap_command(self, mock_which):
+        self.assertEqual(ResourceGovernor().wrap_command('jspm bundle app'), 'jspm bundle app')
+        self.assertEqual(
+            ResourceGovernor(nice=10, ionice='idle').wrap_command('jspm bundle app'),
+            'nice -n 10 ionice -c 3 jspm bundle app')
+
+        mock_which.return_value = None
+        self.assertEqual(ResourceGovernor(ionice='idle').wrap_command('jspm bundle app'), 'jspm bundle app')
+
+    def test_node_options(self):
+        self.assertIsNone(ResourceGovernor().get_env())
+
+        env = ResourceGovernor(max_old_space_size=2048).get_env({'NODE_OPTIONS': '--no-deprecation'})
+        self.assertEqual(env['NODE_OPTIONS'], '--no-deprecation --max-old-space-size=2048')
+
+    @override_settings(SYSTEMJS_MAX_PROCESSES=3, SYSTEMJS_PROCESS_NICE=5)
+    def test_settings(self):
+        governor = get_governor()
+        self.assertIs(get_governor(), governor)
+        self.assertEqual(governor.max_processes, 3)
+        self.assertEqual(governor.nice, 5)
+
+        with self.settings(SYSTEMJS_MAX_PROCESSES=1):
+            self.assertEqual(get_governor().max_processes, 1)
+
+    def test_invalid_ionice_setting(self):
+        from systemjs.conf import SystemJSConf
+
+        with self.assertRaises(ImproperlyConfigured):
+            SystemJSConf().configure_process_ionice('realtime')
+
+    @override_settings(SYSTEMJS_PROCESS_NICE=10, SYSTEMJS_NODE_MAX_OLD_SPACE_SIZE=1024)
+    @mock.patch('systemjs.resources.which', return_value='/usr/bin/nice')
+    @mock.patch('subprocess.Popen')
+    def test_bundle_command(self, mock_subproc_popen, mock_which):
+        mock_Popen(mock_subproc_popen, return_value=('', ''))
+        system = System(sfx=True)
+        system.version = Version('0.15.0')
+
+        system.bundle('app/dummy')
+
+        command = mock_subproc_popen.call_args[0][0]
+        self.assertTrue(command.startswith('nice -n 10 jspm bundle-sfx app/dummy '))
+        env = mock_subproc_popen.call_args[1]['env']
+        self.assertIn('--max-old-space-size=1024', env['NODE_OPTIONS'])
@@ -0,0 +1,134 @@
+from __future__ import unicode_literals
+
+import json
+import mock
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.template import Context, engines
+from django.test import SimpleTestCase, override_settings
+
+from semantic_version import Version
+
+from systemjs import signals
+from systemjs.base import BundleError, System, SystemBundle, SystemTracer
+from systemjs.cache import FileSystemArtifactCache
+from systemjs.templatetags.system_tags import SystemImportNode
+from .helpers import mock_Popen
+from .test_management import _bundle
+
+
+class SignalsMixin(object):
+
+    def connect(self, signal):
+        """
+        Connect a receiver recording the calls, and return the calls.
+        """
+        calls = []
+
+        def receiver(**kwargs):
+            calls.append(kwargs)
+
+        signal.connect(receiver, weak=False)
+        self.addCleanup(signal.disconnect, receiver)
+        return calls
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp(), SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
+class BundleSignalsTests(SignalsMixin, SimpleTestCase):
+
+    def setUp(self):
+        super(BundleSignalsTests, self).setUp()
+        patcher = mock.patch.object(System, 'get_jspm_version', return_value=Version('0.15.0'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT, True)
+        self.addCleanup(shutil.rmtree, settings.SYSTEMJS_CACHE_DIR, True)
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle(self, mock_subproc_popen):
+        pre_calls = self.connect(signals.pre_bundle)
+        post_calls = self.connect(signals.post_bundle)
+        mock_Popen(mock_subproc_popen, side_effect=lambda: (_bundle('app/dummy'), ('', ''))[1])
+
+        System().bundle('app/dummy')
+
+        outfile = os.path.join(settings.STATIC_ROOT, 'SYSTEMJS', 'app/dummy.js')
+        self.assertEqual(len(pre_calls), 1)
+        self.assertEqual(pre_calls[0]['sender'], SystemBundle)
+        self.assertEqual(pre_calls[0]['outfile'], outfile)
+        self.assertEqual(len(post_calls), 1)
+        self.assertEqual(post_calls[0]['app'], 'app/dummy')
+        self.assertEqual(post_calls[0]['command'], 'jspm bundle app/dummy {}'.format(outfile))
+        self.assertEqual(post_calls[0]['size'], os.path.getsize(outfile))
+        self.assertIsNone(post_calls[0]['error'])
+        self.assertGreaterEqual(post_calls[0]['duration'], 0)
+
+    @mock.patch('subprocess.Popen')
+    def test_bundle_failed(self, mock_subproc_popen):
+        post_calls = self.connect(signals.post_bundle)
+        mock_Popen(mock_subproc_popen)
+        mock_subproc_popen.side_effect = OSError('no jspm')
+
+        with self.assertRaises(BundleError):
+            System().bundle('app/dummy')
+
+        self.assertIsInstance(post_calls[0]['error'], BundleError)
+        self.assertIsNone(post_calls[0]['size'])
+
+    @mock.patch('subprocess.Popen')
+    def test_restored(self, mock_subproc_popen):
+        restored_calls = self.connect(signals.bundle_restored)
+        post_calls = self.connect(signals.post_bundle)
+        mock_Popen(mock_subproc_popen, side_effect=lambda: (_bundle('app/dummy'), ('', ''))[1])
+        system = System()
+        system.artifact_cache = FileSystemArtifactCache()
+
+        system.bundle('app/dummy', cache_key='abcdef')
+        system.bundle('app/dummy', cache_key='abcdef')
+
+        self.assertEqual(len(post_calls), 1)
+        self.assertEqual(len(restored_calls), 1)
+        self.assertEqual(restored_calls[0]['key'], 'abcdef')
+        self.assertGreater(restored_calls[0]['size'], 0)
+
+    @mock.patch('subprocess.Popen')
+    def test_trace(self, mock_subproc_popen):
+        pre_calls = self.connect(signals.pre_trace)
+        post_calls = self.connect(signals.post_trace)
+        mock_Popen(mock_subproc_popen, return_value=(json.dumps({'app/dummy.js': {}}), ''))
+
+        SystemTracer().trace('app/dummy')
+
+        self.assertEqual(pre_calls[0]['sender'], SystemTracer)
+        self.assertEqual(pre_calls[0]['apps'], ['app/dummy'])
+        self.assertEqual(post_calls[0]['command'], 'trace-deps.js app/dummy')
+        self.assertIsNone(post_calls[0]['error'])
+
+
+class TemplateTagSignalsTests(SignalsMixin, SimpleTestCase):
+
+    def setUp(self):
+        super(TemplateTagSignalsTests, self).setUp()
+        self.template = engines['django'].from_string(
+            """{% load system_tags %}{% systemjs_import 'myapp/main' %}""")
+
+    @override_settings(SYSTEMJS_ENABLED=False)
+    def test_render(self):
+        calls = self.connect(signals.systemjs_import_rendered)
+
+        output = self.template.render(Context())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0]['sender'], SystemImportNode)
+        self.assertEqual(calls[0]['app'], 'myapp/main')
+        self.assertEqual(calls[0]['output'], output)
+
+    @override_settings(SYSTEMJS_ENABLED=False)
+    @mock.patch('systemjs.templatetags.system_tags.time')
+    def test_no_receivers(self, mock_time):
+        self.template.render(Context())
+        # nothing is measured
+        self.assertFalse(mock_time.time.called)
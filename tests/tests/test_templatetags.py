@@ -1,10 +1,20 @@
 from __future__ import unicode_literals
 
+import io
+import json
+import mock
+import os
+import shutil
+import tempfile
+
 from django.conf import settings
 from django.test import SimpleTestCase, override_settings
 from django.template import Context, engines, TemplateSyntaxError
 from django.utils.six.moves.urllib.parse import urljoin
 
+from systemjs.manifest import BundleManifest, ManifestReloader
+from systemjs.paths import clear_url_cache
+
 
 django_engine = engines['django']
 
@@ -71,3 +81,289 @@ class TemplateTagTests(SimpleTestCase):
             rendered,
             """<script type="text/javascript" src="http://localhost:3000/assets/myapp/main.js"></script>"""
         )
+
+    @override_settings(SYSTEMJS_ENABLED=True, SYSTEMJS_OUTPUT_DIR='SJ', STATIC_ROOT=tempfile.mkdtemp())
+    def test_common_bundle(self):
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT)
+        BundleManifest(preloads={
+            'myapp/main': ['SJ/systemjs-common.js'],
+            'myapp/other': ['SJ/systemjs-common.js'],
+        }).save()
+
+        template = django_engine.from_string(
+            """{% load system_tags %}{% systemjs_import 'myapp/main' %}{% systemjs_import 'myapp/other' %}"""
+        )
+        rendered = template.render(self.context)
+
+        # the common bundle is loaded once, before the app bundles
+        self.assertEqual(
+            rendered,
+            """<script type="text/javascript" src="/static/SJ/systemjs-common.js"></script>\n"""
+            """<script type="text/javascript" src="/static/SJ/myapp/main.js"></script>"""
+            """<script type="text/javascript" src="/static/SJ/myapp/other.js"></script>"""
+        )
+
+    @override_settings(SYSTEMJS_ENABLED=True, SYSTEMJS_OUTPUT_DIR='SJ', STATIC_ROOT=tempfile.mkdtemp())
+    def test_common_bundle_include(self):
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT)
+        BundleManifest(preloads={
+            'myapp/main': ['SJ/systemjs-common.js'],
+            'myapp/other': ['SJ/systemjs-common.js'],
+        }).save()
+
+        included = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'myapp/other' %}""")
+        template = django_engine.from_string(
+            """{% load system_tags %}{% systemjs_import 'myapp/main' %}{% include included %}"""
+        )
+        rendered = template.render({'included': included.template})
+
+        # the included template gets its own render context
+        self.assertEqual(rendered.count('/static/SJ/systemjs-common.js'), 1)
+        self.assertIn('/static/SJ/myapp/other.js', rendered)
+
+
+@override_settings(SYSTEMJS_ENABLED=True)
+class BundleURLCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        super(BundleURLCacheTests, self).setUp()
+        clear_url_cache()
+        self.template = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'myapp/main' %}""")
+
+    @mock.patch('systemjs.paths.staticfiles_storage')
+    def test_url_cached(self, mock_storage):
+        mock_storage.url.return_value = '/static/SYSTEMJS/myapp/main.1234.js'
+
+        for i in range(3):
+            rendered = self.template.render(Context())
+
+        self.assertEqual(mock_storage.url.call_count, 1)
+        self.assertIn('/static/SYSTEMJS/myapp/main.1234.js', rendered)
+
+    def test_cleared_on_setting_changed(self):
+        rendered = self.template.render(Context())
+        self.assertIn('/static/SYSTEMJS/myapp/main.js', rendered)
+
+        with self.settings(SYSTEMJS_OUTPUT_DIR='SJ'):
+            rendered = self.template.render(Context())
+        self.assertIn('/static/SJ/myapp/main.js', rendered)
+
+        with self.settings(STATIC_URL='/assets/'):
+            rendered = self.template.render(Context())
+        self.assertIn('/assets/SYSTEMJS/myapp/main.js', rendered)
+
+    @override_settings(STATIC_ROOT=tempfile.mkdtemp())
+    @mock.patch('systemjs.paths.staticfiles_storage')
+    def test_cleared_on_manifest_change(self, mock_storage):
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT)
+        mock_storage.url.side_effect = lambda path: '/static/' + path
+
+        self.template.render(Context())
+        BundleManifest().save()
+        self.template.render(Context())
+
+        self.assertEqual(mock_storage.url.call_count, 2)
+
+
+@override_settings(SYSTEMJS_ENABLED=True, SYSTEMJS_OUTPUT_DIR='SJ')
+class PrecomputedOutputTests(SimpleTestCase):
+
+    def test_literal_built_once(self):
+        template = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'myapp/main' async %}""")
+
+        with mock.patch.object(BundleManifest, 'get', wraps=BundleManifest.get) as mock_get:
+            outputs = set(template.render(Context()) for i in range(3))
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(outputs), 1)
+        self.assertHTMLEqual(
+            outputs.pop(), """<script async src="/static/SJ/myapp/main.js" type="text/javascript"></script>""")
+
+    def test_variable_path(self):
+        template = django_engine.from_string("""{% load system_tags %}{% systemjs_import app %}""")
+
+        self.assertIn('/static/SJ/myapp/main.js', template.render(Context({'app': 'myapp/main'})))
+        self.assertIn('/static/SJ/myapp/other.js', template.render(Context({'app': 'myapp/other'})))
+
+    def test_variable_attribute(self):
+        template = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'myapp/main' nonce=nonce %}""")
+
+        self.assertIn('nonce="abc"', template.render(Context({'nonce': 'abc'})))
+        self.assertIn('nonce="def"', template.render(Context({'nonce': 'def'})))
+
+    def test_filtered_path(self):
+        template = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'MYAPP/main'|lower %}""")
+
+        self.assertIn('/static/SJ/myapp/main.js', template.render(Context()))
+
+    def test_disabled_rebuilt_on_setting_changed(self):
+        template = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'myapp/main' %}""")
+
+        with self.settings(SYSTEMJS_ENABLED=False):
+            self.assertEqual(
+                template.render(Context()),
+                """<script type="text/javascript">System.import('myapp/main.js');</script>""")
+
+        with self.settings(SYSTEMJS_ENABLED=False, SYSTEMJS_SERVER_URL='http://localhost:3000/'):
+            self.assertEqual(
+                template.render(Context()),
+                """<script src="http://localhost:3000/myapp/main.js" type="text/javascript"></script>""")
+
+        self.assertIn('/static/SJ/myapp/main.js', template.render(Context()))
+
+    @override_settings(STATIC_ROOT=tempfile.mkdtemp())
+    def test_preloads_once_per_page(self):
+        self.addCleanup(shutil.rmtree, settings.STATIC_ROOT)
+        BundleManifest(preloads={'myapp/main': ['SJ/systemjs-common.js']}).save()
+        template = django_engine.from_string(
+            """{% load system_tags %}{% systemjs_import 'myapp/main' %}{% systemjs_import 'myapp/main' %}""")
+
+        for i in range(2):
+            rendered = template.render(Context())
+            self.assertEqual(rendered.count('/static/SJ/systemjs-common.js'), 1)
+
+
+@override_settings(
+    SYSTEMJS_ENABLED=True, SYSTEMJS_OUTPUT_DIR='SJ', SYSTEMJS_MANIFEST_CHECK_INTERVAL=0,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.ManifestStaticFilesStorage')
+class ManifestReloadTests(SimpleTestCase):
+
+    def setUp(self):
+        super(ManifestReloadTests, self).setUp()
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        settings_patcher = self.settings(STATIC_ROOT=static_root)
+        settings_patcher.enable()
+        self.addCleanup(settings_patcher.disable)
+
+        reloader_patcher = mock.patch('systemjs.templatetags.system_tags.manifest_reloader', ManifestReloader())
+        self.reloader = reloader_patcher.start()
+        self.addCleanup(reloader_patcher.stop)
+
+        self.template = django_engine.from_string("""{% load system_tags %}{% systemjs_import 'myapp/main' %}""")
+
+    def write_manifest(self, hashed_name, mtime=None, **paths):
+        path = os.path.join(settings.STATIC_ROOT, 'staticfiles.json')
+        paths['SJ/myapp/main.js'] = hashed_name
+        with open(path, 'w') as outfile:
+            json.dump({'version': '1.0', 'paths': paths}, outfile)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_reload_on_change(self):
+        self.write_manifest('SJ/myapp/main.1234.js', mtime=1000)
+        self.assertIn('/static/SJ/myapp/main.1234.js', self.template.render(Context()))
+
+        self.write_manifest('SJ/myapp/main.5678.js', mtime=2000)
+        self.assertIn('/static/SJ/myapp/main.5678.js', self.template.render(Context()))
+
+    def test_bundle_manifest_reloaded(self):
+        self.write_manifest('SJ/myapp/main.1234.js', mtime=1000)
+        self.template.render(Context())
+        self.write_manifest(
+            'SJ/myapp/main.1234.js', mtime=2000, **{'SJ/systemjs-common.js': 'SJ/systemjs-common.abcd.js'})
+
+        path = BundleManifest.get_path()
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as outfile:
+            json.dump({'version': 1, 'preload': {'myapp/main': ['SJ/systemjs-common.js']}}, outfile)
+
+        self.assertIn('/static/SJ/systemjs-common.abcd.js', self.template.render(Context()))
+
+    @mock.patch('systemjs.manifest.time.time')
+    def test_check_interval(self, mock_time):
+        mock_time.return_value = 1000
+        self.write_manifest('SJ/myapp/main.1234.js', mtime=1000)
+
+        with self.settings(SYSTEMJS_MANIFEST_CHECK_INTERVAL=5):
+            self.template.render(Context())
+            self.write_manifest('SJ/myapp/main.5678.js', mtime=2000)
+
+            mock_time.return_value = 1004
+            self.assertIn('/static/SJ/myapp/main.1234.js', self.template.render(Context()))
+
+            mock_time.return_value = 1005
+            self.assertIn('/static/SJ/myapp/main.5678.js', self.template.render(Context()))
+
+    @override_settings(SYSTEMJS_MANIFEST_CHECK_INTERVAL=None)
+    def test_never_checked(self):
+        self.write_manifest('SJ/myapp/main.1234.js', mtime=1000)
+        with mock.patch.object(self.reloader, 'get_state') as mock_get_state:
+            self.template.render(Context())
+            self.template.render(Context())
+        self.assertFalse(mock_get_state.called)
+
+    def test_invalid_manifest_kept(self):
+        self.write_manifest('SJ/myapp/main.1234.js', mtime=1000)
+        self.template.render(Context())
+
+        with open(os.path.join(settings.STATIC_ROOT, 'staticfiles.json'), 'w') as outfile:
+            outfile.write('{"version": "1.0", "pat')
+
+        with mock.patch('systemjs.manifest.logger') as mock_logger:
+            rendered = self.template.render(Context())
+        self.assertIn('/static/SJ/myapp/main.1234.js', rendered)
+        self.assertTrue(mock_logger.warning.called)
+
+    def test_missing_manifest_kept(self):
+        self.write_manifest('SJ/myapp/main.1234.js', mtime=1000)
+        self.template.render(Context())
+
+        # collectstatic removes the manifest before writing it again
+        os.remove(os.path.join(settings.STATIC_ROOT, 'staticfiles.json'))
+        with mock.patch('systemjs.manifest.logger') as mock_logger:
+            rendered = self.template.render(Context())
+        self.assertIn('/static/SJ/myapp/main.1234.js', rendered)
+        self.assertTrue(mock_logger.warning.called)
+
+        self.write_manifest('SJ/myapp/main.5678.js', mtime=2000)
+        self.assertIn('/static/SJ/myapp/main.5678.js', self.template.render(Context()))
+
+
+@override_settings(SYSTEMJS_ENABLED=True, SYSTEMJS_OUTPUT_DIR='SJ')
+class BundleManifestTests(SimpleTestCase):
+
+    def setUp(self):
+        super(BundleManifestTests, self).setUp()
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        settings_patcher = self.settings(STATIC_ROOT=static_root)
+        settings_patcher.enable()
+        self.addCleanup(settings_patcher.disable)
+
+    @mock.patch('systemjs.manifest.staticfiles_storage')
+    def test_read_through_storage(self, mock_storage):
+        content = json.dumps({'version': 1, 'preload': {'myapp/main': ['SJ/systemjs-common.js']}})
+        mock_storage.open.return_value = io.BytesIO(content.encode('utf-8'))
+
+        manifest = BundleManifest.load()
+
+        mock_storage.open.assert_called_once_with('SJ/bundles.json')
+        self.assertEqual(manifest.get_preloads('myapp/main'), ['SJ/systemjs-common.js'])
+        self.assertFalse(manifest.missing)
+
+    def test_local_fallback(self):
+        BundleManifest(preloads={'myapp/main': ['SJ/systemjs-common.js']}).save()
+        with mock.patch('systemjs.manifest.staticfiles_storage') as mock_storage:
+            mock_storage.open.side_effect = NotImplementedError
+            manifest = BundleManifest.load()
+        self.assertEqual(manifest.get_preloads('myapp/main'), ['SJ/systemjs-common.js'])
+
+    @mock.patch('systemjs.manifest.logger')
+    def test_missing_without_bundles(self, mock_logger):
+        clear_url_cache()
+        manifest = BundleManifest.get()
+
+        self.assertTrue(manifest.missing)
+        self.assertTrue(mock_logger.warning.called)
+
+    @mock.patch('systemjs.manifest.logger')
+    def test_missing_next_to_bundles(self, mock_logger):
+        """
+        Without --common or --vendor, no manifest is written next to the bundles.
+        """
+        os.makedirs(os.path.join(settings.STATIC_ROOT, 'SJ'))
+        clear_url_cache()
+        BundleManifest.get()
+
+        self.assertFalse(mock_logger.warning.called)
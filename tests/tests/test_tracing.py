@@ -7,16 +7,18 @@ import tempfile
 import time
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management import call_command
 from django.test import SimpleTestCase, override_settings
 
-from systemjs.base import SystemTracer
+from systemjs.base import SystemTracer, TraceError
+from systemjs.jspm import locate_package_json
 from .helpers import mock_Popen
 
 try:
-    from unittest.mock import patch
+    from unittest.mock import Mock, patch
 except ImportError:
-    from mock import patch
+    from mock import Mock, patch
 
 
 class TracerTests(SimpleTestCase):
@@ -76,6 +78,97 @@ class TracerTests(SimpleTestCase):
         self.assertEqual(mock.call_count, 1)  # should still be only one
         self.assertEqual(process_mock.communicate.call_count, 1)
 
+    def test_invalid_hash_algorithm(self):
+        from systemjs.conf import SystemJSConf
+
+        with self.assertRaises(ImproperlyConfigured):
+            SystemJSConf().configure_hash_algorithm('not-a-hash')
+
+    def _trace_result(self, app):
+        return {
+            '{}.js'.format(app): {
+                'name': '{}.js'.format(app),
+                'timestamp': int(time.time()),
+                'path': '{}.js'.format(app),
+                'skip': False,
+            }
+        }
+
+    @patch('systemjs.base.subprocess.Popen')
+    def test_trace_many(self, mock):
+        """
+        Test that multiple apps are traced with a single node process.
+        """
+        trace_result = {
+            'app/dummy': self._trace_result('app/dummy'),
+            'app/dummy2': self._trace_result('app/dummy2'),
+        }
+        return_value = (json.dumps(trace_result), '')  # no stdout, no stderr
+        process_mock = mock_Popen(mock, return_value=return_value)
+
+        tracer = SystemTracer()
+        result = tracer.trace_many(['app/dummy', 'app/dummy2'])
+
+        self.assertEqual(result, trace_result)
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(mock.call_args[0], ('trace-deps.js --many app/dummy app/dummy2',))
+        self.assertEqual(process_mock.communicate.call_count, 1)
+
+        # the results are cached on the tracer
+        self.assertEqual(tracer.trace('app/dummy2'), trace_result['app/dummy2'])
+        tracer.trace_many(['app/dummy', 'app/dummy2'])
+        self.assertEqual(mock.call_count, 1)
+
+    @patch('systemjs.base.subprocess.Popen')
+    def test_trace_many_single_app(self, mock):
+        """
+        Test that the regular trace is used if only one app needs tracing.
+        """
+        trace_result = self._trace_result('app/dummy')
+        mock_Popen(mock, return_value=(json.dumps(trace_result), ''))
+
+        tracer = SystemTracer()
+        self.assertEqual(tracer.trace_many(['app/dummy']), {'app/dummy': trace_result})
+        self.assertEqual(mock.call_args[0], ('trace-deps.js app/dummy',))
+
+    @patch('systemjs.base.subprocess.Popen')
+    def test_trace_many_processes(self, mock):
+        """
+        Test that large numbers of apps are divided over multiple node processes.
+        """
+        apps = ['app/dummy{}'.format(i) for i in range(5)]
+
+        def popen(cmd, **kwargs):
+            batch = cmd.split()[2:]
+            result = {app: self._trace_result(app) for app in batch}
+            process = Mock()
+            process.communicate.return_value = (json.dumps(result), '')
+            return process
+
+        mock.side_effect = popen
+
+        tracer = SystemTracer()
+        with patch.object(tracer, 'min_batch_size', 2):
+            result = tracer.trace_many(apps, jobs=4)
+
+        self.assertEqual(sorted(result.keys()), apps)
+        # 5 apps, at least 2 apps per process
+        self.assertEqual(mock.call_count, 3)
+        commands = sorted(call[0][0] for call in mock.call_args_list)
+        self.assertEqual(commands, [
+            'trace-deps.js --many app/dummy0 app/dummy1',
+            'trace-deps.js --many app/dummy2 app/dummy3',
+            'trace-deps.js --many app/dummy4',
+        ])
+
+    @patch('systemjs.base.subprocess.Popen')
+    def test_trace_many_error(self, mock):
+        mock_Popen(mock, return_value=('', 'Error: module not found'))
+
+        tracer = SystemTracer()
+        with self.assertRaises(TraceError):
+            tracer.trace_many(['app/dummy', 'app/dummy2'])
+
 
 @override_settings(SYSTEMJS_CACHE_DIR=tempfile.mkdtemp())
 class TracerFileTests(SimpleTestCase):
@@ -320,3 +413,195 @@ class TracerFileTests(SimpleTestCase):
         }
         with patch.object(tracer, 'trace', return_value=trace_result2):
             self.assertTrue(tracer.check_needs_update('app/dummy'))
+
+    def _write_current_depcache(self, tracer):
+        """
+        Write a depcache matching the current state of the files on disk.
+        """
+        dep_tree = {}
+        for name in ['app/dummy.js', 'app/dependency.js']:
+            dep_tree[name] = {
+                'name': name,
+                'timestamp': tracer.get_timestamp(name),
+                'path': name,
+                'skip': False,
+            }
+        tracer.write_depcache({'app/dummy': dep_tree}, {})
+        return dep_tree
+
+    def test_needs_update_fast_path(self):
+        """
+        Assert that unchanged apps are detected without tracing them.
+        """
+        dep_tree = self._write_current_depcache(SystemTracer())
+
+        tracer = SystemTracer()
+        with patch.object(tracer, 'trace') as mock_trace:
+            self.assertTrue(tracer.stats_unchanged('app/dummy'))
+            self.assertFalse(tracer.check_needs_update('app/dummy'))
+            self.assertEqual(tracer.get_dep_trees(['app/dummy']), {'app/dummy': dep_tree})
+        self.assertFalse(mock_trace.called)
+
+    def test_needs_update_fast_path_file_modified(self):
+        """
+        Assert that a modified file falls back to tracing the app.
+        """
+        dep_tree = self._write_current_depcache(SystemTracer())
+        path = os.path.join(settings.STATIC_ROOT, 'app', 'dependency.js')
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        tracer = SystemTracer()
+        self.assertFalse(tracer.stats_unchanged('app/dummy'))
+        # the file was touched, but the contents and dependencies are the same
+        with patch.object(tracer, 'trace', return_value=dep_tree) as mock_trace:
+            self.assertFalse(tracer.check_needs_update('app/dummy'))
+        mock_trace.assert_called_once_with('app/dummy')
+
+    def test_needs_update_fast_path_config_modified(self):
+        """
+        Assert that modified jspm config files fall back to tracing the app.
+        """
+        dep_tree = self._write_current_depcache(SystemTracer())
+
+        tracer = SystemTracer()
+        with patch('systemjs.base.find_config_files', return_value=[__file__]):
+            self.assertFalse(tracer.stats_unchanged('app/dummy'))
+            with patch.object(tracer, 'trace', return_value=dep_tree) as mock_trace:
+                tracer.check_needs_update('app/dummy')
+        mock_trace.assert_called_once_with('app/dummy')
+
+    def test_hashes_match_stat_fast_path(self):
+        """
+        Assert that files are only hashed if their size or mtime changed.
+        """
+        dep_tree = self._write_current_depcache(SystemTracer())
+
+        tracer = SystemTracer()
+        self.assertEqual(
+            tracer.get_stats()['app/dummy.js'],
+            tracer.get_stat('app/dummy.js')
+        )
+        with patch.object(tracer, 'get_hash') as mock_hash:
+            self.assertTrue(tracer.hashes_match(dep_tree))
+        self.assertFalse(mock_hash.called)
+
+        path = os.path.join(settings.STATIC_ROOT, 'app', 'dependency.js')
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        # touched, but the contents are the same
+        with patch.object(tracer, 'get_hash', wraps=tracer.get_hash) as mock_hash:
+            self.assertTrue(tracer.hashes_match(dep_tree))
+        mock_hash.assert_called_once_with('app/dependency.js', 'md5')
+
+    def test_write_depcache_reuses_hashes(self):
+        """
+        Assert that rewriting the depcache doesn't re-hash unmodified files.
+        """
+        dep_tree = self._write_current_depcache(SystemTracer())
+
+        tracer = SystemTracer()
+        with patch.object(tracer, 'get_hash') as mock_hash:
+            tracer.write_depcache({'app/dummy': dep_tree}, {})
+        self.assertFalse(mock_hash.called)
+
+    def test_hash_memoized(self):
+        """
+        Assert that a file shared by multiple apps is hashed only once.
+        """
+        tracer = SystemTracer()
+        with patch.object(tracer.storage, 'open', wraps=tracer.storage.open) as mock_open:
+            self.assertEqual(tracer.get_hash('app/dummy.js'), '65d75b61cae058018d3de1fa433a43da')
+            self.assertEqual(tracer.get_hash('app/dummy.js'), '65d75b61cae058018d3de1fa433a43da')
+        self.assertEqual(mock_open.call_count, 1)
+
+    def test_hash_files_parallel(self):
+        tracer = SystemTracer(jobs=2)
+        hashes = tracer.hash_files(['app/dummy.js', 'app/dependency.js', 'app/dummy.js'])
+        self.assertEqual(hashes, {
+            'app/dummy.js': '65d75b61cae058018d3de1fa433a43da',
+            'app/dependency.js': 'd41d8cd98f00b204e9800998ecf8427e',
+        })
+
+    @override_settings(SYSTEMJS_HASH_ALGORITHM='sha1')
+    def test_hash_algorithm_setting(self):
+        tracer = SystemTracer()
+        dep_tree = self._write_current_depcache(tracer)
+
+        with open(tracer.cache_file_path) as infile:
+            depcache = json.load(infile)
+        self.assertEqual(depcache['hash_algorithm'], 'sha1')
+        self.assertEqual(depcache['hashes']['app/dummy.js'], '7721904e2623b742fc7dfe01cc322bc267f6c4bf')
+        self.assertTrue(SystemTracer().hashes_match(dep_tree))
+
+    def test_hash_algorithm_old_depcache(self):
+        """
+        Assert that depcaches without algorithm are compared with md5 hashes.
+        """
+        with open(os.path.join(settings.SYSTEMJS_CACHE_DIR, 'deps.json'), 'w') as outfile:
+            json.dump(self._depcache, outfile)
+        dep_tree = self._depcache['packages']['app/dummy']
+
+        with self.settings(SYSTEMJS_HASH_ALGORITHM='sha1'):
+            tracer = SystemTracer()
+            self.assertEqual(tracer.get_hash_algorithm(), 'md5')
+            self.assertTrue(tracer.hashes_match(dep_tree))
+
+    def test_depcache_index(self):
+        """
+        Assert that the depcache stores which apps use a file.
+        """
+        tracer = SystemTracer()
+        dep_tree = self._write_current_depcache(tracer)
+        other_tree = {'app/dependency.js': dep_tree['app/dependency.js']}
+        tracer.write_depcache({'app/dummy': dep_tree, 'app/other': other_tree}, {})
+
+        tracer = SystemTracer()
+        self.assertEqual(tracer.cached_deps['version'], 2)
+        self.assertEqual(tracer.get_index(), {
+            'app/dummy.js': ['app/dummy'],
+            'app/dependency.js': ['app/dummy', 'app/other'],
+        })
+
+        self.assertEqual(tracer.find_affected_apps(['app/dummy.js']), ['app/dummy'])
+        self.assertEqual(tracer.find_affected_apps(['app/dependency.js']), ['app/dummy', 'app/other'])
+        self.assertEqual(tracer.find_affected_apps(['app/unknown.js']), [])
+
+        # absolute paths, in STATIC_ROOT and in the app static directory
+        static_root = os.path.abspath(settings.STATIC_ROOT)
+        self.assertEqual(
+            tracer.find_affected_apps([os.path.join(static_root, 'app', 'dummy.js')]),
+            ['app/dummy']
+        )
+        source = os.path.join(os.path.abspath(settings.PROJECT_DIR), 'app', 'static', 'app', 'dummy.js')
+        self.assertEqual(tracer.find_affected_apps([source]), ['app/dummy'])
+
+        # relative to the current directory, e.g. from `git diff --name-only`
+        self.assertEqual(tracer.find_affected_apps([os.path.relpath(source)]), ['app/dummy'])
+
+        # changes to the jspm config affect all apps
+        with patch('systemjs.base.find_config_files', return_value=['/project/jspm.config.js']):
+            self.assertEqual(
+                tracer.find_affected_apps(['/project/jspm.config.js']),
+                ['app/dummy', 'app/other']
+            )
+
+        # also when passed relative to the current directory
+        package_json = os.path.abspath(locate_package_json())
+        self.assertEqual(
+            tracer.find_affected_apps([os.path.relpath(package_json)]),
+            ['app/dummy', 'app/other']
+        )
+
+    @patch('systemjs.base.json.load')
+    def test_depcache_index_version_1(self, mock_json_load):
+        mock_json_load.return_value = self._depcache
+        with open(os.path.join(settings.SYSTEMJS_CACHE_DIR, 'deps.json'), 'w') as outfile:
+            outfile.write('{}')
+
+        tracer = SystemTracer()
+        self.assertEqual(tracer.get_index(), {
+            'app/dummy.js': ['app/dummy'],
+            'app/dependency.js': ['app/dummy'],
+        })
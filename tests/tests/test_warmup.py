@@ -0,0 +1,74 @@
+from __future__ import unicode_literals
+
+import io
+import json
+import mock
+import os
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.test import SimpleTestCase, override_settings
+from django.utils.encoding import force_text
+
+from systemjs.paths import clear_url_cache, get_bundle_url
+from systemjs.warmup import warmup
+
+
+@override_settings(SYSTEMJS_ENABLED=True)
+class WarmupTests(SimpleTestCase):
+
+    def setUp(self):
+        super(WarmupTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'apps.json')
+        clear_url_cache()
+        self.addCleanup(clear_url_cache)
+
+    def write_apps_manifest(self, apps, templates=None):
+        with io.open(self.path, 'w') as outfile:
+            outfile.write(force_text(json.dumps({'apps': apps, 'templates': templates or {}})))
+
+    @mock.patch('systemjs.warmup.logger')
+    @mock.patch('systemjs.paths.staticfiles_storage')
+    def test_urls_cached(self, mock_storage, mock_logger):
+        mock_storage.url.side_effect = lambda path: '/static/' + path
+        self.write_apps_manifest(['app/dummy', 'app/other'], {'base.html': ['app/dummy']})
+
+        warmup(self.path)
+
+        self.assertEqual(mock_storage.url.call_count, 2)
+        self.assertEqual(get_bundle_url('app/dummy'), '/static/SYSTEMJS/app/dummy.js')
+        self.assertEqual(mock_storage.url.call_count, 2)
+        self.assertFalse(mock_logger.warning.called)
+        self.assertEqual(mock_logger.info.call_args[0][1:3], (2, 1))
+
+    @override_settings(SYSTEMJS_ENABLED=False)
+    @mock.patch('systemjs.paths.staticfiles_storage')
+    def test_disabled(self, mock_storage):
+        self.write_apps_manifest(['app/dummy'])
+        warmup(self.path)
+        self.assertFalse(mock_storage.url.called)
+
+    @mock.patch('systemjs.warmup.logger')
+    def test_missing_manifest(self, mock_logger):
+        warmup(self.path)
+        self.assertTrue(mock_logger.warning.called)
+
+    @mock.patch('systemjs.warmup.logger')
+    def test_missing_template(self, mock_logger):
+        self.write_apps_manifest([], {'does-not-exist.html': ['app/dummy']})
+        warmup(self.path)
+        self.assertTrue(mock_logger.warning.called)
+
+    @mock.patch('systemjs.warmup.warmup')
+    def test_ready(self, mock_warmup):
+        app_config = apps.get_app_config('systemjs')
+
+        app_config.ready()
+        self.assertFalse(mock_warmup.called)
+
+        with self.settings(SYSTEMJS_WARMUP=self.path):
+            app_config.ready()
+        mock_warmup.assert_called_once_with(self.path)
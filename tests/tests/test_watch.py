@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from systemjs.watch import PollingWatcher
+
+
+class PollingWatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        super(PollingWatcherTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+        self.path = os.path.join(self.tmpdir, 'main.js')
+        self._write(self.path, 'alert("foo");')
+        self.watcher = PollingWatcher([self.path], interval=0.01)
+
+    def _write(self, path, content):
+        with open(path, 'w') as outfile:
+            outfile.write(content)
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.wait(timeout=0.05), set())
+
+    def test_changed(self):
+        self._write(self.path, 'alert("foobar");')
+        self.assertEqual(self.watcher.wait(timeout=0.05), {self.path})
+        # the change is only reported once
+        self.assertEqual(self.watcher.wait(timeout=0.05), set())
+
+    def test_deleted(self):
+        os.remove(self.path)
+        self.assertEqual(self.watcher.wait(timeout=0.05), {self.path})
+
+    def test_set_paths(self):
+        other = os.path.join(self.tmpdir, 'other.js')
+        self._write(other, 'alert("bar");')
+        self.watcher.set_paths([self.path, other])
+        self._write(other, 'alert("foobar");')
+        self.assertEqual(self.watcher.wait(timeout=0.05), {other})
+
+    def test_changes_debounced(self):
+        """
+        Assert that changes in quick succession are reported together.
+        """
+        other = os.path.join(self.tmpdir, 'other.js')
+        self._write(other, 'alert("bar");')
+        self.watcher.set_paths([self.path, other])
+
+        changes = [{self.path}, {other}, set()]
+        self.watcher.wait = lambda timeout=None: changes.pop(0)
+        self.assertEqual(next(self.watcher.changes(debounce=0.01)), {self.path, other})